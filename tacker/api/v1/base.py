@@ -372,9 +372,13 @@ class Controller(object):
             return create_result
 
         kwargs = {self._parent_id_name: parent_id} if parent_id else {}
-        if self._collection in body and self._native_bulk:
+        # plugins supporting native bulk may implement it for some of their
+        # resources only
+        bulk_creator = getattr(self._plugin, "%s_bulk" % action, None)
+        if (self._collection in body and self._native_bulk and
+                bulk_creator is not None):
             # plugin does atomic bulk create operations
-            obj_creator = getattr(self._plugin, "%s_bulk" % action)
+            obj_creator = bulk_creator
             objs = obj_creator(request.context, body, **kwargs)
             # Use first element of list to discriminate attributes which
             # should be removed because of authZ policies
@@ -53,6 +53,7 @@ def Resource(controller, faults=None, deserializers=None, serializers=None):
     format_types = {'xml': 'application/xml',
                     'json': 'application/json'}
     action_status = dict(create=201, delete=204)
+    streamed_actions = ('index',)
 
     default_deserializers.update(deserializers or {})
     default_serializers.update(serializers or {})
@@ -138,15 +139,19 @@ def Resource(controller, faults=None, deserializers=None, serializers=None):
             raise webob.exc.HTTPInternalServerError(**kwargs)
 
         status = action_status.get(action, 200)
-        body = serializer.serialize(result)
         # NOTE(jkoelker) Comply with RFC2616 section 9.7
         if status == 204:
-            content_type = ''
-            body = None
-
+            return webob.Response(request=request, status=status,
+                                  content_type='', body=None)
+        if action in streamed_actions:
+            # collections are encoded while they are sent, the response
+            # uses chunked transfer encoding
+            return webob.Response(request=request, status=status,
+                                  content_type=content_type,
+                                  app_iter=serializer.serialize_iter(result))
         return webob.Response(request=request, status=status,
                               content_type=content_type,
-                              body=body)
+                              body=serializer.serialize(result))
     return resource
 
 
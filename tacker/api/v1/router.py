@@ -22,6 +22,7 @@ import webob.exc
 
 from tacker.api import extensions
 from tacker.api.v1 import attributes
+from tacker import policy
 from tacker import wsgi
 
 
@@ -60,4 +61,6 @@ class APIRouter(wsgi.Router):
         mapper = routes_mapper.Mapper()
         ext_mgr = extensions.ExtensionManager.get_instance()
         ext_mgr.extend_resources("1.0", attributes.RESOURCE_ATTRIBUTE_MAP)
+        # load the policy rules before the first request needs them
+        policy.init()
         super(APIRouter, self).__init__(mapper)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Run the VNF lifecycle tasks stored in the database and monitor VNFs.
+
+Any number of conductors can run on any node, next to or instead of the
+workers of tacker-server. They share the tasks through their leases, and
+the monitoring of the VNFs as members of the monitor cluster.
+"""
+
+import signal
+import sys
+
+import eventlet
+eventlet.monkey_patch()
+from eventlet import event
+from oslo_config import cfg
+import oslo_i18n
+
+from tacker import _i18n
+_i18n.enable_lazy()
+from tacker.common import config
+from tacker import manager
+from tacker.plugins.common import constants
+from tacker.vnfm import lifecycle_tasks
+from tacker.vnfm import monitor_cluster
+
+
+oslo_i18n.install("tacker")
+
+
+def main():
+    config.init(sys.argv[1:])
+    if not cfg.CONF.config_file:
+        sys.exit(_("ERROR: Unable to find configuration file via the default"
+                   " search paths (~/.tacker/, ~/, /etc/tacker/, /etc/) and"
+                   " the '--config-file' option!"))
+    run_tasks = cfg.CONF.vnf_lifecycle_tasks.backend == lifecycle_tasks.DB
+    if not run_tasks and not monitor_cluster.is_enabled():
+        sys.exit(_("ERROR: tacker-conductor requires the '%s' backend in "
+                   "[vnf_lifecycle_tasks] or [monitor_cluster] enabled") %
+                 lifecycle_tasks.DB)
+    config.setup_logging(cfg.CONF)
+
+    # loading the plugin starts its VNF monitor
+    plugin = manager.TackerManager.get_service_plugins()[constants.VNFM]
+    # unwind through the finally below when stopped by the service manager
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        if run_tasks:
+            plugin.start_lifecycle_worker()
+        # the workers run in green threads until the process is stopped
+        event.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        plugin.stop_workers()
+
+
+if __name__ == "__main__":
+    main()
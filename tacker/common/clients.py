@@ -10,9 +10,79 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+import hashlib
+import threading
+import time
+
 from heatclient import client as heatclient
+from oslo_config import cfg
+from oslo_log import log as logging
+
 from tacker.vnfm import keystone
 
+LOG = logging.getLogger(__name__)
+
+OPTS = [
+    cfg.IntOpt('cache_size', default=128,
+               help=_('Number of authenticated OpenStack clients kept for '
+                      'reuse across requests')),
+    cfg.IntOpt('cache_ttl', default=3600,
+               help=_('Seconds a cached OpenStack client is reused before '
+                      'it is authenticated again; 0 disables the cache')),
+]
+cfg.CONF.register_opts(OPTS, 'openstack_clients')
+
+
+def config_opts():
+    return [('openstack_clients', OPTS)]
+
+
+class ClientCache(object):
+    """LRU cache of clients with a time to live.
+
+    Cached keystone clients keep their session, so tokens are reused until
+    the auth plugin finds them close to expiry and HTTP connections are
+    pooled per session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()   # key => (expiry, client)
+
+    def get(self, key, create):
+        ttl = cfg.CONF.openstack_clients.cache_ttl
+        if ttl <= 0:
+            return create()
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry and entry[0] > now:
+                self._entries[key] = entry
+                return entry[1]
+
+        client = create()
+        with self._lock:
+            self._entries[key] = (now + ttl, client)
+            while len(self._entries) > cfg.CONF.openstack_clients.cache_size:
+                self._entries.popitem(last=False)
+        return client
+
+    def invalidate(self, auth_url=None):
+        """Drop cached clients, optionally only those of one auth_url."""
+        with self._lock:
+            for key in list(self._entries):
+                if auth_url is None or key[0] == auth_url:
+                    del self._entries[key]
+
+
+_CLIENT_CACHE = ClientCache()
+
+
+def invalidate_cache(auth_url=None):
+    _CLIENT_CACHE.invalidate(auth_url)
+
 
 class OpenstackClients(object):
 
@@ -24,6 +94,11 @@ class OpenstackClients(object):
         self.region_name = region_name
         self.auth_attr = auth_attr
 
+    def _cache_key(self, *extra):
+        fingerprint = hashlib.sha256(
+            repr(sorted(self.auth_attr.items())).encode('utf-8')).hexdigest()
+        return (self.auth_attr['auth_url'], fingerprint) + extra
+
     def _keystone_client(self):
         version = self.auth_attr['auth_url'].rpartition('/')[2]
         return self.keystone_plugin.initialize_client(version,
@@ -42,11 +117,13 @@ class OpenstackClients(object):
     @property
     def keystone(self):
         if not self.keystone_client:
-            self.keystone_client = self._keystone_client()
+            self.keystone_client = _CLIENT_CACHE.get(
+                self._cache_key('keystone'), self._keystone_client)
         return self.keystone_client
 
     @property
     def heat(self):
         if not self.heat_client:
-            self.heat_client = self._heat_client()
+            self.heat_client = _CLIENT_CACHE.get(
+                self._cache_key('heat', self.region_name), self._heat_client)
         return self.heat_client
@@ -0,0 +1,222 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process ICMP echo prober.
+
+A single socket is shared by every caller in the process. Echo requests
+for a whole batch of addresses are written back to back and replies are
+matched to their batch by source address and sequence number, so checking
+thousands of addresses costs no fork/exec.
+"""
+
+import itertools
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+from oslo_log import log as logging
+
+from tacker._i18n import _LE
+from tacker._i18n import _LW
+
+LOG = logging.getLogger(__name__)
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+_HEADER = struct.Struct('!BBHHH')
+_PAYLOAD = struct.Struct('!d')
+
+_prober = None
+_prober_lock = threading.Lock()
+
+
+def checksum(data):
+    """Return the RFC 1071 internet checksum of data."""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def build_echo_request(ident, seq, payload=None):
+    if payload is None:
+        payload = _PAYLOAD.pack(time.time())
+    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    chksum = checksum(header + payload)
+    return _HEADER.pack(ICMP_ECHO_REQUEST, 0, chksum, ident, seq) + payload
+
+
+def parse_echo_reply(packet, has_ip_header):
+    """Return (ident, seq) of an echo reply, or None for other packets."""
+    if has_ip_header:
+        if not packet:
+            return None
+        packet = packet[(ord(packet[0:1]) & 0x0f) * 4:]
+    if len(packet) < _HEADER.size:
+        return None
+    icmp_type, _code, _chksum, ident, seq = _HEADER.unpack(
+        packet[:_HEADER.size])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return ident, seq
+
+
+class _Batch(object):
+    def __init__(self, addresses):
+        self.outstanding = set(addresses)
+        self.replied = set()
+        self.done = threading.Event()
+
+    def reply(self, address):
+        self.replied.add(address)
+        self.outstanding.discard(address)
+        if not self.outstanding:
+            self.done.set()
+
+
+class IcmpProber(object):
+    """Send ICMP echo requests to many IPv4 addresses over one socket.
+
+    An unprivileged datagram ICMP socket is used when the kernel allows it
+    (net.ipv4.ping_group_range), otherwise a raw socket, which needs
+    CAP_NET_RAW.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}   # (address, seq) => _Batch
+        self._seq = itertools.count()
+        self._ident = os.getpid() & 0xffff
+        self._sock = None
+        self._raw = False
+
+    def _ensure_socket(self):
+        with self._lock:
+            if self._sock is not None:
+                return
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM,
+                                     socket.IPPROTO_ICMP)
+                self._raw = False
+            except socket.error:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_RAW,
+                                     socket.IPPROTO_ICMP)
+                self._raw = True
+            self._sock = sock
+        LOG.debug('Spawning ICMP reply listener (raw socket: %s)', self._raw)
+        listener = threading.Thread(target=self._receive_loop)
+        listener.daemon = True
+        listener.start()
+
+    def _receive_loop(self):
+        while True:
+            try:
+                readable, _w, _x = select.select([self._sock], [], [], 1)
+                if not readable:
+                    continue
+                packet, peer = self._sock.recvfrom(2048)
+            except Exception:
+                LOG.exception(_LE('ICMP reply listener failed'))
+                time.sleep(1)
+                continue
+            self._handle_reply(packet, peer[0])
+
+    def _handle_reply(self, packet, address):
+        reply = parse_echo_reply(packet, self._raw)
+        if reply is None:
+            return
+        ident, seq = reply
+        # datagram ICMP sockets have the identifier rewritten by the kernel
+        if self._raw and ident != self._ident:
+            return
+        with self._lock:
+            batch = self._pending.pop((address, seq), None)
+        if batch is not None:
+            batch.reply(address)
+
+    def _next_seq(self):
+        return next(self._seq) & 0xffff
+
+    @staticmethod
+    def _resolve(host):
+        try:
+            return socket.gethostbyname(host)
+        except socket.error:
+            LOG.warning(_LW('Cannot resolve address: %s'), host)
+            return None
+
+    def ping(self, hosts, count=1, timeout=1, interval=0):
+        """Check reachability of a batch of hosts.
+
+        A host is reachable if any of its `count` echo requests is
+        answered within `timeout` seconds of the last request sent.
+
+        :param hosts: iterable of IPv4 addresses or host names
+        :param count: number of echo requests sent to every host
+        :param timeout: seconds to wait for replies
+        :param interval: seconds to wait between rounds of requests
+        :returns: dict of host => bool
+        """
+        hosts = set(hosts)
+        resolved = dict((host, self._resolve(host)) for host in hosts)
+        addresses = set(addr for addr in resolved.values() if addr)
+        if addresses:
+            self._ensure_socket()
+        batch = _Batch(addresses)
+        keys = []
+
+        try:
+            for round_ in range(int(count)):
+                if round_ and float(interval):
+                    time.sleep(float(interval))
+                for address in list(batch.outstanding):
+                    seq = self._next_seq()
+                    with self._lock:
+                        self._pending[(address, seq)] = batch
+                    keys.append((address, seq))
+                    try:
+                        self._sock.sendto(
+                            build_echo_request(self._ident, seq),
+                            (address, 0))
+                    except socket.error as e:
+                        LOG.warning(_LW('Cannot send ICMP echo to %(addr)s: '
+                                        '%(err)s'),
+                                    {'addr': address, 'err': e})
+                if not batch.outstanding:
+                    break
+            if batch.outstanding:
+                batch.done.wait(float(timeout))
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._pending.pop(key, None)
+
+        return dict((host, resolved[host] in batch.replied)
+                    for host in hosts)
+
+    def is_reachable(self, host, count=1, timeout=1, interval=0):
+        return self.ping([host], count=count, timeout=timeout,
+                         interval=interval)[host]
+
+
+def get_prober():
+    """Return the process-wide prober."""
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            _prober = IcmpProber()
+    return _prober
@@ -0,0 +1,169 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""JSON codecs used to encode and decode API bodies.
+
+The standard library codec is always available. The accelerated codecs are
+used when their library is installed and the json_codec option selects
+them, either by name or with 'auto' which picks the first one available.
+"""
+
+import json
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+import six
+
+LOG = logging.getLogger(__name__)
+
+AUTO = 'auto'
+STDLIB = 'stdlib'
+# accelerated codecs, by order of preference for 'auto'
+ACCELERATED = ('orjson', 'ujson', 'simplejson')
+
+OPTS = [
+    cfg.StrOpt('json_codec',
+               default=STDLIB,
+               choices=(AUTO, STDLIB) + ACCELERATED,
+               help=_("JSON library encoding and decoding API bodies. "
+                      "'auto' uses the fastest of orjson, ujson and "
+                      "simplejson that is installed, and the standard "
+                      "library if none is. A payload an accelerated "
+                      "library cannot encode is encoded with the standard "
+                      "library")),
+]
+cfg.CONF.register_opts(OPTS)
+
+
+def config_opts():
+    return [(None, OPTS)]
+
+
+def _default(obj):
+    # the representation the API has always used for values JSON has no
+    # type for, notably datetimes
+    return six.text_type(obj)
+
+
+class Codec(object):
+    """A JSON library, with the encoding options the API uses."""
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, obj):
+        """Encode obj to a text string."""
+        return self._dumps(obj)
+
+    def loads(self, data):
+        """Decode a text or UTF-8 encoded string.
+
+        :raises: ValueError if data is not valid JSON
+        """
+        return self._loads(data)
+
+
+class _AcceleratedCodec(Codec):
+
+    def dumps(self, obj):
+        try:
+            return self._dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            # e.g. integers beyond 64 bits, or an older library version
+            # lacking an option
+            return _STDLIB_CODEC.dumps(obj)
+
+
+_STDLIB_CODEC = Codec(STDLIB,
+                      lambda obj: json.dumps(obj, default=_default),
+                      jsonutils.loads)
+
+
+def _load_orjson(orjson):
+    # UUIDs are encoded natively, datetimes are left to _default so that
+    # they keep the format of the standard library codec
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default,
+                            option=option).decode('utf-8')
+    return dumps, orjson.loads
+
+
+def _load_ujson(ujson):
+    def dumps(obj):
+        return ujson.dumps(obj, default=_default,
+                           escape_forward_slashes=False)
+    return dumps, ujson.loads
+
+
+def _load_simplejson(simplejson):
+    def dumps(obj):
+        return simplejson.dumps(obj, default=_default)
+    return dumps, simplejson.loads
+
+
+_LOADERS = {'orjson': _load_orjson,
+            'ujson': _load_ujson,
+            'simplejson': _load_simplejson}
+
+_lock = threading.Lock()
+_codecs = {STDLIB: _STDLIB_CODEC}
+
+
+def _load(name):
+    module = importutils.try_import(name)
+    if module is None:
+        return None
+    dumps, loads = _LOADERS[name](module)
+    return _AcceleratedCodec(name, dumps, loads)
+
+
+def get_codec(name=None):
+    """Return the codec named name, json_codec by default.
+
+    A codec whose library is not installed falls back to the standard
+    library codec.
+    """
+    name = name or cfg.CONF.json_codec
+    codec = _codecs.get(name)
+    if codec is not None:
+        return codec
+    with _lock:
+        if name not in _codecs:
+            candidates = ACCELERATED if name == AUTO else (name,)
+            for candidate in candidates:
+                codec = _load(candidate)
+                if codec is not None:
+                    break
+            else:
+                if name != AUTO:
+                    LOG.warning(_('JSON library %s is not installed, using '
+                                  'the standard library'), name)
+                codec = _STDLIB_CODEC
+            LOG.debug('Using the %(codec)s JSON codec for %(name)s',
+                      {'codec': codec.name, 'name': name})
+            _codecs[name] = codec
+        return _codecs[name]
+
+
+def dumps(obj):
+    return get_codec().dumps(obj)
+
+
+def loads(data):
+    return get_codec().loads(data)
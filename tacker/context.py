@@ -127,6 +127,15 @@ class Context(ContextBaseWithSession):
             self._session = db_api.get_session()
         return self._session
 
+    def copy_with_new_session(self):
+        """Return a copy of this context that opens its own session.
+
+        Sessions must not be shared between green threads.
+        """
+        context = copy.copy(self)
+        context._session = None
+        return context
+
 
 def get_admin_context():
     return Context(user_id=None,
@@ -14,12 +14,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import sqlalchemy as sa
-from sqlalchemy.orm import exc as orm_exc
+import atexit
 
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
+import sqlalchemy as sa
+from sqlalchemy.orm import exc as orm_exc
 
+from tacker.common import exceptions
 from tacker.common import log
+from tacker.db.common_services import event_writer
 from tacker.db import db_base
 from tacker.db import model_base
 from tacker.db import types
@@ -34,6 +39,14 @@ EVENT_ATTRIBUTES = ('id', 'resource_id', 'resource_type', 'resource_state',
 
 
 class Event(model_base.BASE):
+    __table_args__ = (
+        sa.Index('ix_events_resource_id_timestamp', 'resource_id',
+                 'timestamp'),
+        sa.Index('ix_events_event_type_timestamp', 'event_type',
+                 'timestamp'),
+        model_base.BASE.__table_args__
+    )
+
     id = sa.Column(sa.Integer, primary_key=True, nullable=False,
                    autoincrement=True)
     resource_id = sa.Column(types.Uuid, nullable=False)
@@ -44,6 +57,10 @@ class Event(model_base.BASE):
     event_details = sa.Column(types.Json)
 
 
+EVENT_WRITER = event_writer.EventWriter(Event.__table__)
+atexit.register(EVENT_WRITER.flush)
+
+
 class CommonServicesPluginDb(common_services.CommonServicesPluginBase,
                              db_base.CommonDbMixin):
 
@@ -64,36 +81,75 @@ class CommonServicesPluginDb(common_services.CommonServicesPluginBase,
                          if key in fields))
         return resource
 
-    @log.log
     def create_event(self, context, res_id, res_type, res_state, evt_type,
                      tstamp, details=""):
+        values = dict(resource_id=res_id,
+                      resource_type=res_type,
+                      resource_state=res_state,
+                      event_details=details,
+                      event_type=evt_type,
+                      timestamp=tstamp)
+        durability = cfg.CONF.event_writer.durability
         try:
-            with context.session.begin(subtransactions=True):
-                event_db = Event(
-                    resource_id=res_id,
-                    resource_type=res_type,
-                    resource_state=res_state,
-                    event_details=details,
-                    event_type=evt_type,
-                    timestamp=tstamp)
-                context.session.add(event_db)
+            if durability == event_writer.SYNC:
+                with context.session.begin(subtransactions=True):
+                    event_db = Event(**values)
+                    context.session.add(event_db)
+                return self._make_event_dict(event_db)
+            EVENT_WRITER.write(values,
+                               wait=durability == event_writer.GROUP_COMMIT)
         except Exception as e:
             LOG.exception(_("create event error: %s"), str(e))
             raise common_services.EventCreationFailureException(
                 error_str=str(e))
-        return self._make_event_dict(event_db)
+        # batched events get their id when they are inserted
+        return dict(values, id=None)
 
-    @log.log
-    def get_event(self, context, event_id, fields=None):
+    def _get_event(self, context, event_id):
         try:
-            events_db = self._get_by_id(context, Event, event_id)
+            return self._get_by_id(context, Event, event_id)
         except orm_exc.NoResultFound:
             raise common_services.EventNotFoundException(evt_id=event_id)
+
+    @log.log
+    def get_event(self, context, event_id, fields=None):
+        events_db = self._get_event(context, event_id)
         return self._make_event_dict(events_db, fields)
 
+    @staticmethod
+    def _parse_times(name, values):
+        try:
+            return [timeutils.normalize_time(timeutils.parse_isotime(value))
+                    for value in values]
+        except ValueError:
+            msg = _("'%(values)s' - %(name)s should be ISO 8601 "
+                    "timestamps") % {'values': values, 'name': name}
+            raise exceptions.InvalidInput(error_message=msg)
+
+    def _filter_events_by_time(self, query, filters):
+        """Apply the since and until filters of get_events."""
+        if filters.get('since'):
+            query = query.filter(Event.timestamp >= max(
+                self._parse_times('since', filters['since'])))
+        if filters.get('until'):
+            query = query.filter(Event.timestamp < min(
+                self._parse_times('until', filters['until'])))
+        return query
+
     @log.log
     def get_events(self, context, filters=None, fields=None, sorts=None,
-                   limit=None, marker_obj=None, page_reverse=False):
+                   limit=None, marker=None, page_reverse=False):
+        """List events.
+
+        Besides the event attributes, filters accepts 'since' and 'until',
+        ISO 8601 timestamps bounding the event timestamps. Pages are read
+        with keyset pagination from the event following the marker.
+        """
+        marker_obj = self._get_marker_obj(context, 'event', limit, marker)
         return self._get_collection(context, Event, self._make_event_dict,
                                     filters, fields, sorts, limit,
                                     marker_obj, page_reverse)
+
+
+db_base.CommonDbMixin.register_model_query_hook(
+    Event, 'time_range', None, None, '_filter_events_by_time')
@@ -0,0 +1,213 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from six.moves import queue
+
+from tacker.db import api as db_api
+
+LOG = logging.getLogger(__name__)
+
+SYNC = 'sync'
+GROUP_COMMIT = 'group_commit'
+ASYNC = 'async'
+
+OPTS = [
+    cfg.StrOpt('durability',
+               default=SYNC,
+               choices=[SYNC, GROUP_COMMIT, ASYNC],
+               help=_("How audit events are written. 'sync' inserts every "
+                      "event within the transaction of the resource it "
+                      "belongs to; 'group_commit' hands events to a "
+                      "background writer committing them in batches and "
+                      "waits for the commit; 'async' does not wait for the "
+                      "commit, events still queued are lost if the server "
+                      "dies")),
+    cfg.IntOpt('queue_size',
+               default=10000,
+               help=_("Maximum number of audit events waiting to be "
+                      "written; callers block when the queue is full")),
+    cfg.IntOpt('batch_size',
+               default=500,
+               help=_("Maximum number of audit events inserted in one "
+                      "statement")),
+    cfg.FloatOpt('flush_interval',
+                 default=0.05,
+                 help=_("Seconds the background writer waits for more "
+                        "events before committing a batch")),
+    cfg.IntOpt('stats_interval',
+               default=300,
+               help=_("Seconds between two log lines reporting the counters "
+                      "and the queue depth of the background writer, at "
+                      "warning level when callers blocked on a full queue "
+                      "since the previous one; 0 disables them")),
+]
+cfg.CONF.register_opts(OPTS, 'event_writer')
+
+
+def config_opts():
+    return [('event_writer', OPTS)]
+
+
+class _PendingEvent(object):
+    def __init__(self, values, wait):
+        self.values = values
+        self.done = threading.Event() if wait else None
+        self.error = None
+
+    def resolve(self, error=None):
+        if self.done is not None:
+            self.error = error
+            self.done.set()
+
+
+class EventWriter(object):
+    """Write audit events in batches from a background thread.
+
+    Events are put on a bounded queue and a single writer thread inserts
+    everything queued within flush_interval with one executemany INSERT and
+    one commit. A full queue blocks the callers until the writer catches
+    up; how often and how long this happens is reported by stats(), which
+    the writer thread logs every stats_interval.
+
+    A forked process gets a writer thread and a queue of its own on its
+    first write; the events queued by the parent stay with the parent.
+    """
+
+    def __init__(self, table):
+        self._table = table
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stats = {'queued': 0, 'written': 0, 'batches': 0,
+                       'failed': 0, 'blocked': 0, 'blocked_seconds': 0.0,
+                       'max_depth': 0}
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                LOG.debug('Spawning audit event writer thread')
+                self._pid = os.getpid()
+                self._stats = dict.fromkeys(self._stats, 0)
+                self._stats['blocked_seconds'] = 0.0
+                self._queue = queue.Queue(cfg.CONF.event_writer.queue_size)
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def write(self, values, wait=False):
+        """Queue an event for insertion.
+
+        :param values: dict of column values of the event
+        :param wait: block until the event is committed
+        :raises: the insertion error if wait is set and the batch failed
+        """
+        self._ensure_thread()
+        pending = _PendingEvent(values, wait)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            start = time.time()
+            self._queue.put(pending)
+            with self._lock:
+                self._stats['blocked'] += 1
+                self._stats['blocked_seconds'] += time.time() - start
+        with self._lock:
+            self._stats['queued'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'],
+                                           self._queue.qsize())
+        if wait:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+
+    def stats(self):
+        """Return the writer counters and the current queue depth."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['depth'] = self._queue.qsize() if self._queue else 0
+        return stats
+
+    def _next_batch(self, block=True, timeout=None):
+        batch_size = cfg.CONF.event_writer.batch_size
+        batch = []
+        try:
+            batch.append(self._queue.get(block, timeout))
+        except queue.Empty:
+            return batch
+        deadline = time.time() + cfg.CONF.event_writer.flush_interval
+        while len(batch) < batch_size:
+            timeout = deadline - time.time()
+            try:
+                if timeout > 0:
+                    batch.append(self._queue.get(True, timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, batch):
+        error = None
+        try:
+            session = db_api.get_session()
+            with session.begin():
+                session.execute(self._table.insert(),
+                                [pending.values for pending in batch])
+        except Exception as e:
+            LOG.exception(_('Unable to write %d audit events'), len(batch))
+            error = e
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['failed' if error else 'written'] += len(batch)
+        for pending in batch:
+            pending.resolve(error)
+
+    def _report_stats(self, previous):
+        stats = self.stats()
+        if stats['blocked'] > previous.get('blocked', 0):
+            LOG.warning(_('Audit event writer falling behind, callers '
+                          'blocked on a full queue: %s'), stats)
+        else:
+            LOG.info(_('Audit event writer: %s'), stats)
+        return stats
+
+    def _run(self):
+        interval = cfg.CONF.event_writer.stats_interval
+        next_report = time.time() + interval
+        reported = {}
+        while True:
+            timeout = None
+            if interval > 0:
+                timeout = max(next_report - time.time(), 0)
+            batch = self._next_batch(timeout=timeout)
+            if batch:
+                self._insert(batch)
+            if interval > 0 and time.time() >= next_report:
+                reported = self._report_stats(reported)
+                next_report = time.time() + interval
+
+    def flush(self):
+        """Write the events queued so far from the calling thread."""
+        if self._queue is None:
+            return
+        while True:
+            batch = self._next_batch(block=False)
+            if not batch:
+                return
+            self._insert(batch)
@@ -0,0 +1,35 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add indexes to events
+
+Revision ID: a5c3e1f9b7d2
+Revises: 4ee19c8a6d0a
+Create Date: 2016-09-12 10:21:37.418215
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a5c3e1f9b7d2'
+down_revision = '4ee19c8a6d0a'
+
+from alembic import op
+
+
+def upgrade(active_plugins=None, options=None):
+    op.create_index('ix_events_resource_id_timestamp', 'events',
+                    ['resource_id', 'timestamp'])
+    op.create_index('ix_events_event_type_timestamp', 'events',
+                    ['event_type', 'timestamp'])
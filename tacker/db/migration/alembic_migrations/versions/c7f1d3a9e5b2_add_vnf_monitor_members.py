@@ -0,0 +1,42 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add vnf monitor members
+
+Revision ID: c7f1d3a9e5b2
+Revises: e8a4c2b6d1f3
+Create Date: 2016-09-27 10:15:38.204511
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c7f1d3a9e5b2'
+down_revision = 'e8a4c2b6d1f3'
+
+from alembic import op
+import sqlalchemy as sa
+
+from tacker.db import types
+
+
+def upgrade(active_plugins=None, options=None):
+    op.create_table('vnf_monitor_members',
+        sa.Column('id', types.Uuid, nullable=False),
+        sa.Column('host', sa.String(255), nullable=False),
+        sa.Column('pid', sa.Integer, nullable=False),
+        sa.Column('heartbeat_at', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        mysql_engine='InnoDB'
+    )
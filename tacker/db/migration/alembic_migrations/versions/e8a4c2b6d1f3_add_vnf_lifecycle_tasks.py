@@ -0,0 +1,49 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add vnf lifecycle tasks
+
+Revision ID: e8a4c2b6d1f3
+Revises: a5c3e1f9b7d2
+Create Date: 2016-09-20 08:42:11.630917
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e8a4c2b6d1f3'
+down_revision = 'a5c3e1f9b7d2'
+
+from alembic import op
+import sqlalchemy as sa
+
+from tacker.db import types
+
+
+def upgrade(active_plugins=None, options=None):
+    op.create_table('vnf_lifecycle_tasks',
+        sa.Column('id', types.Uuid, nullable=False),
+        sa.Column('task_type', sa.String(64), nullable=False),
+        sa.Column('vnf_id', types.Uuid, nullable=False),
+        sa.Column('context', types.Json, nullable=False),
+        sa.Column('payload', types.Json, nullable=False),
+        sa.Column('owner', sa.String(255), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime, nullable=True),
+        sa.Column('attempts', sa.Integer, nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        mysql_engine='InnoDB'
+    )
+    op.create_index('ix_vnf_lifecycle_tasks_type_lease',
+                    'vnf_lifecycle_tasks', ['task_type', 'lease_expires_at'])
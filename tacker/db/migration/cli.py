@@ -107,10 +107,15 @@ def update_head_file(config):
 
 def purge_deleted(config, cmd):
     """Remove database records that have been previously soft deleted."""
-    purge_tables.purge_deleted(config.tacker_config,
-                      CONF.command.resource,
-                      CONF.command.age,
-                      CONF.command.granularity)
+    counts = purge_tables.purge_deleted(
+        config.tacker_config, CONF.command.resource, CONF.command.age,
+        CONF.command.granularity, chunk_size=CONF.command.chunk_size,
+        sleep=CONF.command.sleep, dry_run=CONF.command.dry_run,
+        progress_file=CONF.command.progress_file)
+    action = _('to purge') if CONF.command.dry_run else _('purged')
+    for table_name in sorted(counts):
+        alembic_util.msg('%s: %d rows %s' % (table_name, counts[table_name],
+                                             action))
 
 
 def add_command_parsers(subparsers):
@@ -155,6 +160,20 @@ def add_command_parsers(subparsers):
         '-g', '--granularity', default='days',
         choices=['days', 'hours', 'minutes', 'seconds'],
         help=_('Granularity to use for age argument, defaults to days.'))
+    parser.add_argument(
+        '--chunk-size', type=int, default=1000,
+        help=_('Number of rows deleted per transaction, defaults to 1000.'))
+    parser.add_argument(
+        '--sleep', type=float, default=0,
+        help=_('Seconds to wait between two chunks, defaults to 0.'))
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help=_('Only count the rows that would be purged.'))
+    parser.add_argument(
+        '--progress-file',
+        help=_('File recording the purge progress. A purge interrupted '
+               'while using it resumes where it stopped when it is run '
+               'again with the same file.'))
 
 
 command_opt = cfg.SubCommandOpt('command',
@@ -23,6 +23,8 @@ Based on this comparison database can be healed with healing migration.
 
 from tacker.db import model_base
 from tacker.db.nfvo import nfvo_db  # noqa
+from tacker.db.vm import lifecycle_task_db  # noqa
+from tacker.db.vm import monitor_member_db  # noqa
 from tacker.db.vm import vm_db  # noqa
 
 
@@ -14,75 +14,247 @@
 #    under the License.
 
 import datetime
+import os
+import threading
+import time
+
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 import sqlalchemy
 from sqlalchemy import and_
 from sqlalchemy import create_engine, pool
-from sqlalchemy import inspect
-
-from oslo_utils import timeutils
 
 from tacker.common import exceptions
+from tacker.db.migration.models import head
 
 
+LOG = logging.getLogger(__name__)
+
 GRANULARITY = {'days': 86400, 'hours': 3600, 'minutes': 60, 'seconds': 1}
 
+EVENTS_TABLE = 'events'
 
-def _generate_associated_tables_map(inspector):
-    assoc_map = {}
-    table_names = inspector.get_table_names()
-    for t in table_names:
-        fk_list = inspector.get_foreign_keys(t)
-        for fk in fk_list:
-            k = str(fk['referred_table'])
-            v = str(fk['constrained_columns'][0])
-            if k not in assoc_map.keys():
-                assoc_map[k] = {str(t): v}
-            else:
-                assoc_map[k][str(t)] = v
-    assoc_keys = assoc_map.keys()
-    for k, v in assoc_map.items():
-        for k1 in v.keys():
-            if k1 in assoc_keys:
-                del assoc_map[k][k1]
+
+def _generate_associated_tables_map(meta):
+    """Map soft deleted tables to the tables referencing them.
+
+    Tables that are soft deleted themselves are purged on their own and
+    left out of the map values.
+    """
+    purgeable = set(name for name, table in meta.tables.items()
+                    if 'deleted_at' in table.c)
+    assoc_map = dict((name, {}) for name in purgeable)
+    for name, table in meta.tables.items():
+        if name in purgeable:
+            continue
+        for fk in table.foreign_keys:
+            referred = fk.column.table.name
+            if referred in purgeable:
+                assoc_map[referred][name] = fk.parent.name
     return assoc_map
 
 
-def _purge_resource_tables(t, meta, engine, time_line, assoc_map):
-    table_load = sqlalchemy.Table(t, meta, autoload=True)
-    table_del_query = table_load.delete().where(
-        table_load.c.deleted_at <= time_line)
-    if t in assoc_map.keys():
-        select_id_query = sqlalchemy.select([table_load.c.id]).where(
-            table_load.c.deleted_at <= time_line)
-        resource_ids = [i[0] for i in list(engine.execute(select_id_query))]
-        if resource_ids:
-            for key, val in assoc_map[t].items():
-                assoc_table_load = sqlalchemy.Table(key, meta, autoload=True)
-                assoc_table_del_query = assoc_table_load.delete().where(
-                    assoc_table_load.c[val].in_(resource_ids))
-                engine.execute(assoc_table_del_query)
-    engine.execute(table_del_query)
-
-
-def _purge_events_table(meta, engine, time_line):
-    tname = "events"
-    event_table_load = sqlalchemy.Table(tname, meta, autoload=True)
-    event_select_query = sqlalchemy.select(
-        [event_table_load.c.resource_id]
-    ).where(
-        and_(event_table_load.c.event_type == 'DELETE',
-             event_table_load.c.timestamp <= time_line
-             )
-    )
-    resource_ids = [i[0] for i in list(engine.execute(event_select_query))]
-    if resource_ids:
-        event_delete_query = event_table_load.delete().where(
-            event_table_load.c.resource_id.in_(resource_ids)
-        )
-        engine.execute(event_delete_query)
-
-
-def purge_deleted(tacker_config, table_name, age, granularity='days'):
+def _generate_purge_levels(meta, table_names):
+    """Order tables so that referencing tables are purged first.
+
+    :returns: list of lists of table names; tables of one list do not
+              reference each other and can be purged in parallel
+    """
+    remaining = set(table_names)
+    levels = []
+    while remaining:
+        referenced = set(fk.column.table.name
+                         for name in remaining
+                         for fk in meta.tables[name].foreign_keys
+                         if fk.column.table.name != name)
+        level = sorted(remaining - referenced)
+        levels.append(level)
+        remaining -= set(level)
+    return levels
+
+
+class _Progress(object):
+    """Progress of a purge, saved to a file after every chunk.
+
+    A purge run with the same file and resource resumes after the last
+    purged chunk of every table, with the cutoff time of the first run.
+    """
+
+    def __init__(self, path, resource, time_line):
+        self._path = path
+        self._lock = threading.Lock()
+        self.resource = resource
+        self.time_line = time_line
+        self.tables = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = jsonutils.loads(f.read())
+            if state.get('resource') == resource:
+                self.time_line = timeutils.normalize_time(
+                    timeutils.parse_isotime(state['time_line']))
+                self.tables = state['tables']
+                LOG.info(_('Resuming purge of %(resource)s deleted before '
+                           '%(time_line)s'), {'resource': resource,
+                                              'time_line': self.time_line})
+
+    def get(self, table_name):
+        return self.tables.get(table_name, {'marker': None, 'done': False,
+                                            'deleted': 0})
+
+    def save(self, table_name, marker, deleted, done=False):
+        with self._lock:
+            self.tables[table_name] = {'marker': marker, 'done': done,
+                                       'deleted': deleted}
+            if not self._path:
+                return
+            tmp_path = self._path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(jsonutils.dumps(
+                    {'resource': self.resource,
+                     'time_line': self.time_line.isoformat(),
+                     'tables': self.tables}))
+            os.rename(tmp_path, self._path)
+
+    def finish(self):
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+
+
+def _purge_chunks(engine, table_name, progress, select_chunk, delete_chunk,
+                  chunk_size, sleep):
+    """Delete the rows of a table one committed chunk at a time.
+
+    :param select_chunk: callable taking a connection, the marker and a
+                         limit and returning the next (marker, row) pairs
+    :param delete_chunk: callable taking a connection and the selected rows
+                         and returning the number of rows deleted
+    """
+    state = progress.get(table_name)
+    if state['done']:
+        return state['deleted']
+    marker, deleted = state['marker'], state['deleted']
+    while True:
+        with engine.begin() as conn:
+            chunk = select_chunk(conn, marker, chunk_size)
+            if chunk:
+                deleted += delete_chunk(conn,
+                                        [row for _marker, row in chunk])
+        if chunk:
+            marker = chunk[-1][0]
+        done = len(chunk) < chunk_size
+        progress.save(table_name, marker, deleted, done)
+        LOG.debug('Purged %(count)d %(table)s rows', {'count': deleted,
+                                                      'table': table_name})
+        if done:
+            return deleted
+        time.sleep(sleep)
+
+
+def _purge_resource_table(engine, table, children, time_line, progress,
+                          chunk_size, sleep):
+    def select_chunk(conn, marker, limit):
+        query = sqlalchemy.select([table.c.id]).where(
+            table.c.deleted_at <= time_line)
+        if marker is not None:
+            query = query.where(table.c.id > marker)
+        query = query.order_by(table.c.id).limit(limit)
+        return [(row[0], row[0]) for row in conn.execute(query)]
+
+    def delete_chunk(conn, resource_ids):
+        for child, column in children:
+            conn.execute(child.delete().where(
+                child.c[column].in_(resource_ids)))
+        return conn.execute(table.delete().where(
+            table.c.id.in_(resource_ids))).rowcount
+
+    return _purge_chunks(engine, table.name, progress, select_chunk,
+                         delete_chunk, chunk_size, sleep)
+
+
+def _delete_events_condition(table, time_line):
+    return and_(table.c.event_type == 'DELETE',
+                table.c.timestamp <= time_line)
+
+
+def _purge_events_table(engine, table, time_line, progress, chunk_size,
+                        sleep):
+    """Purge the events of resources deleted before time_line."""
+    def select_chunk(conn, marker, limit):
+        query = sqlalchemy.select([table.c.id, table.c.resource_id]).where(
+            _delete_events_condition(table, time_line))
+        if marker is not None:
+            query = query.where(table.c.id > marker)
+        query = query.order_by(table.c.id).limit(limit)
+        return [(row[0], row[1]) for row in conn.execute(query)]
+
+    def delete_chunk(conn, resource_ids):
+        return conn.execute(table.delete().where(
+            table.c.resource_id.in_(set(resource_ids)))).rowcount
+
+    return _purge_chunks(engine, table.name, progress, select_chunk,
+                         delete_chunk, chunk_size, sleep)
+
+
+def _count_rows(engine, meta, table_names, assoc_map, time_line):
+    counts = {}
+    with engine.connect() as conn:
+        for name in table_names:
+            table = meta.tables[name]
+            if name == EVENTS_TABLE:
+                deleted_ids = sqlalchemy.select([table.c.resource_id]).where(
+                    _delete_events_condition(table, time_line))
+                condition = table.c.resource_id.in_(deleted_ids)
+            else:
+                deleted_ids = sqlalchemy.select([table.c.id]).where(
+                    table.c.deleted_at <= time_line)
+                condition = table.c.deleted_at <= time_line
+                for child_name, column in assoc_map[name].items():
+                    child = meta.tables[child_name]
+                    counts[child_name] = conn.execute(
+                        sqlalchemy.select([sqlalchemy.func.count()]).where(
+                            child.c[column].in_(deleted_ids))).scalar()
+            counts[name] = conn.execute(
+                sqlalchemy.select([sqlalchemy.func.count()]).where(
+                    condition)).scalar()
+    return counts
+
+
+def _run_parallel(functions):
+    errors = []
+
+    def run(function):
+        try:
+            function()
+        except Exception as e:
+            LOG.exception(_('Purge failed'))
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(function,))
+               for function in functions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def purge_deleted(tacker_config, table_name, age, granularity='days',
+                  chunk_size=1000, sleep=0, dry_run=False,
+                  progress_file=None):
+    """Purge soft deleted rows older than age.
+
+    Rows are deleted in chunks of chunk_size, each in its own transaction,
+    sleeping between chunks to leave room for other writers. Tables not
+    referencing each other are purged in parallel.
+
+    :param dry_run: only count the rows that would be purged
+    :param progress_file: file recording the purge progress, an interrupted
+                          purge resumes from it
+    :returns: dict of table name => number of rows purged, or to be purged
+              for a dry run
+    """
     try:
         age = int(age)
     except ValueError:
@@ -97,22 +269,52 @@ def purge_deleted(tacker_config, table_name, age, granularity='days'):
                 "or seconds") % granularity
         raise exceptions.InvalidInput(error_message=msg)
 
+    try:
+        chunk_size = int(chunk_size)
+        if chunk_size <= 0:
+            raise ValueError()
+    except ValueError:
+        msg = _("'%s' - chunk size should be a positive integer") % chunk_size
+        raise exceptions.InvalidInput(error_message=msg)
+
     age *= GRANULARITY[granularity]
 
     time_line = timeutils.utcnow() - datetime.timedelta(seconds=age)
     engine = get_engine(tacker_config)
-    meta = sqlalchemy.MetaData()
-    meta.bind = engine
-    inspector = inspect(engine)
-    assoc_map = _generate_associated_tables_map(inspector)
+    meta = head.get_metadata()
+    assoc_map = _generate_associated_tables_map(meta)
 
-    if table_name == 'events':
-        _purge_events_table(meta, engine, time_line)
+    if table_name == EVENTS_TABLE:
+        table_names = [EVENTS_TABLE]
     elif table_name == 'all':
-        for t in assoc_map.keys():
-            _purge_resource_tables(t, meta, engine, time_line, assoc_map)
+        table_names = list(assoc_map.keys())
     else:
-        _purge_resource_tables(table_name, meta, engine, time_line, assoc_map)
+        table_names = [table_name]
+
+    progress = _Progress(progress_file, table_name, time_line)
+    time_line = progress.time_line
+
+    if dry_run:
+        return _count_rows(engine, meta, table_names, assoc_map, time_line)
+
+    counts = {}
+
+    def purge(name):
+        table = meta.tables[name]
+        if name == EVENTS_TABLE:
+            counts[name] = _purge_events_table(engine, table, time_line,
+                                               progress, chunk_size, sleep)
+        else:
+            children = [(meta.tables[child], column)
+                        for child, column in assoc_map[name].items()]
+            counts[name] = _purge_resource_table(engine, table, children,
+                                                 time_line, progress,
+                                                 chunk_size, sleep)
+
+    for level in _generate_purge_levels(meta, table_names):
+        _run_parallel([lambda name=name: purge(name) for name in level])
+    progress.finish()
+    return counts
 
 
 def get_engine(tacker_config):
@@ -173,13 +173,21 @@ class NfvoPluginDb(nfvo.NFVOPluginBase, db_base.CommonDbMixin):
                 raise nfvo.VimInUseException(vim_id=vim_id)
         return vnfs_db
 
+    def _get_vim(self, context, vim_id):
+        return self._get_resource(context, Vim, vim_id)
+
     def get_vim(self, context, vim_id, fields=None, mask_password=True):
         vim_db = self._get_resource(context, Vim, vim_id)
         return self._make_vim_dict(vim_db, mask_password=mask_password)
 
-    def get_vims(self, context, filters=None, fields=None):
+    def get_vims(self, context, filters=None, fields=None, sorts=None,
+                 limit=None, marker=None, page_reverse=False):
+        marker_obj = self._get_marker_obj(context, 'vim', limit, marker)
         return self._get_collection(context, Vim, self._make_vim_dict,
-                                    filters=filters, fields=fields)
+                                    filters=filters, fields=fields,
+                                    sorts=sorts, limit=limit,
+                                    marker_obj=marker_obj,
+                                    page_reverse=page_reverse)
 
     def update_vim(self, context, vim_id, vim):
         self._validate_default_vim(context, vim, vim_id=vim_id)
@@ -224,6 +232,25 @@ class NfvoPluginDb(nfvo.NFVOPluginBase, db_base.CommonDbMixin):
                 tstamp=timeutils.utcnow())
         return self._make_vim_dict(vim_db)
 
+    def update_vims_status(self, context, statuses):
+        """Update the status of many VIMs in one transaction.
+
+        :param statuses: dict of vim_id => status, VIMs deleted in the
+                         meantime are skipped
+        """
+        with context.session.begin(subtransactions=True):
+            vims_db = (self._model_query(context, Vim).filter(
+                Vim.id.in_(list(statuses))).with_lockmode('update').all())
+            tstamp = timeutils.utcnow()
+            for vim_db in vims_db:
+                vim_db.update({'status': statuses[vim_db.id]})
+                self._cos_db_plg.create_event(
+                    context, res_id=vim_db['id'],
+                    res_type=constants.RES_TYPE_VIM,
+                    res_state=vim_db['status'],
+                    evt_type=constants.RES_EVT_UPDATE,
+                    tstamp=tstamp)
+
     # Deprecated. Will be removed in Ocata release
     def get_vim_by_name(self, context, vim_name, fields=None,
                         mask_password=True):
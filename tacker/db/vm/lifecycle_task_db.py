@@ -0,0 +1,141 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import sqlalchemy as sa
+from sqlalchemy import sql
+
+from tacker.db import model_base
+from tacker.db import models_v1
+from tacker.db import types
+
+LOG = logging.getLogger(__name__)
+
+TASK_ATTRIBUTES = ('id', 'task_type', 'vnf_id', 'context', 'payload',
+                   'owner', 'lease_expires_at', 'attempts', 'created_at')
+
+
+class VnfLifecycleTask(model_base.BASE, models_v1.HasId):
+    """A VNF lifecycle task, waiting for a worker or leased by one.
+
+    A task is leased by its owner until lease_expires_at. A task whose
+    lease expired, because its worker died, can be claimed by any worker.
+    """
+
+    __tablename__ = 'vnf_lifecycle_tasks'
+    __table_args__ = (
+        sa.Index('ix_vnf_lifecycle_tasks_type_lease',
+                 'task_type', 'lease_expires_at'),
+    )
+
+    task_type = sa.Column(sa.String(64), nullable=False)
+    vnf_id = sa.Column(types.Uuid, nullable=False)
+    context = sa.Column(types.Json, nullable=False)
+    payload = sa.Column(types.Json, nullable=False)
+    owner = sa.Column(sa.String(255), nullable=True)
+    lease_expires_at = sa.Column(sa.DateTime, nullable=True)
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    created_at = sa.Column(sa.DateTime, nullable=False)
+
+
+class LifecycleTaskDb(object):
+    """Storage of the VNF lifecycle tasks and of their leases."""
+
+    def _make_task_dict(self, task_db):
+        return dict((key, task_db[key]) for key in TASK_ATTRIBUTES)
+
+    def _claimable(self, now):
+        return sql.or_(VnfLifecycleTask.lease_expires_at.is_(None),
+                       VnfLifecycleTask.lease_expires_at < now)
+
+    def add_task(self, context, task_type, vnf_id, task_context, payload):
+        with context.session.begin(subtransactions=True):
+            task_db = VnfLifecycleTask(id=uuidutils.generate_uuid(),
+                                       task_type=task_type,
+                                       vnf_id=vnf_id,
+                                       context=task_context,
+                                       payload=payload,
+                                       attempts=0,
+                                       created_at=timeutils.utcnow())
+            context.session.add(task_db)
+        return self._make_task_dict(task_db)
+
+    def claim_tasks(self, context, task_type, owner, limit, lease):
+        """Lease up to limit unleased tasks of task_type to owner.
+
+        Each task is leased with a conditional update, so when workers race
+        for a task exactly one of them gets it.
+
+        :param lease: seconds the tasks are leased for
+        :returns: the claimed tasks, oldest first
+        """
+        now = timeutils.utcnow()
+        candidates = (context.session.query(VnfLifecycleTask.id).
+                      filter(VnfLifecycleTask.task_type == task_type).
+                      filter(self._claimable(now)).
+                      order_by(VnfLifecycleTask.created_at).
+                      limit(limit).all())
+        expires_at = now + datetime.timedelta(seconds=lease)
+        claimed = []
+        for (task_id,) in candidates:
+            with context.session.begin(subtransactions=True):
+                count = (context.session.query(VnfLifecycleTask).
+                         filter(VnfLifecycleTask.id == task_id).
+                         filter(self._claimable(now)).
+                         update({'owner': owner,
+                                 'lease_expires_at': expires_at,
+                                 'attempts': VnfLifecycleTask.attempts + 1},
+                                synchronize_session=False))
+            if count:
+                claimed.append(task_id)
+        if not claimed:
+            return []
+        tasks_db = (context.session.query(VnfLifecycleTask).
+                    filter(VnfLifecycleTask.id.in_(claimed)).
+                    filter(VnfLifecycleTask.owner == owner).
+                    order_by(VnfLifecycleTask.created_at).all())
+        return [self._make_task_dict(task_db) for task_db in tasks_db]
+
+    def renew_leases(self, context, owner, task_ids, lease):
+        """Extend the leases owner holds on task_ids.
+
+        :returns: the number of leases still held
+        """
+        if not task_ids:
+            return 0
+        expires_at = timeutils.utcnow() + datetime.timedelta(seconds=lease)
+        with context.session.begin(subtransactions=True):
+            return (context.session.query(VnfLifecycleTask).
+                    filter(VnfLifecycleTask.id.in_(list(task_ids))).
+                    filter(VnfLifecycleTask.owner == owner).
+                    update({'lease_expires_at': expires_at},
+                           synchronize_session=False))
+
+    def release_task(self, context, task_id, owner):
+        """Give a task back, for another attempt by any worker."""
+        with context.session.begin(subtransactions=True):
+            (context.session.query(VnfLifecycleTask).
+             filter(VnfLifecycleTask.id == task_id).
+             filter(VnfLifecycleTask.owner == owner).
+             update({'owner': None, 'lease_expires_at': None},
+                    synchronize_session=False))
+
+    def delete_task(self, context, task_id, owner):
+        with context.session.begin(subtransactions=True):
+            (context.session.query(VnfLifecycleTask).
+             filter(VnfLifecycleTask.id == task_id).
+             filter(VnfLifecycleTask.owner == owner).
+             delete(synchronize_session=False))
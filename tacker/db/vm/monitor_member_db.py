@@ -0,0 +1,65 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from oslo_utils import timeutils
+import sqlalchemy as sa
+
+from tacker.db import model_base
+from tacker.db import models_v1
+
+
+class VnfMonitorMember(model_base.BASE, models_v1.HasId):
+    """A VNF monitor process, alive as long as it renews its heartbeat."""
+
+    __tablename__ = 'vnf_monitor_members'
+
+    host = sa.Column(sa.String(255), nullable=False)
+    pid = sa.Column(sa.Integer, nullable=False)
+    heartbeat_at = sa.Column(sa.DateTime, nullable=False)
+
+
+class MonitorMemberDb(object):
+    """Storage of the heartbeats of the VNF monitor cluster members."""
+
+    def heartbeat(self, context, member_id, host, pid):
+        """Record that member_id is alive, registering it if needed."""
+        now = timeutils.utcnow()
+        with context.session.begin(subtransactions=True):
+            count = (context.session.query(VnfMonitorMember).
+                     filter(VnfMonitorMember.id == member_id).
+                     update({'heartbeat_at': now},
+                            synchronize_session=False))
+            if not count:
+                context.session.add(VnfMonitorMember(id=member_id,
+                                                     host=host, pid=pid,
+                                                     heartbeat_at=now))
+
+    def get_live_members(self, context, timeout):
+        """Return the ids of the members alive within timeout seconds.
+
+        The members whose heartbeat is older are removed.
+        """
+        expired = timeutils.utcnow() - datetime.timedelta(seconds=timeout)
+        with context.session.begin(subtransactions=True):
+            (context.session.query(VnfMonitorMember).
+             filter(VnfMonitorMember.heartbeat_at < expired).
+             delete(synchronize_session=False))
+        return sorted(member_id for (member_id,) in
+                      context.session.query(VnfMonitorMember.id))
+
+    def leave(self, context, member_id):
+        with context.session.begin(subtransactions=True):
+            (context.session.query(VnfMonitorMember).
+             filter(VnfMonitorMember.id == member_id).
+             delete(synchronize_session=False))
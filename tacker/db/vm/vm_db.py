@@ -40,6 +40,14 @@ _ACTIVE_UPDATE_ERROR_DEAD = (
     constants.PENDING_CREATE, constants.ACTIVE, constants.PENDING_UPDATE,
     constants.ERROR, constants.DEAD)
 CREATE_STATES = (constants.PENDING_CREATE, constants.DEAD)
+VNFD_KEYS = ('id', 'tenant_id', 'name', 'description', 'infra_driver',
+             'mgmt_driver', 'created_at', 'updated_at')
+VNF_KEYS = ('id', 'tenant_id', 'name', 'description', 'instance_id',
+            'vim_id', 'placement_attr', 'vnfd_id', 'status',
+            'mgmt_url', 'error_reason', 'created_at', 'updated_at')
+# VNFD attributes holding whole templates, only listed along with VNFs
+# when the vnfd field is requested explicitly
+VNFD_TEMPLATE_KEYS = ('vnfd', 'vnfd_translation')
 
 
 ###########################################################################
@@ -186,10 +194,7 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
             'service_types': self._make_service_types_list(
                 vnfd.service_types)
         }
-        key_list = ('id', 'tenant_id', 'name', 'description',
-                    'infra_driver', 'mgmt_driver',
-                    'created_at', 'updated_at')
-        res.update((key, vnfd[key]) for key in key_list)
+        res.update((key, vnfd[key]) for key in VNFD_KEYS)
         return self._fields(res, fields)
 
     def _make_dev_attrs_dict(self, dev_attrs_db):
@@ -197,16 +202,12 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
 
     def _make_vnf_dict(self, vnf_db, fields=None):
         LOG.debug(_('vnf_db %s'), vnf_db)
-        LOG.debug(_('vnf_db attributes %s'), vnf_db.attributes)
         res = {
             'vnfd':
             self._make_vnfd_dict(vnf_db.vnfd),
             'attributes': self._make_dev_attrs_dict(vnf_db.attributes),
         }
-        key_list = ('id', 'tenant_id', 'name', 'description', 'instance_id',
-                    'vim_id', 'placement_attr', 'vnfd_id', 'status',
-                    'mgmt_url', 'error_reason', 'created_at', 'updated_at')
-        res.update((key, vnf_db[key]) for key in key_list)
+        res.update((key, vnf_db[key]) for key in VNF_KEYS)
         return self._fields(res, fields)
 
     @staticmethod
@@ -324,14 +325,22 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
                     vnfd_id=vnfd_id).delete()
                 context.session.delete(vnfd_db)
 
+    def _get_vnfd(self, context, vnfd_id):
+        return self._get_resource(context, VNFD, vnfd_id)
+
     def get_vnfd(self, context, vnfd_id, fields=None):
-        vnfd_db = self._get_resource(context, VNFD, vnfd_id)
+        vnfd_db = self._get_vnfd(context, vnfd_id)
         return self._make_vnfd_dict(vnfd_db)
 
-    def get_vnfds(self, context, filters, fields=None):
+    def get_vnfds(self, context, filters=None, fields=None, sorts=None,
+                  limit=None, marker=None, page_reverse=False):
+        marker_obj = self._get_marker_obj(context, 'vnfd', limit, marker)
         return self._get_collection(context, VNFD,
                                     self._make_vnfd_dict,
-                                    filters=filters, fields=fields)
+                                    filters=filters, fields=fields,
+                                    sorts=sorts, limit=limit,
+                                    marker_obj=marker_obj,
+                                    page_reverse=page_reverse)
 
     def choose_vnfd(self, context, service_type,
                     required_attributes=None):
@@ -357,50 +366,63 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
             if vnfd_db:
                 return self._make_vnfd_dict(vnfd_db)
 
-    def _vnf_attribute_update_or_create(
-            self, context, vnf_id, key, value):
-        arg = (self._model_query(context, VNFAttribute).
-               filter(VNFAttribute.vnf_id == vnf_id).
-               filter(VNFAttribute.key == key).first())
-        if arg:
-            arg.value = value
-        else:
+    def _vnf_attributes_update_or_create(
+            self, context, vnf_id, attributes, delete_others=False):
+        """Store the attributes of a VNF.
+
+        Existing rows are read with one query and only new and changed
+        values are written, so the session flushes them as one batched
+        INSERT and one batched UPDATE. Decrypted vim auth is never stored.
+        """
+        args = dict((arg.key, arg) for arg in
+                    self._model_query(context, VNFAttribute).
+                    filter(VNFAttribute.vnf_id == vnf_id))
+        for key, value in attributes.items():
+            arg = args.pop(key, None)
+            # do not store decrypted vim auth in vnf attr table
+            if 'vim_auth' in key:
+                continue
+            if arg is None:
+                context.session.add(VNFAttribute(
+                    id=str(uuid.uuid4()), vnf_id=vnf_id,
+                    key=key, value=value))
+            elif arg.value != value:
+                arg.value = value
+        if delete_others:
+            for arg in args.values():
+                context.session.delete(arg)
+
+    # called internally, not by REST API
+    def _add_vnf_db(self, context, vnf, vnfd_db):
+        tenant_id = self._get_tenant_id_for_create(context, vnf)
+        vnf_id = str(uuid.uuid4())
+        attributes = vnf.get('attributes', {})
+        vnf_db = VNF(id=vnf_id,
+                     tenant_id=tenant_id,
+                     name=vnf.get('name'),
+                     description=vnfd_db.description,
+                     instance_id=None,
+                     vnfd_id=vnfd_db.id,
+                     vim_id=vnf.get('vim_id'),
+                     placement_attr=vnf.get('placement_attr', {}),
+                     status=constants.PENDING_CREATE,
+                     error_reason=None)
+        context.session.add(vnf_db)
+        for key, value in attributes.items():
             arg = VNFAttribute(
                 id=str(uuid.uuid4()), vnf_id=vnf_id,
                 key=key, value=value)
             context.session.add(arg)
+        return vnf_db
 
-    # called internally, not by REST API
     def _create_vnf_pre(self, context, vnf):
         LOG.debug(_('vnf %s'), vnf)
-        tenant_id = self._get_tenant_id_for_create(context, vnf)
-        vnfd_id = vnf['vnfd_id']
-        name = vnf.get('name')
-        vnf_id = str(uuid.uuid4())
-        attributes = vnf.get('attributes', {})
-        vim_id = vnf.get('vim_id')
-        placement_attr = vnf.get('placement_attr', {})
         with context.session.begin(subtransactions=True):
             vnfd_db = self._get_resource(context, VNFD,
-                                         vnfd_id)
-            vnf_db = VNF(id=vnf_id,
-                         tenant_id=tenant_id,
-                         name=name,
-                         description=vnfd_db.description,
-                         instance_id=None,
-                         vnfd_id=vnfd_id,
-                         vim_id=vim_id,
-                         placement_attr=placement_attr,
-                         status=constants.PENDING_CREATE,
-                         error_reason=None)
-            context.session.add(vnf_db)
-            for key, value in attributes.items():
-                    arg = VNFAttribute(
-                        id=str(uuid.uuid4()), vnf_id=vnf_id,
-                        key=key, value=value)
-                    context.session.add(arg)
+                                         vnf['vnfd_id'])
+            vnf_db = self._add_vnf_db(context, vnf, vnfd_db)
         self._cos_db_plg.create_event(
-            context, res_id=vnf_id,
+            context, res_id=vnf_db.id,
             res_type=constants.RES_TYPE_VNF,
             res_state=constants.PENDING_CREATE,
             evt_type=constants.RES_EVT_CREATE,
@@ -408,6 +430,33 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
             details="VNF UUID assigned")
         return self._make_vnf_dict(vnf_db)
 
+    def _create_vnfs_pre(self, context, vnfs):
+        """Insert the VNFs of a bulk request in one transaction.
+
+        Either all the VNFs are created or none is. Each VNFD is read once.
+        """
+        LOG.debug(_('vnfs %s'), vnfs)
+        vnfds_db = {}
+        vnfs_db = []
+        with context.session.begin(subtransactions=True):
+            for vnf in vnfs:
+                vnfd_id = vnf['vnfd_id']
+                if vnfd_id not in vnfds_db:
+                    vnfds_db[vnfd_id] = self._get_resource(context, VNFD,
+                                                           vnfd_id)
+                vnfs_db.append(self._add_vnf_db(context, vnf,
+                                                vnfds_db[vnfd_id]))
+        tstamp = timeutils.utcnow()
+        for vnf_db in vnfs_db:
+            self._cos_db_plg.create_event(
+                context, res_id=vnf_db.id,
+                res_type=constants.RES_TYPE_VNF,
+                res_state=constants.PENDING_CREATE,
+                evt_type=constants.RES_EVT_CREATE,
+                tstamp=tstamp,
+                details="VNF UUID assigned")
+        return [self._make_vnf_dict(vnf_db) for vnf_db in vnfs_db]
+
     # called internally, not by REST API
     # intsance_id = None means error on creation
     def _create_vnf_post(self, context, vnf_id, instance_id,
@@ -422,11 +471,8 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
             if instance_id is None or vnf_dict['status'] == constants.ERROR:
                 query.update({'status': constants.ERROR})
 
-            for (key, value) in vnf_dict['attributes'].items():
-                # do not store decrypted vim auth in vnf attr table
-                if 'vim_auth' not in key:
-                    self._vnf_attribute_update_or_create(context, vnf_id,
-                                                         key, value)
+            self._vnf_attributes_update_or_create(
+                context, vnf_id, vnf_dict['attributes'])
         evt_details = ("Infra Instance ID created: %s and "
                        "Mgmt URL set: %s") % (instance_id, mgmt_url)
         self._cos_db_plg.create_event(
@@ -498,16 +544,9 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
              update({'status': new_status,
                      'updated_at': timeutils.utcnow()}))
 
-            dev_attrs = new_vnf_dict.get('attributes', {})
-            (context.session.query(VNFAttribute).
-             filter(VNFAttribute.vnf_id == vnf_id).
-             filter(~VNFAttribute.key.in_(dev_attrs.keys())).
-             delete(synchronize_session='fetch'))
-
-            for (key, value) in dev_attrs.items():
-                if 'vim_auth' not in key:
-                    self._vnf_attribute_update_or_create(context, vnf_id,
-                                                         key, value)
+            self._vnf_attributes_update_or_create(
+                context, vnf_id, new_vnf_dict.get('attributes', {}),
+                delete_others=True)
         self._cos_db_plg.create_event(
             context, res_id=vnf_id,
             res_type=constants.RES_TYPE_VNF,
@@ -516,18 +555,28 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
             tstamp=new_vnf_dict[constants.RES_EVT_UPDATED_FLD])
 
     def _delete_vnf_pre(self, context, vnf_id):
+        return self._delete_vnfs_pre(context, [vnf_id])[0]
+
+    def _delete_vnfs_pre(self, context, vnf_ids):
+        """Mark VNFs PENDING_DELETE in one transaction.
+
+        Either all the VNFs are marked or none is.
+        """
         with context.session.begin(subtransactions=True):
-            vnf_db = self._get_vnf_db(
-                context, vnf_id, _ACTIVE_UPDATE_ERROR_DEAD,
-                constants.PENDING_DELETE)
-        deleted_vnf_db = self._make_vnf_dict(vnf_db)
-        self._cos_db_plg.create_event(
-            context, res_id=vnf_id,
-            res_type=constants.RES_TYPE_VNF,
-            res_state=deleted_vnf_db['status'],
-            evt_type=constants.RES_EVT_DELETE,
-            tstamp=timeutils.utcnow(), details="VNF delete initiated")
-        return deleted_vnf_db
+            vnfs_db = [self._get_vnf_db(context, vnf_id,
+                                        _ACTIVE_UPDATE_ERROR_DEAD,
+                                        constants.PENDING_DELETE)
+                       for vnf_id in vnf_ids]
+        deleted_vnfs_db = [self._make_vnf_dict(vnf_db) for vnf_db in vnfs_db]
+        tstamp = timeutils.utcnow()
+        for deleted_vnf_db in deleted_vnfs_db:
+            self._cos_db_plg.create_event(
+                context, res_id=deleted_vnf_db['id'],
+                res_type=constants.RES_TYPE_VNF,
+                res_state=deleted_vnf_db['status'],
+                evt_type=constants.RES_EVT_DELETE,
+                tstamp=tstamp, details="VNF delete initiated")
+        return deleted_vnfs_db
 
     def _delete_vnf_post(self, context, vnf_id, error, soft_delete=True):
         with context.session.begin(subtransactions=True):
@@ -594,13 +643,151 @@ class VNFMPluginDb(vnfm.VNFMPluginBase, db_base.CommonDbMixin):
                               False,
                               soft_delete=soft_delete)
 
+    def _get_vnf(self, context, vnf_id):
+        return self._get_resource(context, VNF, vnf_id)
+
     def get_vnf(self, context, vnf_id, fields=None):
-        vnf_db = self._get_resource(context, VNF, vnf_id)
+        vnf_db = self._get_vnf(context, vnf_id)
         return self._make_vnf_dict(vnf_db, fields)
 
-    def get_vnfs(self, context, filters=None, fields=None):
-        return self._get_collection(context, VNF, self._make_vnf_dict,
-                                    filters=filters, fields=fields)
+    def _make_vnfd_dicts(self, context, vnfd_ids, with_templates):
+        """Return the dicts of many VNFDs with a fixed number of queries."""
+        if not vnfd_ids:
+            return {}
+        vnfds = (context.session.query(VNFD).
+                 filter(VNFD.id.in_(vnfd_ids)).
+                 options(orm.subqueryload(VNFD.service_types)).all())
+        attrs_query = (context.session.query(VNFDAttribute.vnfd_id,
+                                             VNFDAttribute.key,
+                                             VNFDAttribute.value).
+                       filter(VNFDAttribute.vnfd_id.in_(vnfd_ids)))
+        if not with_templates:
+            attrs_query = attrs_query.filter(
+                ~VNFDAttribute.key.in_(VNFD_TEMPLATE_KEYS))
+        attributes = dict((vnfd_id, {}) for vnfd_id in vnfd_ids)
+        for vnfd_id, key, value in attrs_query:
+            attributes[vnfd_id][key] = value
+
+        res = {}
+        for vnfd in vnfds:
+            vnfd_dict = dict((key, vnfd[key]) for key in VNFD_KEYS)
+            vnfd_dict['attributes'] = attributes[vnfd.id]
+            vnfd_dict['service_types'] = self._make_service_types_list(
+                vnfd.service_types)
+            res[vnfd.id] = vnfd_dict
+        return res
+
+    def get_vnfs(self, context, filters=None, fields=None, sorts=None,
+                 limit=None, marker=None, page_reverse=False):
+        # VNFs, their attributes and their VNFDs are each loaded with a
+        # single query and only the requested columns are selected
+        with_vnfd = not fields or 'vnfd' in fields
+        with_attributes = not fields or 'attributes' in fields
+        keys = [key for key in VNF_KEYS if not fields or key in fields]
+
+        marker_obj = self._get_marker_obj(context, 'vnf', limit, marker)
+        query = self._get_collection_query(context, VNF, filters=filters,
+                                           sorts=sorts, limit=limit,
+                                           marker_obj=marker_obj,
+                                           page_reverse=page_reverse)
+        if fields:
+            columns = set(keys) | set(['id'])
+            if with_vnfd:
+                columns.add('vnfd_id')
+            query = query.options(orm.load_only(
+                *[getattr(VNF, column) for column in columns]))
+        if with_attributes:
+            query = query.options(orm.subqueryload(VNF.attributes))
+        vnfs_db = query.all()
+
+        vnfds = {}
+        if with_vnfd:
+            vnfds = self._make_vnfd_dicts(
+                context, set(vnf_db.vnfd_id for vnf_db in vnfs_db
+                             if vnf_db.vnfd_id),
+                with_templates=bool(fields))
+
+        vnfs = []
+        for vnf_db in vnfs_db:
+            res = dict((key, vnf_db[key]) for key in keys)
+            if with_attributes:
+                res['attributes'] = self._make_dev_attrs_dict(
+                    vnf_db.attributes)
+            if with_vnfd:
+                res['vnfd'] = vnfds.get(vnf_db.vnfd_id)
+            vnfs.append(res)
+        if limit and page_reverse:
+            vnfs.reverse()
+        return vnfs
+
+    def _monitored_vnfs_query(self, context, *entities):
+        """Query the ACTIVE VNFs with a monitoring policy."""
+        return (context.session.query(*entities).
+                join(VNFAttribute, VNFAttribute.vnf_id == VNF.id).
+                filter(VNFAttribute.key == 'monitoring_policy').
+                filter(VNF.status == constants.ACTIVE).
+                filter(VNF.mgmt_url.isnot(None)).
+                filter(VNF.deleted_at.is_(None)))
+
+    def _get_monitored_vnf_ids(self, context):
+        """Return the ids of the ACTIVE VNFs with a monitoring policy."""
+        return [vnf_id for (vnf_id,) in
+                self._monitored_vnfs_query(context, VNF.id)]
+
+    def _make_monitored_vnf_dicts(self, context, query, vnfds):
+        """Return the dicts of the VNFs of query, with attributes and VNFD.
+
+        :param vnfds: dict of the VNFD dicts already read, by id, updated
+                      with the VNFDs read
+        """
+        vnfs = [dict(zip(VNF_KEYS, row)) for row in query]
+        attributes = dict((vnf['id'], {}) for vnf in vnfs)
+        if attributes:
+            for vnf_id, key, value in (
+                    context.session.query(VNFAttribute.vnf_id,
+                                          VNFAttribute.key,
+                                          VNFAttribute.value).
+                    filter(VNFAttribute.vnf_id.in_(list(attributes)))):
+                attributes[vnf_id][key] = value
+        vnfds.update(self._make_vnfd_dicts(
+            context, set(vnf['vnfd_id'] for vnf in vnfs
+                         if vnf['vnfd_id'] not in vnfds),
+            with_templates=False))
+        for vnf in vnfs:
+            vnf['attributes'] = attributes[vnf['id']]
+            vnf['vnfd'] = vnfds.get(vnf['vnfd_id'])
+        return vnfs
+
+    def _iter_monitored_vnfs(self, context, batch_size, vnf_ids=None):
+        """Yield the ACTIVE VNFs with a monitoring policy, in batches.
+
+        VNFs are read in id order and each VNFD is read once.
+
+        :param vnf_ids: ids of the VNFs to read, all of them when None
+        """
+        columns = [getattr(VNF, key) for key in VNF_KEYS]
+        vnfds = {}
+        if vnf_ids is not None:
+            vnf_ids = sorted(vnf_ids)
+            for i in range(0, len(vnf_ids), batch_size):
+                query = (self._monitored_vnfs_query(context, *columns).
+                         filter(VNF.id.in_(vnf_ids[i:i + batch_size])))
+                vnfs = self._make_monitored_vnf_dicts(context, query, vnfds)
+                if vnfs:
+                    yield vnfs
+            return
+
+        marker = None
+        while True:
+            query = self._monitored_vnfs_query(context, *columns)
+            if marker is not None:
+                query = query.filter(VNF.id > marker)
+            query = query.order_by(VNF.id).limit(batch_size)
+            vnfs = self._make_monitored_vnf_dicts(context, query, vnfds)
+            if not vnfs:
+                return
+            marker = vnfs[-1]['id']
+            yield vnfs
 
     def set_vnf_error_status_reason(self, context, vnf_id, new_reason):
         with context.session.begin(subtransactions=True):
@@ -141,5 +141,5 @@ class CommonServicesPluginBase(service_base.NFVPluginBase):
 
     @abc.abstractmethod
     def get_events(self, context, filters=None, fields=None, sorts=None,
-                   limit=None, marker_obj=None, page_reverse=False):
+                   limit=None, marker=None, page_reverse=False):
         pass
@@ -242,7 +242,8 @@ class NFVOPluginBase(service_base.NFVPluginBase):
         pass
 
     @abc.abstractmethod
-    def get_vims(self, context, filters=None, fields=None):
+    def get_vims(self, context, filters=None, fields=None, sorts=None,
+                 limit=None, marker=None, page_reverse=False):
         pass
 
     def get_vim_by_name(self, context, vim_name, fields=None,
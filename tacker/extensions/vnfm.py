@@ -392,7 +392,7 @@ class Vnfm(extensions.ExtensionDescriptor):
         attr.PLURALS.update(plural_mappings)
         resources = resource_helper.build_resource_info(
             plural_mappings, RESOURCE_ATTRIBUTE_MAP, constants.VNFM,
-            translate_name=True)
+            translate_name=True, allow_bulk=True)
         plugin = manager.TackerManager.get_service_plugins()[
             constants.VNFM]
         for collection_name in SUB_RESOURCE_ATTRIBUTE_MAP:
@@ -453,11 +453,13 @@ class VNFMPluginBase(service_base.NFVPluginBase):
         pass
 
     @abc.abstractmethod
-    def get_vnfds(self, context, filters=None, fields=None):
+    def get_vnfds(self, context, filters=None, fields=None, sorts=None,
+                  limit=None, marker=None, page_reverse=False):
         pass
 
     @abc.abstractmethod
-    def get_vnfs(self, context, filters=None, fields=None):
+    def get_vnfs(self, context, filters=None, fields=None, sorts=None,
+                 limit=None, marker=None, page_reverse=False):
         pass
 
     @abc.abstractmethod
@@ -90,3 +90,11 @@ class VimAbstractDriver(extensions.PluginInterface):
         Checks the health status of VIM and return a boolean value
         """
         pass
+
+    def vim_endpoints_status(self, auth_url, vim_auth=None):
+        """Health check for the API endpoints of VIM
+
+        Checks that the API services of VIM answer requests and return a
+        boolean value. Drivers without such checks report them healthy.
+        """
+        return True
@@ -19,9 +19,12 @@ import os
 from keystoneclient import exceptions
 from oslo_config import cfg
 from oslo_log import log as logging
+import requests
 
 from tacker._i18n import _LW
 from tacker.agent.linux import utils as linux_utils
+from tacker.common import clients
+from tacker.common import icmp
 from tacker.common import log
 from tacker.extensions import nfvo
 from tacker.nfvo.drivers.vim import abstract_vim_driver
@@ -41,7 +44,13 @@ OPENSTACK_OPTS = [
     cfg.StrOpt('timeout', default='1',
                help=_('number of seconds to wait for a response')),
     cfg.StrOpt('interval', default='1',
-               help=_('number of seconds to wait between packets'))
+               help=_('number of seconds to wait between packets')),
+    cfg.StrOpt('prober', default='ping', choices=['ping', 'native'],
+               help=_('How to ping VIMs: run the ping command, or send '
+                      'ICMP echo from the tacker process itself')),
+    cfg.FloatOpt('http_timeout', default=5,
+                 help=_('number of seconds to wait for the keystone and '
+                        'heat endpoints of a VIM to answer'))
 ]
 cfg.CONF.register_opts(OPTS, 'vim_keys')
 cfg.CONF.register_opts(OPENSTACK_OPTS, 'vim_monitor')
@@ -197,10 +206,17 @@ class OpenStack_Driver(abstract_vim_driver.VimAbstractDriver):
         except IOError:
             raise nfvo.VimKeyNotFoundException(vim_id=vim_id)
 
+    @staticmethod
+    def _vim_host(auth_url):
+        return auth_url.split("//")[-1].split(":")[0].split("/")[0]
+
     @log.log
     def vim_status(self, auth_url):
         """Checks the VIM health status"""
-        vim_ip = auth_url.split("//")[-1].split(":")[0].split("/")[0]
+        vim_ip = self._vim_host(auth_url)
+        if cfg.CONF.vim_monitor.prober == 'native':
+            return self.vims_status([auth_url])[auth_url]
+
         ping_cmd = ['ping',
                     '-c', cfg.CONF.vim_monitor.count,
                     '-W', cfg.CONF.vim_monitor.timeout,
@@ -213,3 +229,52 @@ class OpenStack_Driver(abstract_vim_driver.VimAbstractDriver):
         except RuntimeError:
             LOG.warning(_LW("Cannot ping ip address: %s"), vim_ip)
             return False
+
+    def vim_endpoints_status(self, auth_url, vim_auth=None):
+        """Checks that the keystone and heat endpoints answer HTTP requests
+
+        Any answer but a server error counts, the requests are not
+        authenticated. The heat endpoint is looked up in the catalog when
+        the credentials of the VIM are given.
+        """
+        urls = [auth_url]
+        if vim_auth:
+            try:
+                urls.append(clients.OpenstackClients(
+                    vim_auth).keystone_session.get_endpoint(
+                        service_type='orchestration'))
+            except Exception as e:
+                LOG.warning(_LW("Cannot find the heat endpoint of %(url)s: "
+                                "%(error)s"), {'url': auth_url, 'error': e})
+                return False
+        for url in urls:
+            try:
+                response = requests.get(
+                    url, timeout=cfg.CONF.vim_monitor.http_timeout)
+            except requests.RequestException as e:
+                LOG.warning(_LW("Endpoint %(url)s does not answer: "
+                                "%(error)s"), {'url': url, 'error': e})
+                return False
+            if response.status_code >= 500:
+                LOG.warning(_LW("Endpoint %(url)s answers %(status)d"),
+                            {'url': url, 'status': response.status_code})
+                return False
+        return True
+
+    def vims_status(self, auth_urls):
+        """Checks the health status of many VIMs in one ICMP batch
+
+        :returns: dict of auth_url => bool
+        """
+        hosts = dict((auth_url, self._vim_host(auth_url))
+                     for auth_url in auth_urls)
+        reachable = icmp.get_prober().ping(
+            hosts.values(),
+            count=cfg.CONF.vim_monitor.count,
+            timeout=cfg.CONF.vim_monitor.timeout,
+            interval=cfg.CONF.vim_monitor.interval)
+        for host, status in reachable.items():
+            if not status:
+                LOG.warning(_LW("Cannot ping ip address: %s"), host)
+        return dict((auth_url, reachable[host])
+                    for auth_url, host in hosts.items())
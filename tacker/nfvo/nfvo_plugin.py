@@ -14,20 +14,26 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import heapq
 import threading
 import time
 import uuid
+import zlib
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import strutils
 
+from tacker.common import clients
 from tacker.common import driver_manager
 from tacker.common import log
 from tacker.common import utils
 from tacker import context as t_context
 from tacker.db.nfvo import nfvo_db
+from tacker.vnfm.infra_drivers.heat import capabilities
+from tacker.vnfm import vim_client
 
 LOG = logging.getLogger(__name__)
 
@@ -45,6 +51,9 @@ class NfvoPlugin(nfvo_db.NfvoPluginDb):
     extension for providing the specified VIM information
     """
     supported_extension_aliases = ['nfvo']
+
+    __native_pagination_support = True
+    __native_sorting_support = True
     _lock = threading.RLock()
 
     OPTS = [
@@ -54,6 +63,17 @@ class NfvoPlugin(nfvo_db.NfvoPluginDb):
         cfg.IntOpt(
             'monitor_interval', default=30,
             help=_('Interval to check for VIM health')),
+        cfg.IntOpt(
+            'monitor_pool_size', default=32,
+            help=_('Maximum number of VIMs checked concurrently')),
+        cfg.BoolOpt(
+            'monitor_endpoints', default=False,
+            help=_('Also check that the API endpoints of VIMs, such as '
+                   'keystone and heat, answer HTTP requests')),
+        cfg.FloatOpt(
+            'monitor_flush_interval', default=5,
+            help=_('Seconds VIM status changes are gathered before they '
+                   'are written to the database in one transaction')),
     ]
     cfg.CONF.register_opts(OPTS, 'nfvo_vim')
 
@@ -62,19 +82,94 @@ class NfvoPlugin(nfvo_db.NfvoPluginDb):
         self._vim_drivers = driver_manager.DriverManager(
             'tacker.nfvo.vim.drivers',
             cfg.CONF.nfvo_vim.vim_drivers)
-        self._created_vims = dict()
+        self._created_vims = dict()     # vim_id => vim, with its last status
+        self._vim_schedule = []         # heap of (due, vim_id)
+        self._probing_vims = set()
+        self._vim_transitions = dict()  # vim_id => status not written yet
+        self._monitor_interval = cfg.CONF.nfvo_vim.monitor_interval
+        self._monitor_pool = eventlet.GreenPool(
+            cfg.CONF.nfvo_vim.monitor_pool_size)
         context = t_context.get_admin_context()
         vims = self.get_vims(context)
+        now = time.time()
         for vim in vims:
             self._created_vims[vim["id"]] = vim
-        self._monitor_interval = cfg.CONF.nfvo_vim.monitor_interval
+            self._schedule_vim(vim["id"], now)
         threading.Thread(target=self.__run__).start()
 
+    def _schedule_vim(self, vim_id, now):
+        # every VIM is checked at its own offset within the interval, stable
+        # across restarts, so that checks do not all happen at once
+        interval = self._monitor_interval
+        offset = (zlib.crc32(vim_id.encode('utf-8')) & 0xffffffff) % 1000
+        due = now - now % interval + offset * interval / 1000.0
+        if due <= now:
+            due += interval
+        heapq.heappush(self._vim_schedule, (due, vim_id))
+
     def __run__(self):
+        flush_at = time.time() + cfg.CONF.nfvo_vim.monitor_flush_interval
         while(1):
-            time.sleep(self._monitor_interval)
-            for created_vim in self._created_vims.values():
-                self.monitor_vim(created_vim)
+            now = time.time()
+            due = []
+            with self._lock:
+                while self._vim_schedule and self._vim_schedule[0][0] <= now:
+                    due_at, vim_id = heapq.heappop(self._vim_schedule)
+                    if vim_id not in self._created_vims:
+                        continue
+                    heapq.heappush(self._vim_schedule,
+                                   (due_at + self._monitor_interval, vim_id))
+                    # a VIM still being checked is not checked twice
+                    if vim_id not in self._probing_vims:
+                        self._probing_vims.add(vim_id)
+                        due.append(dict(self._created_vims[vim_id]))
+                next_due = (self._vim_schedule[0][0] if self._vim_schedule
+                            else flush_at)
+
+            for vim_obj in due:
+                self._monitor_pool.spawn_n(self._check_vim, vim_obj)
+
+            if now >= flush_at:
+                self._flush_vim_transitions()
+                flush_at = now + cfg.CONF.nfvo_vim.monitor_flush_interval
+            time.sleep(max(min(next_due, flush_at) - time.time(), 0))
+
+    def _check_vim(self, vim_obj):
+        vim_id = vim_obj['id']
+        try:
+            status = self._probe_vim(vim_obj)
+        except Exception:
+            LOG.exception(_('Unable to check the health of vim %s'), vim_id)
+            return
+        finally:
+            with self._lock:
+                self._probing_vims.discard(vim_id)
+        with self._lock:
+            created_vim = self._created_vims.get(vim_id)
+            if created_vim is None or created_vim['status'] == status:
+                return
+            created_vim['status'] = status
+            self._vim_transitions[vim_id] = status
+        LOG.info(_('vim %(vim_id)s is %(status)s'),
+                 {'vim_id': vim_id, 'status': status})
+        if status == "REACHABLE":
+            self._refresh_vim_capabilities(vim_obj)
+
+    def _flush_vim_transitions(self):
+        with self._lock:
+            transitions = self._vim_transitions
+            self._vim_transitions = dict()
+        if not transitions:
+            return
+        try:
+            super(NfvoPlugin, self).update_vims_status(
+                t_context.get_admin_context(), transitions)
+        except Exception:
+            LOG.exception(_('Unable to update the status of vims %s'),
+                          list(transitions))
+            with self._lock:
+                for vim_id, status in transitions.items():
+                    self._vim_transitions.setdefault(vim_id, status)
 
     @log.log
     def create_vim(self, context, vim):
@@ -90,22 +185,28 @@ class NfvoPlugin(nfvo_db.NfvoPluginDb):
             vim_obj["status"] = "REGISTERING"
             with self._lock:
                 self._created_vims[res["id"]] = res
+                self._schedule_vim(res["id"], time.time())
             self.monitor_vim(vim_obj)
             return res
         except Exception:
             with excutils.save_and_reraise_exception():
                 self._vim_drivers.invoke(vim_type, 'delete_vim_auth',
                                          vim_id=vim_obj['id'])
+        finally:
+            # the new VIM may be the default one
+            vim_client.invalidate_vim_auth(vim_obj['id'])
 
-    def _get_vim(self, context, vim_id):
+    def _get_vim_not_in_use(self, context, vim_id):
         if not self.is_vim_still_in_use(context, vim_id):
             return self.get_vim(context, vim_id)
 
     @log.log
     def update_vim(self, context, vim_id, vim):
-        vim_obj = self._get_vim(context, vim_id)
+        vim_obj = self._get_vim_not_in_use(context, vim_id)
         utils.deep_update(vim_obj, vim['vim'])
         vim_type = vim_obj['type']
+        clients.invalidate_cache(vim_obj['auth_url'])
+        capabilities.CAPABILITY_CACHE.invalidate(vim_obj['auth_url'])
         try:
             self._vim_drivers.invoke(vim_type, 'register_vim', vim_obj=vim_obj)
             return super(NfvoPlugin, self).update_vim(context, vim_id, vim_obj)
@@ -113,24 +214,43 @@ class NfvoPlugin(nfvo_db.NfvoPluginDb):
             with excutils.save_and_reraise_exception():
                 self._vim_drivers.invoke(vim_type, 'delete_vim_auth',
                                          vim_id=vim_obj['id'])
+        finally:
+            vim_client.invalidate_vim_auth(vim_id)
 
     @log.log
     def delete_vim(self, context, vim_id):
-        vim_obj = self._get_vim(context, vim_id)
+        vim_obj = self._get_vim_not_in_use(context, vim_id)
         self._vim_drivers.invoke(vim_obj['type'], 'deregister_vim',
                                  vim_id=vim_id)
+        clients.invalidate_cache(vim_obj['auth_url'])
+        capabilities.CAPABILITY_CACHE.invalidate(vim_obj['auth_url'])
         with self._lock:
             self._created_vims.pop(vim_id, None)
         super(NfvoPlugin, self).delete_vim(context, vim_id)
+        vim_client.invalidate_vim_auth(vim_id)
 
-    @log.log
-    def monitor_vim(self, vim_obj):
-        vim_id = vim_obj["id"]
+    def _get_vim_auth(self, vim_obj):
+        return vim_client.VimClient().get_vim(
+            t_context.get_admin_context(), vim_obj['id'])['vim_auth']
+
+    def _probe_vim(self, vim_obj):
         auth_url = vim_obj["auth_url"]
         vim_status = self._vim_drivers.invoke(vim_obj['type'],
                                               'vim_status',
                                               auth_url=auth_url)
-        current_status = "REACHABLE" if vim_status else "UNREACHABLE"
+        if vim_status and cfg.CONF.nfvo_vim.monitor_endpoints:
+            vim_auth = (self._get_vim_auth(vim_obj)
+                        if vim_obj['type'] == 'openstack' else None)
+            vim_status = self._vim_drivers.invoke(vim_obj['type'],
+                                                  'vim_endpoints_status',
+                                                  auth_url=auth_url,
+                                                  vim_auth=vim_auth)
+        return "REACHABLE" if vim_status else "UNREACHABLE"
+
+    @log.log
+    def monitor_vim(self, vim_obj):
+        vim_id = vim_obj["id"]
+        current_status = self._probe_vim(vim_obj)
         if current_status != vim_obj["status"]:
             status = current_status
             with self._lock:
@@ -138,3 +258,20 @@ class NfvoPlugin(nfvo_db.NfvoPluginDb):
                     t_context.get_admin_context(),
                     vim_id, status)
                 self._created_vims[vim_id]["status"] = status
+                self._vim_transitions.pop(vim_id, None)
+            if status == "REACHABLE":
+                self._refresh_vim_capabilities(vim_obj)
+
+    def _refresh_vim_capabilities(self, vim_obj):
+        # discover what the heat services of the VIM support ahead of
+        # VNF creation
+        if vim_obj['type'] != 'openstack':
+            return
+        try:
+            vim_auth = self._get_vim_auth(vim_obj)
+        except Exception:
+            LOG.exception(_('Unable to refresh capabilities of vim %s'),
+                          vim_obj['id'])
+            return
+        regions = vim_obj.get('placement_attr', {}).get('regions', [])
+        capabilities.CAPABILITY_CACHE.refresh(vim_auth, [None] + regions)
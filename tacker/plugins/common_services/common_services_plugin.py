@@ -27,6 +27,9 @@ class CommonServicesPlugin(common_services_db.CommonServicesPluginDb):
 
     supported_extension_aliases = ['CommonServices']
 
+    __native_pagination_support = True
+    __native_sorting_support = True
+
     def __init__(self):
         super(CommonServicesPlugin, self).__init__()
 
@@ -37,8 +40,8 @@ class CommonServicesPlugin(common_services_db.CommonServicesPluginDb):
 
     @log.log
     def get_events(self, context, filters=None, fields=None, sorts=None,
-                   limit=None, marker_obj=None, page_reverse=False):
+                   limit=None, marker=None, page_reverse=False):
         return super(CommonServicesPlugin, self).get_events(context, filters,
                                                        fields, sorts, limit,
-                                                       marker_obj,
+                                                       marker,
                                                        page_reverse)
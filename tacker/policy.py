@@ -14,7 +14,10 @@
 #    under the License.
 
 import collections
+import os
 import re
+import threading
+import time
 
 
 from oslo_config import cfg
@@ -25,31 +28,168 @@ from oslo_utils import excutils
 from oslo_utils import importutils
 import six
 
-from tacker._i18n import _, _LE, _LW
+from tacker._i18n import _, _LE, _LI, _LW
 from tacker.api.v1 import attributes
 from tacker.common import exceptions
 
 
 LOG = logging.getLogger(__name__)
 
+OPTS = [
+    cfg.IntOpt('policy_reload_interval', default=5,
+               help=_("Seconds between two checks of the policy files for "
+                      "changes. Changed rules are loaded in the background "
+                      "once the files did not change for one interval; 0 "
+                      "disables reloading")),
+]
+cfg.CONF.register_opts(OPTS)
+
+
+def config_opts():
+    return [(None, OPTS)]
+
+
 _ENFORCER = None
+_INIT_LOCK = threading.Lock()
+_WATCHER = None
+_WATCHER_PID = None     # process running the watcher thread
 ADMIN_CTX_POLICY = 'context_is_admin'
 
+# match rules by (action, resource, attributes and sub-attributes set)
+_MATCH_RULES = {}
+# _CompiledRules of the rule set of the enforcer
+_COMPILED_RULES = None
+
+_TARGET_FIELD_RE = re.compile(r'%\(([^)]+)\)s')
+
 
 def reset():
-    global _ENFORCER
+    global _ENFORCER, _COMPILED_RULES, _WATCHER, _WATCHER_PID
     if _ENFORCER:
         _ENFORCER.clear()
         _ENFORCER = None
+    _WATCHER = None
+    _WATCHER_PID = None
+    _MATCH_RULES.clear()
+    _COMPILED_RULES = None
+
+
+def _load_enforcer(conf, policy_file):
+    enforcer = policy.Enforcer(conf, policy_file=policy_file)
+    enforcer.load_rules(True)
+    # the policy watcher reloads the rules, enforce() must not look at the
+    # policy files on every check
+    enforcer.use_conf = False
+    return enforcer
+
+
+class _PolicyWatcher(object):
+    """Reload the policy rules in the background when their files change.
+
+    Files are polled every policy_reload_interval seconds and reloaded once
+    they have not changed for one interval. A new enforcer is loaded and
+    replaces the current one at once, so checks never see partially loaded
+    rules. The watcher stops when the policy is reset or its rules are set
+    by other means.
+    """
+
+    def __init__(self, conf, policy_file, enforcer):
+        self._conf = conf
+        self._policy_file = policy_file
+        self._enforcer = enforcer
+        self._rules = enforcer.rules
+        self._loaded = self._signature()
+        self._pending = None
+
+    def _signature(self):
+        paths = []
+        if self._enforcer.policy_path:
+            paths.append(self._enforcer.policy_path)
+        for path in self._conf.oslo_policy.policy_dirs:
+            path = self._conf.find_file(path)
+            if path and os.path.isdir(path):
+                paths.extend(sorted(os.path.join(path, name)
+                                    for name in os.listdir(path)))
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def poll(self):
+        """Reload the rules if their files changed and settled.
+
+        :returns: False once the watcher is no longer needed
+        """
+        global _ENFORCER
+        if (_ENFORCER is not self._enforcer or
+                self._enforcer.rules is not self._rules):
+            return False
+        signature = self._signature()
+        if signature == self._loaded:
+            self._pending = None
+            return True
+        if signature != self._pending:
+            # wait for the files to settle
+            self._pending = signature
+            return True
+        try:
+            enforcer = _load_enforcer(self._conf, self._policy_file)
+        except Exception:
+            LOG.exception(_LE('Unable to reload the policy rules, keeping '
+                              'the current ones'))
+            self._loaded = signature
+            return True
+        with _INIT_LOCK:
+            if _ENFORCER is not self._enforcer:
+                return False
+            _ENFORCER = enforcer
+        self._enforcer = enforcer
+        self._rules = enforcer.rules
+        self._loaded = signature
+        LOG.info(_LI('Reloaded policy rules from %s'), enforcer.policy_path)
+        return True
+
+    def run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                if not self.poll():
+                    return
+            except Exception:
+                LOG.exception(_LE('Policy watcher error'))
+
+
+def _start_watcher(conf):
+    global _WATCHER_PID
+    _WATCHER_PID = os.getpid()
+    interval = conf.policy_reload_interval
+    if interval > 0:
+        thread = threading.Thread(target=_WATCHER.run, args=(interval,))
+        thread.daemon = True
+        thread.start()
 
 
 def init(conf=cfg.CONF, policy_file=None):
-    """Init an instance of the Enforcer class."""
+    """Init an instance of the Enforcer class.
 
-    global _ENFORCER
-    if not _ENFORCER:
-        _ENFORCER = policy.Enforcer(conf, policy_file=policy_file)
-        _ENFORCER.load_rules(True)
+    A forked process, e.g. an API worker, starts its own policy watcher
+    the first time it calls init().
+    """
+
+    global _ENFORCER, _WATCHER
+    if _ENFORCER and _WATCHER_PID == os.getpid():
+        return
+    with _INIT_LOCK:
+        if not _ENFORCER:
+            _ENFORCER = _load_enforcer(conf, policy_file)
+            _WATCHER = _PolicyWatcher(conf, policy_file, _ENFORCER)
+        elif _WATCHER_PID == os.getpid() or _WATCHER is None:
+            return
+        _start_watcher(_WATCHER._conf)
 
 
 def refresh(policy_file=None):
@@ -105,8 +245,8 @@ def _should_validate_sub_attributes(attribute, sub_attr):
                  v for (k, v) in six.iteritems(validate)]))
 
 
-def _build_subattr_match_rule(attr_name, attr, action, target):
-    """Create the rule to match for sub-attribute policy checks."""
+def _subattr_names(attr_name, attr, target):
+    """Return the sub-attributes of an attribute set in the target."""
     # TODO(salv-orlando): Instead of relying on validator info, introduce
     # typing for API attributes
     # Expect a dict as type descriptor
@@ -123,14 +263,26 @@ def _build_subattr_match_rule(attr_name, attr, action, target):
                   "generate any sub-attr policy rule for %s.",
                   attr_name)
         return
+    return tuple(sub_attr_name for sub_attr_name in data
+                 if sub_attr_name in target[attr_name])
+
+
+def _build_subattr_rule(action, attr_name, sub_attr_names):
+    if sub_attr_names is None:
+        return
     sub_attr_rules = [policy.RuleCheck('rule', '%s:%s:%s' %
                                        (action, attr_name,
                                         sub_attr_name)) for
-                      sub_attr_name in data if sub_attr_name in
-                      target[attr_name]]
+                      sub_attr_name in sub_attr_names]
     return policy.AndCheck(sub_attr_rules)
 
 
+def _build_subattr_match_rule(attr_name, attr, action, target):
+    """Create the rule to match for sub-attribute policy checks."""
+    return _build_subattr_rule(action, attr_name,
+                               _subattr_names(attr_name, attr, target))
+
+
 def _process_rules_list(rules, match_rule):
     """Recursively walk a policy rule to extract a list of match entries."""
     if isinstance(match_rule, policy.RuleCheck):
@@ -141,6 +293,34 @@ def _process_rules_list(rules, match_rule):
     return rules
 
 
+def _match_rule_key(action, target, pluralized):
+    """Return what the match rule of an action on a target depends on.
+
+    That is the action and the policy enforced attributes explicitly set
+    in the target, with their sub-attributes.
+    """
+    resource, enforce_attr_based_check = get_resource_and_action(
+        action, pluralized)
+    attrs = []
+    if enforce_attr_based_check:
+        # assigning to variable with short name for improving readability
+        res_map = attributes.RESOURCE_ATTRIBUTE_MAP
+        if resource in res_map:
+            for attribute_name in res_map[resource]:
+                attribute = res_map[resource][attribute_name]
+                if ('enforce_policy' in attribute and
+                        _is_attribute_explicitly_set(attribute_name,
+                                                     res_map[resource],
+                                                     target, action)):
+                    sub_attr_names = False
+                    if _should_validate_sub_attributes(
+                            attribute, target[attribute_name]):
+                        sub_attr_names = _subattr_names(
+                            attribute_name, attribute, target)
+                    attrs.append((attribute_name, sub_attr_names))
+    return action, tuple(attrs)
+
+
 def _build_match_rule(action, target, pluralized):
     """Create the rule to match for a given action.
 
@@ -152,33 +332,102 @@ def _build_match_rule(action, target, pluralized):
     4) add an entry for sub-attributes of a resource for which the
        action is being executed
        (e.g.: create_router:external_gateway_info:network_id)
+
+    Rules are built once per action and set of attributes and reused.
     """
+    key = _match_rule_key(action, target, pluralized)
+    match_rule = _MATCH_RULES.get(key)
+    if match_rule is not None:
+        return match_rule
     match_rule = policy.RuleCheck('rule', action)
-    resource, enforce_attr_based_check = get_resource_and_action(
-        action, pluralized)
-    if enforce_attr_based_check:
-        # assigning to variable with short name for improving readability
-        res_map = attributes.RESOURCE_ATTRIBUTE_MAP
-        if resource in res_map:
-            for attribute_name in res_map[resource]:
-                if _is_attribute_explicitly_set(attribute_name,
-                                                res_map[resource],
-                                                target, action):
-                    attribute = res_map[resource][attribute_name]
-                    if 'enforce_policy' in attribute:
-                        attr_rule = policy.RuleCheck('rule', '%s:%s' %
-                                                     (action, attribute_name))
-                        # Build match entries for sub-attributes
-                        if _should_validate_sub_attributes(
-                                attribute, target[attribute_name]):
-                            attr_rule = policy.AndCheck(
-                                [attr_rule, _build_subattr_match_rule(
-                                    attribute_name, attribute,
-                                    action, target)])
-                        match_rule = policy.AndCheck([match_rule, attr_rule])
+    for attribute_name, sub_attr_names in key[1]:
+        attr_rule = policy.RuleCheck('rule', '%s:%s' %
+                                     (action, attribute_name))
+        # Build match entries for sub-attributes
+        if sub_attr_names is not False:
+            attr_rule = policy.AndCheck(
+                [attr_rule, _build_subattr_rule(action, attribute_name,
+                                                sub_attr_names)])
+        match_rule = policy.AndCheck([match_rule, attr_rule])
+    _MATCH_RULES[key] = match_rule
     return match_rule
 
 
+class _CompiledRules(object):
+    """Target fields the decisions of a rule set depend on."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._target_fields = {}
+
+    def _collect_fields(self, check, fields, seen):
+        if isinstance(check, policy.RuleCheck):
+            if check.match in seen:
+                return True
+            seen.add(check.match)
+            try:
+                # missing rules fall back to the default rule
+                rule = self.rules[check.match]
+            except KeyError:
+                return True
+            return self._collect_fields(rule, fields, seen)
+        if isinstance(check, (policy.AndCheck, policy.OrCheck)):
+            return all(self._collect_fields(rule, fields, seen)
+                       for rule in check.rules)
+        if isinstance(check, policy.NotCheck):
+            return self._collect_fields(check.rule, fields, seen)
+        if isinstance(check, FieldCheck):
+            fields.add(check.field)
+            return True
+        if isinstance(check, OwnerCheck):
+            fields.add(check.target_field)
+            return True
+        if isinstance(check, policy.Check):
+            if check.kind in ('http', 'https'):
+                # the whole target is sent to the remote server
+                return False
+            fields.update(_TARGET_FIELD_RE.findall(check.match))
+        # True and False checks
+        return True
+
+    def target_fields(self, match_rule):
+        """Return the target fields a match rule reads, None if unknown."""
+        # checks are not hashable, the entry keeps the rule alive
+        entry = self._target_fields.get(id(match_rule))
+        if entry is None or entry[0] is not match_rule:
+            fields = set()
+            if self._collect_fields(match_rule, fields, set()):
+                fields = tuple(sorted(fields))
+            else:
+                fields = None
+            entry = self._target_fields[id(match_rule)] = (match_rule,
+                                                           fields)
+        return entry[1]
+
+
+def _get_compiled_rules():
+    global _COMPILED_RULES
+    compiled = _COMPILED_RULES
+    if compiled is None or compiled.rules is not _ENFORCER.rules:
+        compiled = _COMPILED_RULES = _CompiledRules(_ENFORCER.rules)
+    return compiled
+
+
+def _get_request_cache(context):
+    """Return the policy cache of a request context.
+
+    Credentials are serialized once per context and decisions are
+    remembered for the rest of the request.
+    """
+    cache = getattr(context, '_policy_cache', None)
+    # contexts copied by elevated() must not share the cache
+    if cache is None or cache['owner'] != id(context):
+        cache = {'owner': id(context), 'credentials': context.to_dict(),
+                 'compiled': None, 'decisions': {}}
+        context._policy_cache = cache
+    return cache
+
+
 # This check is registered as 'tenant_id' so that it can override
 # GenericCheck which was used for validating parent resource ownership.
 # This will prevent us from having to handling backward compatibility
@@ -320,10 +569,32 @@ def _prepare_check(context, action, target, pluralized):
     if target is None:
         target = {}
     match_rule = _build_match_rule(action, target, pluralized)
-    credentials = context.to_dict()
+    credentials = _get_request_cache(context)['credentials']
     return match_rule, target, credentials
 
 
+def _decision_key(context, match_rule, target):
+    """Return the key of a decision in the request cache, if cacheable.
+
+    Decisions only depend on the credentials and the target fields read by
+    the rules, typically the owner of the target.
+    """
+    cache = _get_request_cache(context)
+    compiled = _get_compiled_rules()
+    if cache['compiled'] is not compiled:
+        cache['compiled'] = compiled
+        cache['decisions'] = {}
+    fields = compiled.target_fields(match_rule)
+    if fields is None or not all(field in target for field in fields):
+        return None
+    key = (id(match_rule), tuple(target[field] for field in fields))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 def log_rule_list(match_rule):
     if LOG.isEnabledFor(logging.DEBUG):
         rules = _process_rules_list([], match_rule)
@@ -360,10 +631,16 @@ def check(context, action, target, plugin=None, might_not_exist=False,
                                                      action,
                                                      target,
                                                      pluralized)
+    key = _decision_key(context, match_rule, target)
+    decisions = _get_request_cache(context)['decisions']
+    if key is not None and key in decisions:
+        return decisions[key]
     result = _ENFORCER.enforce(match_rule,
                                target,
                                credentials,
                                pluralized=pluralized)
+    if key is not None:
+        decisions[key] = result
     # logging applied rules in case of failure
     if not result:
         log_rule_list(match_rule)
@@ -319,6 +319,21 @@ class ResourceTestCase(base.BaseTestCase):
         res = resource.delete('', extra_environ=environ)
         self.assertEqual(204, res.status_int)
 
+    def test_index_streamed(self):
+        controller = mock.MagicMock()
+        controller.index = lambda request: {'tests': [{'id': 1}, {'id': 2}]}
+
+        resource = webtest.TestApp(wsgi_resource.Resource(controller))
+
+        environ = {'wsgiorg.routing_args': (None, {'action': 'index',
+                                                   'format': 'json'})}
+        with mock.patch.object(wsgi.JSONDictSerializer, 'serialize',
+                               side_effect=AssertionError()):
+            res = resource.get('', extra_environ=environ)
+        self.assertEqual(200, res.status_int)
+        self.assertEqual({'tests': [{'id': 1}, {'id': 2}]},
+                         wsgi.JSONDeserializer().deserialize(res.body)['body'])
+
     def _test_error_log_level(self, map_webob_exc, expect_log_info=False,
                               use_fault_map=True):
         class TestException(n_exc.TackerException):
@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from tacker.common import clients
+from tacker.tests import base
+
+
+AUTH_ATTR = {'auth_url': 'http://localhost:5000/v3',
+             'username': 'admin',
+             'password': 'devstack',
+             'project_name': 'admin'}
+
+
+class TestOpenstackClients(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestOpenstackClients, self).setUp()
+        clients.invalidate_cache()
+        self.addCleanup(clients.invalidate_cache)
+        self.keystone = mock.Mock()
+        self._mock('tacker.vnfm.keystone.Keystone',
+                   mock.Mock(return_value=self.keystone))
+        self._mock('heatclient.client.Client')
+
+    def _mock(self, target, new=mock.DEFAULT):
+        patcher = mock.patch(target, new)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_keystone_client_is_reused(self):
+        first = clients.OpenstackClients(AUTH_ATTR).keystone
+        second = clients.OpenstackClients(dict(AUTH_ATTR)).keystone
+        self.assertIs(first, second)
+        self.assertEqual(1, self.keystone.initialize_client.call_count)
+
+    def test_heat_client_cached_per_region(self):
+        clients.OpenstackClients(AUTH_ATTR, 'RegionOne').heat
+        clients.OpenstackClients(AUTH_ATTR, 'RegionOne').heat
+        clients.OpenstackClients(AUTH_ATTR, 'RegionTwo').heat
+        self.assertEqual(1, self.keystone.initialize_client.call_count)
+        self.assertEqual(2, clients.heatclient.Client.call_count)
+
+    def test_changed_credentials_authenticate_again(self):
+        clients.OpenstackClients(AUTH_ATTR).keystone
+        clients.OpenstackClients(dict(AUTH_ATTR,
+                                      password='changed')).keystone
+        self.assertEqual(2, self.keystone.initialize_client.call_count)
+
+    def test_invalidate_cache(self):
+        clients.OpenstackClients(AUTH_ATTR).keystone
+        clients.invalidate_cache(AUTH_ATTR['auth_url'])
+        clients.OpenstackClients(AUTH_ATTR).keystone
+        self.assertEqual(2, self.keystone.initialize_client.call_count)
+
+    def test_cache_disabled(self):
+        self.config(cache_ttl=0, group='openstack_clients')
+        clients.OpenstackClients(AUTH_ATTR).keystone
+        clients.OpenstackClients(AUTH_ATTR).keystone
+        self.assertEqual(2, self.keystone.initialize_client.call_count)
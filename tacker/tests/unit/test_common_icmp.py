@@ -0,0 +1,70 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import struct
+
+import mock
+
+from tacker.common import icmp
+from tacker.tests import base
+
+
+class TestIcmpPacket(base.BaseTestCase):
+
+    def test_checksum_of_packet_is_zero(self):
+        packet = icmp.build_echo_request(0x1234, 7, b'abcdefg')
+        self.assertEqual(0, icmp.checksum(packet))
+
+    def test_parse_echo_reply(self):
+        request = icmp.build_echo_request(0x1234, 7)
+        reply = struct.pack('!B', icmp.ICMP_ECHO_REPLY) + request[1:]
+        self.assertEqual((0x1234, 7), icmp.parse_echo_reply(reply, False))
+
+    def test_parse_echo_reply_with_ip_header(self):
+        request = icmp.build_echo_request(0x1234, 7)
+        reply = struct.pack('!B', icmp.ICMP_ECHO_REPLY) + request[1:]
+        ip_header = b'\x45' + b'\x00' * 19
+        self.assertEqual((0x1234, 7),
+                         icmp.parse_echo_reply(ip_header + reply, True))
+
+    def test_parse_ignores_echo_request(self):
+        request = icmp.build_echo_request(0x1234, 7)
+        self.assertIsNone(icmp.parse_echo_reply(request, False))
+
+
+class TestIcmpProber(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestIcmpProber, self).setUp()
+        self.prober = icmp.IcmpProber()
+        self.prober._sock = mock.Mock()
+        self.replies = []
+
+        def sendto(packet, target):
+            reply = struct.pack('!B', icmp.ICMP_ECHO_REPLY) + packet[1:]
+            if target[0] == '10.0.0.1':
+                self.prober._handle_reply(reply, target[0])
+        self.prober._sock.sendto.side_effect = sendto
+
+    def test_ping_batch(self):
+        result = self.prober.ping(['10.0.0.1', '10.0.0.2'], count=2,
+                                  timeout=0.01)
+        self.assertEqual({'10.0.0.1': True, '10.0.0.2': False}, result)
+        # the answering host is not probed again in the second round
+        self.assertEqual(3, self.prober._sock.sendto.call_count)
+        self.assertEqual({}, self.prober._pending)
+
+    @mock.patch('socket.gethostbyname')
+    def test_ping_unresolvable_host(self, mock_gethostbyname):
+        mock_gethostbyname.side_effect = icmp.socket.gaierror()
+        self.assertFalse(self.prober.is_reachable('nowhere', timeout=0.01))
+        self.assertFalse(self.prober._sock.sendto.called)
@@ -0,0 +1,78 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import uuid
+
+import mock
+
+from tacker.common import json_codec
+from tacker.tests import base
+
+
+PAYLOAD = {'vnfs': [{'id': uuid.UUID('6261579e-d6f3-49ad-8bc3-a9cb974778ff'),
+                     'name': u'\u7f51\u7edc',
+                     'created_at': datetime.datetime(2016, 7, 20, 5, 43, 52),
+                     'attributes': {'heat_template': 'resources: {}'},
+                     'error_reason': None}]}
+EXPECTED = {'vnfs': [{'id': '6261579e-d6f3-49ad-8bc3-a9cb974778ff',
+                      'name': u'\u7f51\u7edc',
+                      'created_at': '2016-07-20 05:43:52',
+                      'attributes': {'heat_template': 'resources: {}'},
+                      'error_reason': None}]}
+
+
+class TestJsonCodec(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestJsonCodec, self).setUp()
+        self.addCleanup(json_codec._codecs.update,
+                        {json_codec.STDLIB: json_codec._STDLIB_CODEC})
+        self.addCleanup(json_codec._codecs.clear)
+
+    def test_stdlib_by_default(self):
+        self.assertEqual(json_codec.STDLIB, json_codec.get_codec().name)
+
+    def test_codecs_round_trip(self):
+        for name in (json_codec.STDLIB,) + json_codec.ACCELERATED:
+            codec = json_codec.get_codec(name)
+            self.assertEqual(EXPECTED, codec.loads(codec.dumps(PAYLOAD)))
+            self.assertEqual(EXPECTED, codec.loads(
+                codec.dumps(PAYLOAD).encode('utf-8')))
+
+    def test_invalid_json(self):
+        for name in (json_codec.STDLIB,) + json_codec.ACCELERATED:
+            self.assertRaises(ValueError, json_codec.get_codec(name).loads,
+                              '{"vnfs": ')
+
+    @mock.patch('oslo_utils.importutils.try_import', return_value=None)
+    def test_missing_library_uses_stdlib(self, try_import):
+        self.assertEqual(json_codec.STDLIB,
+                         json_codec.get_codec('ujson').name)
+        self.config(json_codec=json_codec.AUTO)
+        self.assertEqual(json_codec.STDLIB, json_codec.get_codec().name)
+
+    def test_auto_prefers_accelerated(self):
+        fake_dumps = mock.Mock(return_value='{}')
+        with mock.patch.object(json_codec, '_LOADERS',
+                               {'orjson': lambda module: (fake_dumps,
+                                                          mock.Mock())}), \
+                mock.patch('oslo_utils.importutils.try_import'):
+            self.config(json_codec=json_codec.AUTO)
+            self.assertEqual('{}', json_codec.dumps(PAYLOAD))
+        self.assertEqual('orjson', json_codec.get_codec().name)
+
+    def test_accelerated_falls_back_to_stdlib(self):
+        codec = json_codec._AcceleratedCodec(
+            'orjson', mock.Mock(side_effect=TypeError()), mock.Mock())
+        self.assertEqual(EXPECTED,
+                         json_codec.loads(codec.dumps(PAYLOAD)))
@@ -13,10 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import mock
 
 from oslo_utils import timeutils
 
+from tacker.common import exceptions
 from tacker import context
 from tacker.db.common_services import common_services_db
 from tacker.extensions import common_services
@@ -157,3 +160,57 @@ class TestCommonServicesPlugin(db_base.SqlTestCase):
         self.assertIn('event_type', result[0])
         self.assertNotIn('event_details', result[0])
         self.assertNotIn('timestamp', result[0])
+
+    def test_create_event_async(self):
+        self.config_fixture.config(group='event_writer', durability='async')
+        evt_obj = self._get_dummy_event_obj()
+        with mock.patch.object(common_services_db.EVENT_WRITER,
+                               'write') as write:
+            result = self.event_db_plugin.create_event(
+                self.context, evt_obj['resource_id'],
+                evt_obj['resource_type'], evt_obj['resource_state'],
+                evt_obj['event_type'], evt_obj['timestamp'],
+                evt_obj['event_details'])
+        self.assertIsNone(result['id'])
+        self.assertEqual(evt_obj['resource_id'], result['resource_id'])
+        write.assert_called_once_with(mock.ANY, wait=False)
+        self.assertEqual(evt_obj['resource_state'],
+                         write.call_args[0][0]['resource_state'])
+
+    def _create_events(self, count):
+        evt_obj = self._get_dummy_event_obj()
+        for i in range(count):
+            self.event_db_plugin.create_event(
+                self.context, evt_obj['resource_id'],
+                evt_obj['resource_type'], evt_obj['resource_state'],
+                evt_obj['event_type'],
+                evt_obj['timestamp'] + datetime.timedelta(hours=i),
+                evt_obj['event_details'])
+
+    def test_get_events_time_range(self):
+        self._create_events(5)
+        result = self.coreutil_plugin.get_events(
+            self.context, {'since': ['2016-07-20T06:43:52.765172'],
+                           'until': ['2016-07-20T09:43:52.765172Z']},
+            ['id', 'timestamp'])
+        self.assertEqual(3, len(result))
+        self.assertEqual(
+            [datetime.datetime(2016, 7, 20, h, 43, 52, 765172)
+             for h in (6, 7, 8)],
+            sorted(evt['timestamp'] for evt in result))
+
+    def test_get_events_invalid_time(self):
+        self.assertRaises(exceptions.InvalidInput,
+                          self.coreutil_plugin.get_events, self.context,
+                          {'since': ['yesterday']})
+
+    def test_get_events_paginated(self):
+        self._create_events(5)
+        first = self.coreutil_plugin.get_events(
+            self.context, sorts=[('id', True)], limit=2)
+        self.assertEqual(2, len(first))
+        second = self.coreutil_plugin.get_events(
+            self.context, sorts=[('id', True)], limit=2,
+            marker=first[-1]['id'])
+        self.assertEqual(2, len(second))
+        self.assertTrue(first[-1]['id'] < second[0]['id'])
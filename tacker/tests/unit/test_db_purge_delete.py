@@ -13,11 +13,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import mock
+import datetime
+import os
 
+import fixtures
+import mock
+import sqlalchemy
 
 from tacker.common import exceptions
 from tacker import context
+from tacker.db import api as db_api
+from tacker.db.migration.models import head
 from tacker.db.migration import purge_tables
 from tacker.tests.unit.db import base as db_base
 
@@ -32,13 +38,10 @@ class TestDbPurgeDelete(db_base.SqlTestCase):
         self.addCleanup(mock.patch.stopall)
         self.context = context.get_admin_context()
         self._mock_config()
-        mock.patch('sqlalchemy.Table').start()
-        mock.patch('tacker.db.migration.purge_tables._purge_resource_tables'
+        mock.patch('tacker.db.migration.purge_tables._purge_resource_table'
                    ).start()
         mock.patch('tacker.db.migration.purge_tables._purge_events_table',
                    ).start()
-        mock.patch('tacker.db.migration.purge_tables.'
-                   '_generate_associated_tables_map').start()
         mock.patch('tacker.db.migration.purge_tables.get_engine').start()
 
     def _mock_config(self):
@@ -62,20 +65,173 @@ class TestDbPurgeDelete(db_base.SqlTestCase):
 
     def test_purge_delete_call_vnf(self):
         purge_tables.purge_deleted(self.config, 'vnf', '90', 'days')
-        purge_tables._purge_resource_tables.assert_called_once_with(
-            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY)
+        purge_tables._purge_resource_table.assert_called_once_with(
+            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY,
+            mock.ANY)
 
     def test_purge_delete_call_vnfd(self):
         purge_tables.purge_deleted(self.config, 'vnfd', '90', 'days')
-        purge_tables._purge_resource_tables.assert_called_once_with(
-            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY)
+        purge_tables._purge_resource_table.assert_called_once_with(
+            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY,
+            mock.ANY)
 
     def test_purge_delete_call_vim(self):
         purge_tables.purge_deleted(self.config, 'vims', '90', 'days')
-        purge_tables._purge_resource_tables.assert_called_once_with(
-            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY)
+        purge_tables._purge_resource_table.assert_called_once_with(
+            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY,
+            mock.ANY)
 
     def test_purge_delete_call_events(self):
         purge_tables.purge_deleted(self.config, 'events', '90', 'days')
         purge_tables._purge_events_table.assert_called_once_with(
-            mock.ANY, mock.ANY, mock.ANY)
+            mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY)
+
+    def test_invalid_chunk_size_input(self):
+        self.assertRaises(exceptions.InvalidInput, purge_tables.purge_deleted,
+                          self.config, 'vnf', '90', 'days', chunk_size=0)
+
+    def test_purge_delete_call_all(self):
+        purge_tables.purge_deleted(self.config, 'all', '90', 'days')
+        # vnf references vnfd and vims, so it is purged first
+        self.assertEqual(
+            'vnf', purge_tables._purge_resource_table.call_args_list[0][0][
+                1].name)
+        self.assertEqual(
+            ['vims', 'vnfd'],
+            sorted(call[0][1].name for call in
+                   purge_tables._purge_resource_table.call_args_list[1:]))
+
+    def test_purge_levels(self):
+        self.assertEqual(
+            [['vnf'], ['vims', 'vnfd']],
+            purge_tables._generate_purge_levels(
+                head.get_metadata(), ['vnfd', 'vims', 'vnf']))
+
+    def test_associated_tables_map(self):
+        assoc_map = purge_tables._generate_associated_tables_map(
+            head.get_metadata())
+        self.assertEqual({'vnf_attribute': 'vnf_id'}, assoc_map['vnf'])
+        self.assertEqual({'vimauths': 'vim_id'}, assoc_map['vims'])
+
+    def test_progress_resume(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'purge.json')
+        time_line = datetime.datetime(2016, 9, 1, 10, 0, 0)
+        progress = purge_tables._Progress(path, 'vnf', time_line)
+        progress.save('vnf', 'marker-id', 10)
+        resumed = purge_tables._Progress(path, 'vnf',
+                                         datetime.datetime.utcnow())
+        self.assertEqual(time_line, resumed.time_line)
+        self.assertEqual({'marker': 'marker-id', 'done': False,
+                          'deleted': 10}, resumed.get('vnf'))
+        resumed.finish()
+        self.assertFalse(os.path.exists(path))
+
+
+def _uuid(number):
+    return '00000000-0000-4000-8000-%012d' % number
+
+
+class TestDbPurgeDeleteRows(db_base.SqlTestCase):
+    """Purge rows of the test database in chunks smaller than the tables."""
+
+    def setUp(self):
+        super(TestDbPurgeDeleteRows, self).setUp()
+        self.addCleanup(mock.patch.stopall)
+        self.engine = db_api.get_engine()
+        mock.patch('tacker.db.migration.purge_tables.get_engine',
+                   return_value=self.engine).start()
+        self.meta = head.get_metadata()
+        now = datetime.datetime.utcnow()
+        self.old = now - datetime.timedelta(days=100)
+        self.recent = now - datetime.timedelta(days=1)
+        self.progress_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'purge.json')
+
+    def _insert(self, table_name, rows):
+        with self.engine.begin() as conn:
+            conn.execute(self.meta.tables[table_name].insert(), rows)
+
+    def _ids(self, table_name, column='id'):
+        table = self.meta.tables[table_name]
+        with self.engine.connect() as conn:
+            return sorted(row[0] for row in conn.execute(
+                sqlalchemy.select([table.c[column]])))
+
+    def _add_vnfs(self):
+        """Add 5 old deleted VNFs, a recently deleted one and a live one."""
+        vnfs = [(_uuid(i), self.old) for i in range(5)]
+        vnfs += [(_uuid(5), self.recent), (_uuid(6), None)]
+        self._insert('vims', [{'id': _uuid(100), 'tenant_id': 'tenant',
+                               'type': 'openstack', 'name': 'vim',
+                               'shared': False, 'is_default': False,
+                               'status': 'REACHABLE'}])
+        self._insert('vnf', [{'id': vnf_id, 'tenant_id': 'tenant',
+                              'name': vnf_id, 'status': 'ACTIVE',
+                              'vim_id': _uuid(100), 'deleted_at': deleted_at}
+                             for vnf_id, deleted_at in vnfs])
+        self._insert('vnf_attribute', [{'id': _uuid(200 + i),
+                                        'vnf_id': vnf_id, 'key': 'config'}
+                                       for i, (vnf_id, _deleted_at)
+                                       in enumerate(vnfs)])
+
+    def _purge(self, resource, **kwargs):
+        kwargs.setdefault('chunk_size', 2)
+        return purge_tables.purge_deleted(mock.Mock(), resource, '90',
+                                          'days', **kwargs)
+
+    def test_purge_vnf_in_chunks(self):
+        self._add_vnfs()
+        save = purge_tables._Progress.save
+        with mock.patch.object(purge_tables._Progress, 'save',
+                               autospec=True, side_effect=save) as mock_save:
+            self.assertEqual({'vnf': 5}, self._purge('vnf'))
+        self.assertEqual(
+            [('vnf', _uuid(1), 2, False), ('vnf', _uuid(3), 4, False),
+             ('vnf', _uuid(4), 5, True)],
+            [call[0][1:] for call in mock_save.call_args_list])
+        self.assertEqual([_uuid(5), _uuid(6)], self._ids('vnf'))
+        self.assertEqual([_uuid(5), _uuid(6)],
+                         self._ids('vnf_attribute', 'vnf_id'))
+
+    def test_purge_vnf_dry_run(self):
+        self._add_vnfs()
+        self.assertEqual({'vnf': 5, 'vnf_attribute': 5},
+                         self._purge('vnf', dry_run=True))
+        self.assertEqual(7, len(self._ids('vnf')))
+        self.assertEqual(7, len(self._ids('vnf_attribute')))
+
+    def test_purge_events_in_chunks(self):
+        events = []
+        for i in range(3):
+            events.append((_uuid(i), 'CREATE', self.old))
+            events.append((_uuid(i), 'DELETE', self.old))
+        events.append((_uuid(5), 'CREATE', self.old))
+        events.append((_uuid(5), 'DELETE', self.recent))
+        self._insert('events', [{'resource_id': resource_id,
+                                 'resource_state': 'DEAD',
+                                 'resource_type': 'vnf',
+                                 'event_type': event_type,
+                                 'timestamp': timestamp}
+                                for resource_id, event_type, timestamp
+                                in events])
+        self.assertEqual({'events': 6}, self._purge('events', dry_run=True))
+        self.assertEqual({'events': 6}, self._purge('events'))
+        self.assertEqual([_uuid(5), _uuid(5)],
+                         self._ids('events', 'resource_id'))
+
+    def test_purge_resumes_from_progress_file(self):
+        self._add_vnfs()
+        with mock.patch('tacker.db.migration.purge_tables.time') as mock_time:
+            mock_time.sleep.side_effect = RuntimeError('interrupted')
+            self.assertRaises(RuntimeError, self._purge, 'vnf', sleep=1,
+                              progress_file=self.progress_file)
+        self.assertEqual([_uuid(i) for i in range(2, 7)], self._ids('vnf'))
+        self.assertTrue(os.path.exists(self.progress_file))
+        # the resumed purge keeps the cutoff time of the interrupted one
+        counts = purge_tables.purge_deleted(
+            mock.Mock(), 'vnf', '0', 'seconds', chunk_size=2,
+            progress_file=self.progress_file)
+        self.assertEqual({'vnf': 5}, counts)
+        self.assertEqual([_uuid(5), _uuid(6)], self._ids('vnf'))
+        self.assertFalse(os.path.exists(self.progress_file))
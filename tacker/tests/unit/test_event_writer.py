@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import mock
+
+from tacker.db.common_services import event_writer
+from tacker.tests.unit import base
+
+
+class TestEventWriter(base.TestCase):
+
+    def setUp(self):
+        super(TestEventWriter, self).setUp()
+        self.session = mock.MagicMock()
+        mock.patch('tacker.db.api.get_session',
+                   return_value=self.session).start()
+        self.addCleanup(mock.patch.stopall)
+        self.table = mock.Mock()
+        self.writer = event_writer.EventWriter(self.table)
+
+    def test_write_wait(self):
+        self.writer.write({'resource_id': 'a'}, wait=True)
+        self.session.execute.assert_called_once_with(
+            self.table.insert.return_value, [{'resource_id': 'a'}])
+        stats = self.writer.stats()
+        self.assertEqual(1, stats['queued'])
+        self.assertEqual(1, stats['written'])
+        self.assertEqual(0, stats['depth'])
+
+    def test_write_batches(self):
+        self.config_fixture.config(group='event_writer', flush_interval=5)
+        self.writer._thread = mock.Mock()
+        self.writer._pid = os.getpid()
+        self.writer._queue = event_writer.queue.Queue()
+        for i in range(3):
+            self.writer.write({'resource_id': i})
+        self.assertEqual(3, self.writer.stats()['depth'])
+        self.config_fixture.config(group='event_writer', flush_interval=0,
+                                   batch_size=2)
+        self.writer.flush()
+        self.assertEqual(
+            [mock.call(self.table.insert.return_value,
+                       [{'resource_id': 0}, {'resource_id': 1}]),
+             mock.call(self.table.insert.return_value,
+                       [{'resource_id': 2}])],
+            self.session.execute.call_args_list)
+        self.assertEqual(2, self.writer.stats()['batches'])
+
+    def test_write_wait_error(self):
+        self.session.execute.side_effect = RuntimeError('db down')
+        self.assertRaises(RuntimeError, self.writer.write,
+                          {'resource_id': 'a'}, wait=True)
+        self.assertEqual(1, self.writer.stats()['failed'])
+
+    @mock.patch('threading.Thread')
+    @mock.patch('os.getpid')
+    def test_writer_respawned_after_fork(self, mock_getpid, mock_thread):
+        mock_getpid.return_value = 100
+        self.writer.write({'resource_id': 'a'})
+        parent_queue = self.writer._queue
+        self.writer.write({'resource_id': 'b'})
+        self.assertEqual(1, mock_thread.call_count)
+        mock_getpid.return_value = 101
+        self.writer.write({'resource_id': 'c'})
+        self.assertEqual(2, mock_thread.call_count)
+        self.assertIsNot(parent_queue, self.writer._queue)
+        self.assertEqual(1, self.writer.stats()['depth'])
+        self.assertEqual(1, self.writer.stats()['queued'])
+
+    @mock.patch.object(event_writer, 'LOG')
+    def test_report_stats(self, mock_log):
+        reported = self.writer._report_stats({})
+        self.assertTrue(mock_log.info.called)
+        self.writer._stats['blocked'] = 1
+        reported = self.writer._report_stats(reported)
+        self.assertTrue(mock_log.warning.called)
+        self.writer._report_stats(reported)
+        self.assertEqual(1, mock_log.warning.call_count)
@@ -67,6 +67,67 @@ class PolicyFileTestCase(base.BaseTestCase):
                               action,
                               self.target)
 
+    def test_modified_policy_reloaded_by_watcher(self):
+        tmpfilename = self.tempdir.join('policy.json')
+        action = "example:test"
+        with open(tmpfilename, "w") as policyfile:
+            policyfile.write("""{"example:test": ""}""")
+        policy.init(policy_file=tmpfilename)
+        enforcer = policy._ENFORCER
+        with open(tmpfilename, "w") as policyfile:
+            policyfile.write("""{"example:test": "!"}""")
+        # the change is only loaded once the file settled
+        self.assertTrue(policy._WATCHER.poll())
+        self.assertIs(enforcer, policy._ENFORCER)
+        policy.enforce(self.context, action, self.target)
+        self.assertTrue(policy._WATCHER.poll())
+        self.assertIsNot(enforcer, policy._ENFORCER)
+        self.assertRaises(exceptions.PolicyNotAuthorized,
+                          policy.enforce,
+                          self.context,
+                          action,
+                          self.target)
+
+    def test_invalid_policy_keeps_rules(self):
+        tmpfilename = self.tempdir.join('policy.json')
+        with open(tmpfilename, "w") as policyfile:
+            policyfile.write("""{"example:test": ""}""")
+        policy.init(policy_file=tmpfilename)
+        enforcer = policy._ENFORCER
+        with open(tmpfilename, "w") as policyfile:
+            policyfile.write("""{"example:test": """)
+        policy._WATCHER.poll()
+        policy._WATCHER.poll()
+        self.assertIs(enforcer, policy._ENFORCER)
+        policy.enforce(self.context, "example:test", self.target)
+
+    def test_watcher_restarted_after_fork(self):
+        tmpfilename = self.tempdir.join('policy.json')
+        with open(tmpfilename, "w") as policyfile:
+            policyfile.write("""{"example:test": ""}""")
+        with mock.patch('threading.Thread') as thread, \
+                mock.patch('os.getpid', return_value=100):
+            policy.init(policy_file=tmpfilename)
+            policy.init(policy_file=tmpfilename)
+            self.assertEqual(1, thread.return_value.start.call_count)
+        enforcer = policy._ENFORCER
+        with mock.patch('threading.Thread') as thread, \
+                mock.patch('os.getpid', return_value=101):
+            policy.init(policy_file=tmpfilename)
+            thread.return_value.start.assert_called_once_with()
+            self.assertEqual(policy._WATCHER.run,
+                             thread.call_args[1]['target'])
+        self.assertIs(enforcer, policy._ENFORCER)
+
+    def test_enforce_does_not_read_policy_file(self):
+        tmpfilename = self.tempdir.join('policy.json')
+        with open(tmpfilename, "w") as policyfile:
+            policyfile.write("""{"example:test": ""}""")
+        policy.init(policy_file=tmpfilename)
+        with mock.patch('os.path.getmtime') as getmtime:
+            policy.enforce(self.context, "example:test", self.target)
+        self.assertFalse(getmtime.called)
+
 
 class PolicyTestCase(base.BaseTestCase):
     def setUp(self):
@@ -170,6 +231,53 @@ class PolicyTestCase(base.BaseTestCase):
         policy.enforce(admin_context, uppercase_action, self.target)
 
 
+class PolicyCacheTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(PolicyCacheTestCase, self).setUp()
+        policy.reset()
+        self.addCleanup(policy.reset)
+        policy.init()
+        rules = {
+            "get_example": "role:admin or tenant_id:%(tenant_id)s",
+            "get_remote": "http:http://www.example.com",
+        }
+        policy._ENFORCER.set_rules(common_policy.Rules.from_dict(rules))
+        self.context = context.Context('fake', 'fake', roles=['member'])
+        self.targets = [{'id': i, 'tenant_id': 'fake' if i % 2 else 'other'}
+                        for i in range(10)]
+
+    def test_match_rule_built_once(self):
+        self.assertIs(policy._build_match_rule('get_example', {}, None),
+                      policy._build_match_rule('get_example', {}, None))
+
+    def test_check_decisions_cached_per_owner(self):
+        with mock.patch.object(policy._ENFORCER, 'enforce',
+                               wraps=policy._ENFORCER.enforce) as enforce:
+            results = [policy.check(self.context, 'get_example', target)
+                       for target in self.targets]
+        self.assertEqual([bool(i % 2) for i in range(10)], results)
+        self.assertEqual(2, enforce.call_count)
+
+    def test_check_credentials_serialized_once(self):
+        with mock.patch.object(self.context, 'to_dict',
+                               wraps=self.context.to_dict) as to_dict:
+            for target in self.targets:
+                policy.check(self.context, 'get_example', target)
+        self.assertEqual(1, to_dict.call_count)
+
+    def test_check_http_not_cached(self):
+        with mock.patch.object(policy._ENFORCER, 'enforce',
+                               return_value=True) as enforce:
+            for target in self.targets:
+                policy.check(self.context, 'get_remote', target)
+        self.assertEqual(10, enforce.call_count)
+
+    def test_check_decisions_not_shared_between_contexts(self):
+        policy.check(self.context, 'get_example', self.targets[0])
+        other = context.Context('other', 'other', roles=['member'])
+        self.assertTrue(policy.check(other, 'get_example', self.targets[0]))
+
+
 class DefaultPolicyTestCase(base.BaseTestCase):
 
     def setUp(self):
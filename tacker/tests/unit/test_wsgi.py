@@ -17,11 +17,13 @@ import os
 import socket
 import urllib2
 
+import eventlet
 import mock
 from oslo_config import cfg
 import testtools
 import webob
 import webob.exc
+import webtest
 
 from tacker.api.v1 import attributes
 from tacker.common import constants
@@ -602,6 +604,24 @@ class JSONDictSerializerTest(base.BaseTestCase):
 
         self.assertEqual(expected_json, result)
 
+    def test_json_iter(self):
+        input_dict = {'servers': [{'id': i, 'name': u'\u7f51'}
+                                  for i in range(10)],
+                      'servers_links': [{'rel': 'next'}]}
+        serializer = wsgi.JSONDictSerializer()
+        serializer.STREAM_CHUNK_SIZE = 64
+        chunks = list(serializer.serialize_iter(input_dict))
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(serializer.serialize(input_dict).encode('utf-8'),
+                         b''.join(chunks))
+
+    def test_json_iter_generator(self):
+        input_dict = {'servers': (server for server in [{'id': 1}])}
+        serializer = wsgi.JSONDictSerializer()
+        result = b''.join(serializer.serialize_iter(input_dict))
+
+        self.assertEqual(b'{"servers": [{"id": 1}]}', result)
+
 
 class TextDeserializerTest(base.BaseTestCase):
 
@@ -849,6 +869,76 @@ class MiddlewareTest(base.BaseTestCase):
         self.assertEqual('Success', result)
 
 
+class AdmissionControlTest(base.BaseTestCase):
+
+    def setUp(self):
+        super(AdmissionControlTest, self).setUp()
+        self.done = eventlet.event.Event()
+
+        def application(environ, start_response):
+            self.done.wait()
+            start_response('200 OK', [])
+            return [b'Success']
+
+        self.admission = wsgi.AdmissionControl(application, 2, 1, 0.1, 7)
+        self.app = webtest.TestApp(self.admission)
+        self.results = []
+
+    def _get(self, count):
+        return [eventlet.spawn(lambda: self.results.append(
+            self.app.get('/', expect_errors=True)))
+            for _i in range(count)]
+
+    def test_sheds_load_beyond_queue(self):
+        threads = self._get(4)
+        eventlet.sleep(0.01)
+        self.assertEqual(2, self.admission.stats()['in_flight'])
+        self.assertEqual(1, self.admission.stats()['queued'])
+        self.assertEqual(1, len(self.results))
+        self.assertEqual(503, self.results[0].status_int)
+        self.assertEqual('7', self.results[0].headers['Retry-After'])
+        self.done.send()
+        for thread in threads:
+            thread.wait()
+        self.assertEqual([200, 200, 200, 503],
+                         sorted(res.status_int for res in self.results))
+        stats = self.admission.stats()
+        self.assertEqual((0, 0, 3, 1), (stats['in_flight'], stats['queued'],
+                                        stats['admitted'], stats['rejected']))
+
+    def test_queued_request_times_out(self):
+        threads = self._get(3)
+        eventlet.sleep(0.3)
+        self.assertEqual([503], [res.status_int for res in self.results])
+        self.done.send()
+        for thread in threads:
+            thread.wait()
+        self.assertEqual(2, self.admission.stats()['admitted'])
+
+    def test_report_stats(self):
+        with mock.patch.object(wsgi, 'LOG') as mock_log:
+            reported = self.admission._report_stats(None)
+            self.assertEqual(1, mock_log.info.call_count)
+            reported = self.admission._report_stats(reported)
+            self.assertEqual(1, mock_log.info.call_count)
+            threads = self._get(1)
+            eventlet.sleep(0.01)
+            self.admission._report_stats(reported)
+            self.assertEqual(2, mock_log.info.call_count)
+            self.assertEqual(1, mock_log.info.call_args[0][1]['in_flight'])
+        self.done.send()
+        for thread in threads:
+            thread.wait()
+
+    def test_concurrency_from_db_pool(self):
+        self.config(max_pool_size=5, max_overflow=3, group='database')
+        self.assertEqual(8, wsgi._max_concurrent_requests())
+        self.config(api_max_concurrent_requests=20)
+        self.assertEqual(20, wsgi._max_concurrent_requests())
+        self.config(api_max_concurrent_requests=-1)
+        self.assertIsNone(wsgi._max_concurrent_requests())
+
+
 class FaultTest(base.BaseTestCase):
     def test_call_fault(self):
         class MyException(object):
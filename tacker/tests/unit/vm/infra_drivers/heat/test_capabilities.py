@@ -0,0 +1,99 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+import mock
+
+from tacker.tests.unit import base
+from tacker.vnfm.infra_drivers.heat import capabilities
+
+
+AUTH_ATTR = {'auth_url': 'http://localhost:5000', 'password': 'secret'}
+UNSUPPORTED = {'OS::Neutron::Port': {'port_security_enabled': 'value_specs'}}
+
+
+class TestCapabilityCache(base.TestCase):
+
+    def setUp(self):
+        super(TestCapabilityCache, self).setUp()
+        self.cache = capabilities.CapabilityCache()
+
+    def test_find_unsupported_resource_prop(self):
+        self.assertEqual(UNSUPPORTED,
+                         capabilities.find_unsupported_resource_prop(
+                             lambda res, prop: False))
+        self.assertEqual({}, capabilities.find_unsupported_resource_prop(
+            lambda res, prop: True))
+
+    def test_get_discovers_once(self):
+        discover = mock.Mock(return_value=UNSUPPORTED)
+        self.assertEqual(UNSUPPORTED,
+                         self.cache.get(AUTH_ATTR, 'RegionOne', discover))
+        self.assertEqual(UNSUPPORTED,
+                         self.cache.get(AUTH_ATTR, 'RegionOne', discover))
+        self.assertEqual(1, discover.call_count)
+
+    def test_get_per_region(self):
+        discover = mock.Mock(return_value={})
+        self.cache.get(AUTH_ATTR, 'RegionOne', discover)
+        self.cache.get(AUTH_ATTR, 'RegionTwo', discover)
+        self.assertEqual(2, discover.call_count)
+
+    def test_get_stale_refreshes_in_background(self):
+        self.config_fixture.config(group='tacker_heat',
+                                   capability_cache_ttl=0)
+        self.cache.get(AUTH_ATTR, None, mock.Mock(return_value=UNSUPPORTED))
+
+        refreshed = threading.Event()
+
+        def discover():
+            refreshed.set()
+            return {}
+
+        # the stale value is served while the refresh runs
+        self.assertEqual(UNSUPPORTED, self.cache.get(AUTH_ATTR, None,
+                                                     discover))
+        self.assertTrue(refreshed.wait(5))
+        for _i in range(50):
+            if self.cache.get(AUTH_ATTR, None, discover) == {}:
+                break
+            time.sleep(0.1)
+        self.assertEqual({}, self.cache.get(AUTH_ATTR, None, discover))
+
+    def test_refresh(self):
+        done = threading.Event()
+
+        def discover():
+            done.set()
+            return UNSUPPORTED
+
+        self.cache.refresh(AUTH_ATTR, ['RegionOne'], discover)
+        self.assertTrue(done.wait(5))
+        for _i in range(50):
+            if ('http://localhost:5000', 'RegionOne') in self.cache._entries:
+                break
+            time.sleep(0.1)
+        not_called = mock.Mock()
+        self.assertEqual(UNSUPPORTED,
+                         self.cache.get(AUTH_ATTR, 'RegionOne', not_called))
+        self.assertFalse(not_called.called)
+
+    def test_invalidate(self):
+        discover = mock.Mock(return_value={})
+        self.cache.get(AUTH_ATTR, None, discover)
+        self.cache.get({'auth_url': 'http://other:5000'}, None, discover)
+        self.cache.invalidate('http://localhost:5000')
+        self.cache.get(AUTH_ATTR, None, discover)
+        self.cache.get({'auth_url': 'http://other:5000'}, None, discover)
+        self.assertEqual(3, discover.call_count)
@@ -20,9 +20,12 @@ import os
 import yaml
 
 from tacker import context
+from tacker.extensions import vnfm
 from tacker.tests.unit import base
 from tacker.tests.unit.db import utils
+from tacker.vnfm.infra_drivers.heat import capabilities
 from tacker.vnfm.infra_drivers.heat import heat
+from tacker.vnfm.infra_drivers.heat import translation_cache
 
 
 class FakeHeatClient(mock.Mock):
@@ -59,6 +62,8 @@ class TestDeviceHeat(base.TestCase):
         self.heat_driver = heat.DeviceHeat()
         self._mock_heat_client()
         self.addCleanup(mock.patch.stopall)
+        self.addCleanup(translation_cache.TRANSLATION_CACHE.clear)
+        self.addCleanup(capabilities.CAPABILITY_CACHE.invalidate)
 
     def _mock_heat_client(self):
         self.heat_client = mock.Mock(wraps=FakeHeatClient())
@@ -207,7 +212,43 @@ class TestDeviceHeat(base.TestCase):
         dtemplate = self._get_vnfd(tosca_tpl)
         exp_tmpl = self._get_expected_vnfd(tosca_tpl)
         self.heat_driver.create_vnfd_pre(None, None, dtemplate)
+        attributes = dtemplate['vnfd']['attributes']
+        self.assertEqual('true', attributes.pop('validated'))
+        translation = json.loads(attributes.pop('vnfd_translation'))
         self.assertEqual(exp_tmpl, dtemplate)
+        self.assertEqual({}, translation['inputs'])
+        self.assertEqual(
+            yaml.safe_load(_get_template('hot_tosca_openwrt.yaml')),
+            yaml.safe_load(translation['template']))
+
+    def test_create_vnfd_pre_tosca_params(self):
+        tosca_tpl = _get_template('tosca_generic_vnfd_params.yaml')
+        dtemplate = self._get_vnfd(tosca_tpl)
+        self.heat_driver.create_vnfd_pre(None, None, dtemplate)
+        translation = json.loads(
+            dtemplate['vnfd']['attributes']['vnfd_translation'])
+        self.assertEqual({'flavor', 'image'}, set(translation['inputs']))
+
+    @mock.patch('tacker.vnfm.infra_drivers.heat.vnfd_translation.'
+                'get_substitutable_inputs', return_value=None)
+    def test_create_vnfd_pre_tosca_input_values_needed(self, mock_inputs):
+        tosca_tpl = _get_template('tosca_generic_vnfd_params.yaml')
+        dtemplate = self._get_vnfd(tosca_tpl)
+        with mock.patch.object(self.heat_driver,
+                               '_translate_tosca') as mock_translate:
+            self.heat_driver.create_vnfd_pre(None, None, dtemplate)
+        self.assertFalse(mock_translate.called)
+        self.assertNotIn('vnfd_translation', dtemplate['vnfd']['attributes'])
+
+    def test_create_vnfd_pre_tosca_translation_failed(self):
+        tosca_tpl = _get_template('tosca_generic_vnfd_params.yaml')
+        dtemplate = self._get_vnfd(tosca_tpl)
+        with mock.patch.object(self.heat_driver, '_translate_tosca',
+                               side_effect=vnfm.HeatTranslatorFailed(
+                                   error_msg_details='')):
+            self.heat_driver.create_vnfd_pre(None, None, dtemplate)
+        self.assertNotIn('vnfd_translation', dtemplate['vnfd']['attributes'])
+        self.assertNotIn('validated', dtemplate['vnfd']['attributes'])
 
     def _get_expected_fields_tosca(self, template):
         return {'stack_name':
@@ -268,7 +309,8 @@ class TestDeviceHeat(base.TestCase):
                                                hot_tpl_name,
                                                input_params='',
                                                files=None,
-                                               is_monitor=True):
+                                               is_monitor=True,
+                                               pretranslate=False):
         vnf = self._get_dummy_tosca_vnf(tosca_tpl_name, input_params)
         expected_result = '4a4c2d44-8a52-4895-9a75-9d1c76c3e738'
         expected_fields = self._get_expected_fields_tosca(hot_tpl_name)
@@ -276,6 +318,9 @@ class TestDeviceHeat(base.TestCase):
                                                     hot_tpl_name,
                                                     input_params,
                                                     is_monitor)
+        if pretranslate:
+            self.heat_driver.create_vnfd_pre(None, None, vnf)
+            expected_vnf['vnfd'] = vnf['vnfd']
         result = self.heat_driver.create(plugin=None, context=self.context,
                                          vnf=vnf,
                                          auth_attr=utils.get_vim_auth_obj())
@@ -317,6 +362,24 @@ class TestDeviceHeat(base.TestCase):
         self._test_assert_equal_for_tosca_templates('test_tosca_openwrt.yaml',
             'hot_tosca_openwrt.yaml')
 
+    @mock.patch('tacker.vnfm.infra_drivers.heat.heat.ToscaTemplate',
+                wraps=heat.ToscaTemplate)
+    def test_create_tosca_uses_translation_cache(self, mock_tosca):
+        self._test_assert_equal_for_tosca_templates('test_tosca_openwrt.yaml',
+            'hot_tosca_openwrt.yaml')
+        self.heat_client.create.reset_mock()
+        self._test_assert_equal_for_tosca_templates('test_tosca_openwrt.yaml',
+            'hot_tosca_openwrt.yaml')
+        self.assertEqual(1, mock_tosca.call_count)
+
+    @mock.patch('tacker.vnfm.infra_drivers.heat.heat.ToscaTemplate',
+                wraps=heat.ToscaTemplate)
+    def test_create_tosca_pretranslated(self, mock_tosca):
+        self._test_assert_equal_for_tosca_templates('test_tosca_openwrt.yaml',
+            'hot_tosca_openwrt.yaml', pretranslate=True)
+        # only parsed when the VNFD was created
+        self.assertEqual(1, mock_tosca.call_count)
+
     def test_create_tosca_with_userdata(self):
         self._test_assert_equal_for_tosca_templates(
             'test_tosca_openwrt_userdata.yaml',
@@ -401,6 +464,18 @@ class TestDeviceHeat(base.TestCase):
             input_params
         )
 
+    @mock.patch('tacker.vnfm.infra_drivers.heat.heat.ToscaTemplate',
+                wraps=heat.ToscaTemplate)
+    def test_tosca_params_pretranslated(self, mock_tosca):
+        input_params = 'image: cirros\nflavor: m1.large'
+        self._test_assert_equal_for_tosca_templates(
+            'tosca_generic_vnfd_params.yaml',
+            'hot_tosca_generic_vnfd_params.yaml',
+            input_params,
+            pretranslate=True
+        )
+        self.assertEqual(1, mock_tosca.call_count)
+
     def test_create_tosca_scale(self):
         self._test_assert_equal_for_tosca_templates(
             'tosca_scale.yaml',
@@ -408,3 +483,15 @@ class TestDeviceHeat(base.TestCase):
             files={'scaling.yaml': 'hot_scale_custom.yaml'},
             is_monitor=False
         )
+
+    @mock.patch('tacker.vnfm.infra_drivers.heat.heat.ToscaTemplate',
+                wraps=heat.ToscaTemplate)
+    def test_create_tosca_scale_pretranslated(self, mock_tosca):
+        self._test_assert_equal_for_tosca_templates(
+            'tosca_scale.yaml',
+            'hot_scale_main.yaml',
+            files={'scaling.yaml': 'hot_scale_custom.yaml'},
+            is_monitor=False,
+            pretranslate=True
+        )
+        self.assertEqual(1, mock_tosca.call_count)
@@ -0,0 +1,86 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+
+from tacker.tests.unit import base
+from tacker.vnfm.infra_drivers.heat import stack_waiter
+
+
+class FakeStack(object):
+    def __init__(self, stack_id, status, reason=''):
+        self.id = stack_id
+        self.stack_status = status
+        self.stack_status_reason = reason
+
+
+class TestStackWaiter(base.TestCase):
+
+    def setUp(self):
+        super(TestStackWaiter, self).setUp()
+        self.config_fixture.config(group='tacker_heat',
+                                   stack_poll_min_interval=0.01,
+                                   stack_poll_max_interval=0.01)
+        self.waiter = stack_waiter.StackWaiter()
+        self.heat_client = mock.Mock()
+        self.stacks = {}
+        self.heat_client.list_stacks.side_effect = lambda ids: [
+            self.stacks[stack_id] for stack_id in ids
+            if stack_id in self.stacks]
+
+    def _wait_in_thread(self, stack_id, status, results):
+        def _wait():
+            results[stack_id] = self.waiter.wait(self.heat_client, stack_id,
+                                                 status, 5)
+        thread = threading.Thread(target=_wait)
+        thread.start()
+        return thread
+
+    def test_wait_resolves_on_terminal_status(self):
+        self.stacks['s1'] = FakeStack('s1', 'CREATE_COMPLETE')
+        self.assertEqual(('CREATE_COMPLETE', ''),
+                         self.waiter.wait(self.heat_client, 's1',
+                                          'CREATE_IN_PROGRESS', 5))
+        self.assertEqual({}, self.waiter._groups)
+
+    def test_wait_for_deleted_stack(self):
+        self.assertEqual((None, None),
+                         self.waiter.wait(self.heat_client, 's1',
+                                          'DELETE_IN_PROGRESS', 5))
+
+    def test_stacks_polled_in_one_request(self):
+        self.stacks['s1'] = FakeStack('s1', 'CREATE_IN_PROGRESS')
+        self.stacks['s2'] = FakeStack('s2', 'CREATE_IN_PROGRESS')
+        results = {}
+        threads = [self._wait_in_thread(stack_id, 'CREATE_IN_PROGRESS',
+                                        results)
+                   for stack_id in ('s1', 's2')]
+        while not any(len(call[0][0]) == 2 for call in
+                      self.heat_client.list_stacks.call_args_list):
+            threading.Event().wait(0.01)
+        self.stacks['s1'] = FakeStack('s1', 'CREATE_COMPLETE')
+        self.stacks['s2'] = FakeStack('s2', 'CREATE_FAILED', 'quota')
+        for thread in threads:
+            thread.join()
+        self.assertEqual({'s1': ('CREATE_COMPLETE', ''),
+                          's2': ('CREATE_FAILED', 'quota')}, results)
+        self.assertIn(['s1', 's2'],
+                      [sorted(call[0][0]) for call in
+                       self.heat_client.list_stacks.call_args_list])
+
+    def test_wait_timeout(self):
+        self.stacks['s1'] = FakeStack('s1', 'CREATE_IN_PROGRESS')
+        self.assertIsNone(self.waiter.wait(self.heat_client, 's1',
+                                           'CREATE_IN_PROGRESS', 0.05))
+        self.assertEqual({}, self.waiter._groups)
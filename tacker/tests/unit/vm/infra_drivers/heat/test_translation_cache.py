@@ -0,0 +1,70 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import shutil
+import tempfile
+
+from tacker.tests.unit import base
+from tacker.vnfm.infra_drivers.heat import translation_cache
+
+
+TRANSLATION = {'template': 'heat_template_version: 2013-05-23\n',
+               'files': None,
+               'scaling_group_names': None,
+               'monitoring_policy': '{"vdus": {}}'}
+
+
+class TestTranslationCache(base.TestCase):
+
+    def setUp(self):
+        super(TestTranslationCache, self).setUp()
+        self.cache = translation_cache.TranslationCache()
+
+    def test_make_key(self):
+        key = translation_cache.make_key('vnfd', 'image: cirros', {})
+        self.assertEqual(key, translation_cache.make_key(
+            'vnfd', 'image: cirros', {}))
+        self.assertNotEqual(key, translation_cache.make_key(
+            'vnfd', 'image: fedora', {}))
+        self.assertNotEqual(key, translation_cache.make_key(
+            'vnfd', 'image: cirros',
+            {'OS::Neutron::Port': {'port_security_enabled': 'value_specs'}}))
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.put('key', TRANSLATION)
+        self.assertEqual(TRANSLATION, self.cache.get('key'))
+
+    def test_lru_eviction(self):
+        self.config_fixture.config(group='tacker_heat',
+                                   translation_cache_size=2)
+        self.cache.put('k1', TRANSLATION)
+        self.cache.put('k2', TRANSLATION)
+        self.cache.get('k1')
+        self.cache.put('k3', TRANSLATION)
+        self.assertIsNotNone(self.cache.get('k1'))
+        self.assertIsNone(self.cache.get('k2'))
+
+    def test_disabled(self):
+        self.config_fixture.config(group='tacker_heat',
+                                   translation_cache_size=0)
+        self.cache.put('key', TRANSLATION)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_disk_tier(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.config_fixture.config(group='tacker_heat',
+                                   translation_cache_dir=cache_dir)
+        self.cache.put('key', TRANSLATION)
+        other_cache = translation_cache.TranslationCache()
+        self.assertEqual(TRANSLATION, other_cache.get('key'))
@@ -0,0 +1,140 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import mock
+import yaml
+
+from tacker.extensions import vnfm
+from tacker.tests.unit import base
+from tacker.vnfm.infra_drivers.heat import vnfd_translation
+from tacker.vnfm.tosca import utils as toscautils
+
+
+INPUTS = {'flavor': {'type': 'string',
+                     'constraints': [{'valid_values': ['m1.tiny',
+                                                       'm1.large']}],
+                     'default': 'm1.tiny'},
+          'image': {'type': 'string', 'default': 'OpenWRT'}}
+
+HOT = {'heat_template_version': '2013-05-23',
+       'parameters': {'flavor': {'type': 'string', 'default': 'm1.tiny'},
+                      'image': {'type': 'string', 'default': 'OpenWRT'}},
+       'resources': {
+           'VDU1': {'type': 'OS::Nova::Server',
+                    'properties': {'flavor': {'get_param': 'flavor'},
+                                   'image': {'get_param': 'image'}}},
+           'CP1': {'type': 'OS::Neutron::Port',
+                   'properties': {'port_security_enabled': False}}}}
+
+
+def _node(node_type, entity_tpl):
+    nt = mock.Mock(entity_tpl=entity_tpl)
+    nt.type_definition.is_derived_from.side_effect = (
+        lambda parent: parent == node_type)
+    return nt
+
+
+class TestVnfdTranslation(base.TestCase):
+
+    def _get_substitutable_inputs(self, *nodes, **sections):
+        vnfd_dict = {'topology_template': dict(sections, inputs=INPUTS)}
+        return vnfd_translation.get_substitutable_inputs(
+            mock.Mock(nodetemplates=list(nodes)), vnfd_dict)
+
+    def test_substitutable_inputs(self):
+        vdu = _node(toscautils.TACKERVDU,
+                    {'properties': {'image': {'get_input': 'image'},
+                                    'flavor': {'get_input': 'flavor'}}})
+        self.assertEqual(INPUTS, self._get_substitutable_inputs(vdu))
+
+    def test_input_in_tacker_property(self):
+        vdu = _node(toscautils.TACKERVDU,
+                    {'properties': {'monitoring_policy': {
+                        'name': {'get_input': 'image'}}}})
+        self.assertIsNone(self._get_substitutable_inputs(vdu))
+
+    def test_input_in_cp_property(self):
+        cp = _node(toscautils.TACKERCP,
+                   {'properties': {'type': {'get_input': 'image'}}})
+        self.assertIsNone(self._get_substitutable_inputs(cp))
+
+    def test_input_in_capability(self):
+        vdu = _node(toscautils.TACKERVDU,
+                    {'capabilities': {'nfv_compute': {'properties': {
+                        'mem_size': {'get_input': 'flavor'}}}}})
+        self.assertIsNone(self._get_substitutable_inputs(vdu))
+
+    def test_input_in_policy(self):
+        policies = [{'SP1': {'type': 'tosca.policy.tacker.Scaling',
+                             'properties': {
+                                 'increment': {'get_input': 'image'}}}}]
+        self.assertIsNone(self._get_substitutable_inputs(policies=policies))
+
+    def _translation(self, files=None):
+        translated = {'template': yaml.safe_dump(HOT),
+                      'files': None,
+                      'scaling_group_names': None,
+                      'monitoring_policy': None}
+        if files:
+            translated['template'] = 'heat_template_version: 2013-05-23\n'
+            translated['files'] = {'scaling.yaml': yaml.safe_dump(HOT)}
+        return vnfd_translation.make_translation(translated, INPUTS)
+
+    def test_instantiate(self):
+        translated = vnfd_translation.instantiate(
+            self._translation(), {'flavor': 'm1.large', 'image': 'cirros'})
+        parameters = yaml.safe_load(translated['template'])['parameters']
+        self.assertEqual('m1.large', parameters['flavor']['default'])
+        self.assertEqual('cirros', parameters['image']['default'])
+        self.assertNotIn('inputs', translated)
+
+    def test_instantiate_without_parameters(self):
+        translated = vnfd_translation.instantiate(self._translation(), {})
+        self.assertEqual(HOT, yaml.safe_load(translated['template']))
+
+    def test_instantiate_scaling(self):
+        translated = vnfd_translation.instantiate(
+            self._translation(files=True), {'image': 'cirros'})
+        self.assertEqual('heat_template_version: 2013-05-23\n',
+                         translated['template'])
+        nested = yaml.safe_load(translated['files']['scaling.yaml'])
+        self.assertEqual('cirros', nested['parameters']['image']['default'])
+
+    def test_instantiate_unsupported_res_prop(self):
+        translated = vnfd_translation.instantiate(
+            self._translation(), {},
+            {'OS::Neutron::Port': {'port_security_enabled': 'value_specs'}})
+        port = yaml.safe_load(translated['template'])['resources']['CP1']
+        self.assertEqual({'value_specs': {'port_security_enabled': False}},
+                         port['properties'])
+
+    def test_instantiate_unknown_parameter(self):
+        self.assertIsNone(vnfd_translation.instantiate(
+            self._translation(), {'key_name': 'mykey'}))
+
+    def test_instantiate_invalid_value(self):
+        self.assertRaises(vnfm.HeatTranslatorFailed,
+                          vnfd_translation.instantiate,
+                          self._translation(), {'flavor': 'm1.huge'})
+
+    def test_instantiate_missing_input(self):
+        translation = json.loads(self._translation())
+        del translation['inputs']['image']['default']
+        self.assertRaises(vnfm.InputValuesMissing,
+                          vnfd_translation.instantiate,
+                          json.dumps(translation), {'flavor': 'm1.large'})
+
+    def test_make_translation(self):
+        translation = json.loads(self._translation())
+        self.assertEqual(INPUTS, translation['inputs'])
@@ -12,8 +12,11 @@
 #    under the License.
 #
 
+import socket
+
+import eventlet
 import mock
-import six.moves.urllib.error as urlerr
+from oslo_config import cfg
 import testtools
 
 from tacker.vnfm.monitor_drivers.http_ping import http_ping
@@ -25,19 +28,70 @@ class TestVNFMonitorHTTPPing(testtools.TestCase):
         super(TestVNFMonitorHTTPPing, self).setUp()
         self.monitor_http_ping = http_ping.VNFMonitorHTTPPing()
 
-    @mock.patch('six.moves.urllib.request.urlopen')
-    def test_monitor_call_for_success(self, mock_urlopen):
+    def _mock_response(self, mock_conn_cls, status=200, will_close=False):
+        response = mock_conn_cls.return_value.getresponse.return_value
+        response.status = status
+        response.will_close = will_close
+        return response
+
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_for_success(self, mock_conn_cls):
+        self._mock_response(mock_conn_cls)
         test_device = {}
         test_kwargs = {
             'mgmt_ip': 'a.b.c.d'
         }
-        self.monitor_http_ping.monitor_call(test_device,
-                                            test_kwargs)
-        mock_urlopen.assert_called_once_with('http://a.b.c.d:80', timeout=5)
+        self.assertTrue(self.monitor_http_ping.monitor_call(test_device,
+                                                            test_kwargs))
+        mock_conn_cls.assert_called_once_with('a.b.c.d', 80, timeout=5.0)
+        mock_conn_cls.return_value.request.assert_called_once_with(
+            'GET', '/', headers={'Connection': 'keep-alive'})
+
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_reuses_connection(self, mock_conn_cls):
+        self._mock_response(mock_conn_cls)
+        test_kwargs = {
+            'mgmt_ip': 'a.b.c.d',
+            'method': 'HEAD'
+        }
+        self.monitor_http_ping.monitor_call({}, test_kwargs)
+        self.monitor_http_ping.monitor_call({}, test_kwargs)
+        self.assertEqual(1, mock_conn_cls.call_count)
+        self.assertEqual(2, mock_conn_cls.return_value.request.call_count)
+        mock_conn_cls.return_value.request.assert_called_with(
+            'HEAD', '/', headers={'Connection': 'keep-alive'})
 
-    @mock.patch('six.moves.urllib.request.urlopen')
-    def test_monitor_call_for_failure(self, mock_urlopen):
-        mock_urlopen.side_effect = urlerr.URLError("MOCK Error")
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_stale_connection(self, mock_conn_cls):
+        stale = mock.Mock()
+        stale.getresponse.side_effect = http_ping.http_client.BadStatusLine(
+            '')
+        self.monitor_http_ping._pool.put('a.b.c.d', 80, stale)
+        self._mock_response(mock_conn_cls)
+        test_kwargs = {
+            'mgmt_ip': 'a.b.c.d',
+            'retry': 1
+        }
+        self.assertTrue(self.monitor_http_ping.monitor_call({}, test_kwargs))
+        stale.close.assert_called_once_with()
+        mock_conn_cls.assert_called_once_with('a.b.c.d', 80, timeout=5.0)
+
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_idle_timeout(self, mock_conn_cls):
+        idle = mock.Mock()
+        idle.getresponse.side_effect = socket.timeout()
+        self.monitor_http_ping._pool.put('a.b.c.d', 80, idle)
+        test_kwargs = {
+            'mgmt_ip': 'a.b.c.d',
+            'retry': 1
+        }
+        self.assertEqual('failure', self.monitor_http_ping.monitor_call(
+            {}, test_kwargs))
+        self.assertFalse(mock_conn_cls.called)
+
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_for_failure(self, mock_conn_cls):
+        mock_conn_cls.return_value.request.side_effect = socket.error()
         test_device = {}
         test_kwargs = {
             'mgmt_ip': 'a.b.c.d'
@@ -45,6 +99,54 @@ class TestVNFMonitorHTTPPing(testtools.TestCase):
         monitor_return = self.monitor_http_ping.monitor_call(test_device,
                                                              test_kwargs)
         self.assertEqual('failure', monitor_return)
+        self.assertEqual(5, mock_conn_cls.return_value.close.call_count)
+
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_failure_threshold(self, mock_conn_cls):
+        self._mock_response(mock_conn_cls, status=503)
+        test_kwargs = {
+            'mgmt_ip': 'a.b.c.d',
+            'retry': 1,
+            'failure_threshold': 2
+        }
+        self.assertIsNone(self.monitor_http_ping.monitor_call(
+            {'id': 'vnf'}, test_kwargs))
+        self.assertEqual('failure', self.monitor_http_ping.monitor_call(
+            {'id': 'vnf'}, test_kwargs))
+        self.monitor_http_ping.monitor_delete({'id': 'vnf'})
+        self.assertEqual({}, self.monitor_http_ping._failures)
+
+    @mock.patch('six.moves.http_client.HTTPConnection')
+    def test_monitor_call_batch(self, mock_conn_cls):
+        self._mock_response(mock_conn_cls)
+        probes = [({}, {'mgmt_ip': 'a.b.c.d'}),
+                  ({}, {'mgmt_ip': ''})]
+        self.assertEqual([True, None],
+                         self.monitor_http_ping.monitor_call_batch(probes))
+
+    def test_monitor_call_batch_concurrency(self):
+        cfg.CONF.set_override('batch_concurrency', 2, 'monitor_http_ping')
+        self.addCleanup(cfg.CONF.clear_override, 'batch_concurrency',
+                        'monitor_http_ping')
+        monitor_http_ping = http_ping.VNFMonitorHTTPPing()
+        running = []
+        peak = []
+
+        def _check(vnf, kwargs):
+            running.append(vnf)
+            peak.append(len(running))
+            eventlet.sleep(0.01)
+            running.remove(vnf)
+            return True
+        probes = [({}, {'mgmt_ip': 'a.b.c.d'})] * 5
+        with mock.patch.object(monitor_http_ping, '_check',
+                               side_effect=_check):
+            pool = eventlet.GreenPool()
+            for _i in range(3):
+                pool.spawn(monitor_http_ping.monitor_call_batch, probes)
+            pool.waitall()
+        self.assertEqual(15, len(peak))
+        self.assertEqual(2, max(peak))
 
     def test_monitor_url(self):
         test_device = {
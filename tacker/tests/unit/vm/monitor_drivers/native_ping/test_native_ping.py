@@ -0,0 +1,54 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import mock
+import testtools
+
+from tacker.vnfm.monitor_drivers.native_ping import native_ping
+
+
+class TestVNFMonitorNativePing(testtools.TestCase):
+
+    def setUp(self):
+        super(TestVNFMonitorNativePing, self).setUp()
+        self.monitor_ping = native_ping.VNFMonitorNativePing()
+
+    @mock.patch('tacker.common.icmp.get_prober')
+    def test_monitor_call_for_success(self, mock_get_prober):
+        mock_get_prober.return_value.is_reachable.return_value = True
+        test_kwargs = {
+            'mgmt_ip': 'a.b.c.d',
+            'count': 3
+        }
+        self.assertTrue(self.monitor_ping.monitor_call({}, test_kwargs))
+        mock_get_prober.return_value.is_reachable.assert_called_once_with(
+            'a.b.c.d', count=3, timeout=1, interval=1)
+
+    @mock.patch('tacker.common.icmp.get_prober')
+    def test_monitor_call_for_failure(self, mock_get_prober):
+        mock_get_prober.return_value.is_reachable.return_value = False
+        monitor_return = self.monitor_ping.monitor_call(
+            {}, {'mgmt_ip': 'a.b.c.d'})
+        self.assertEqual('failure', monitor_return)
+
+    @mock.patch('tacker.common.icmp.get_prober')
+    def test_monitor_call_batch(self, mock_get_prober):
+        mock_get_prober.return_value.ping.return_value = {
+            'a.b.c.d': True, 'e.f.g.h': False}
+        probes = [({}, {'mgmt_ip': 'a.b.c.d'}),
+                  ({}, {'mgmt_ip': ''}),
+                  ({}, {'mgmt_ip': 'e.f.g.h'})]
+        self.assertEqual([True, None, 'failure'],
+                         self.monitor_ping.monitor_call_batch(probes))
+        self.assertEqual(1, mock_get_prober.return_value.ping.call_count)
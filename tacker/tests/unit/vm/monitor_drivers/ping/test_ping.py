@@ -12,7 +12,11 @@
 #    under the License.
 #
 
+import time
+
+import eventlet
 import mock
+from oslo_config import cfg
 import testtools
 
 from tacker.vnfm.monitor_drivers.ping import ping
@@ -51,6 +55,42 @@ class TestVNFMonitorPing(testtools.TestCase):
                                                         test_kwargs)
         self.assertEqual('failure', monitor_return)
 
+    @mock.patch('tacker.agent.linux.utils.execute')
+    def test_monitor_call_batch(self, mock_utils_execute):
+        def _execute(cmd, check_exit_code):
+            eventlet.sleep(0.5)
+            if cmd[-1] == 'e.f.g.h':
+                raise RuntimeError()
+        mock_utils_execute.side_effect = _execute
+        probes = [({}, {'mgmt_ip': 'a.b.c.d'}),
+                  ({}, {'mgmt_ip': 'e.f.g.h'})] * 5
+        start = time.time()
+        self.assertEqual([True, 'failure'] * 5,
+                         self.monitor_ping.monitor_call_batch(probes))
+        self.assertLess(time.time() - start, 2.5)
+
+    @mock.patch('tacker.agent.linux.utils.execute')
+    def test_monitor_call_batch_concurrency(self, mock_utils_execute):
+        cfg.CONF.set_override('driver_concurrency', 2, 'monitor')
+        self.addCleanup(cfg.CONF.clear_override, 'driver_concurrency',
+                        'monitor')
+        running = []
+        peak = []
+
+        def _execute(cmd, check_exit_code):
+            running.append(cmd)
+            peak.append(len(running))
+            eventlet.sleep(0.01)
+            running.remove(cmd)
+        mock_utils_execute.side_effect = _execute
+        probes = [({}, {'mgmt_ip': 'a.b.c.d'})] * 5
+        pool = eventlet.GreenPool()
+        for _i in range(3):
+            pool.spawn(self.monitor_ping.monitor_call_batch, probes)
+        pool.waitall()
+        self.assertEqual(15, mock_utils_execute.call_count)
+        self.assertEqual(2, max(peak))
+
     def test_monitor_url(self):
         test_device = {
             'monitor_url': 'a.b.c.d'
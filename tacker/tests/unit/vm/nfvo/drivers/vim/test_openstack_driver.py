@@ -164,3 +164,36 @@ class TestOpenstack_Driver(base.TestCase):
         self.assertRaises(nfvo.VimUserDomainNameMissingException,
                           self.openstack_driver.authenticate_vim,
                           vim_obj)
+
+    @mock.patch('tacker.common.icmp.get_prober')
+    def test_vim_status_native_prober(self, mock_get_prober):
+        self.config_fixture.config(group='vim_monitor', prober='native')
+        mock_get_prober.return_value.ping.return_value = {'localhost': True}
+        self.assertTrue(self.openstack_driver.vim_status(
+            'http://localhost:5000'))
+        self.assertEqual(['localhost'], list(
+            mock_get_prober.return_value.ping.call_args[0][0]))
+
+    @mock.patch('tacker.common.icmp.get_prober')
+    def test_vims_status(self, mock_get_prober):
+        mock_get_prober.return_value.ping.return_value = {
+            '10.0.0.1': True, '10.0.0.2': False}
+        status = self.openstack_driver.vims_status(
+            ['http://10.0.0.1:5000/v3', 'http://10.0.0.2/identity'])
+        self.assertEqual({'http://10.0.0.1:5000/v3': True,
+                          'http://10.0.0.2/identity': False}, status)
+
+    @mock.patch('tacker.common.clients.OpenstackClients')
+    @mock.patch('requests.get')
+    def test_vim_endpoints_status(self, mock_get, mock_clients):
+        mock_clients.return_value.keystone_session.get_endpoint.\
+            return_value = 'http://localhost:8004/v1/prj'
+        mock_get.return_value.status_code = 300
+        self.assertTrue(self.openstack_driver.vim_endpoints_status(
+            'http://localhost:5000', vim_auth={'password': 'secret'}))
+        self.assertEqual(['http://localhost:5000',
+                          'http://localhost:8004/v1/prj'],
+                         [c[0][0] for c in mock_get.call_args_list])
+        mock_get.return_value.status_code = 503
+        self.assertFalse(self.openstack_driver.vim_endpoints_status(
+            'http://localhost:5000'))
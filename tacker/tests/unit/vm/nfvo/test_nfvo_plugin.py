@@ -20,6 +20,7 @@ import mock
 from tacker import context
 from tacker.db.common_services import common_services_db
 from tacker.db.nfvo import nfvo_db
+from tacker.db.vm import vm_db
 from tacker.nfvo import nfvo_plugin
 from tacker.plugins.common import constants
 from tacker.tests.unit.db import base as db_base
@@ -114,6 +115,38 @@ class TestNfvoPlugin(db_base.SqlTestCase):
             res_state=mock.ANY, res_type=constants.RES_TYPE_VIM,
             tstamp=mock.ANY)
 
+    def test_get_vims_paginated(self):
+        self._insert_dummy_vim()
+        vims = self.nfvo_plugin.get_vims(self.context, sorts=[('id', True)],
+                                         limit=1)
+        self.assertEqual(['6261579e-d6f3-49ad-8bc3-a9cb974778ff'],
+                         [vim['id'] for vim in vims])
+        vims = self.nfvo_plugin.get_vims(
+            self.context, sorts=[('id', True)], limit=1,
+            marker='6261579e-d6f3-49ad-8bc3-a9cb974778ff')
+        self.assertEqual([], vims)
+
+    def test_get_vim(self):
+        self._insert_dummy_vim()
+        vim_id = '6261579e-d6f3-49ad-8bc3-a9cb974778ff'
+        self.assertEqual(vim_id,
+                         self.nfvo_plugin.get_vim(self.context, vim_id)['id'])
+        session = self.context.session
+        session.add(vm_db.VNFD(id='eb094833-995e-49f0-a047-dfb56aaf7c4e',
+                               tenant_id='ad7ebc56538745a08ef7c5e97f8bd437',
+                               name='fake_template',
+                               infra_driver='fake_driver',
+                               mgmt_driver='fake_mgmt_driver'))
+        session.add(vm_db.VNF(id=str(uuid.uuid4()),
+                              tenant_id='ad7ebc56538745a08ef7c5e97f8bd437',
+                              name='fake_device',
+                              vnfd_id='eb094833-995e-49f0-a047-dfb56aaf7c4e',
+                              vim_id=vim_id,
+                              status='ACTIVE'))
+        session.flush()
+        self.assertEqual(vim_id,
+                         self.nfvo_plugin.get_vim(self.context, vim_id)['id'])
+
     def test_update_vim(self):
         vim_dict = {'vim': {'id': '6261579e-d6f3-49ad-8bc3-a9cb974778ff',
                             'vim_project': {'name': 'new_project'},
@@ -139,3 +172,79 @@ class TestNfvoPlugin(db_base.SqlTestCase):
             self.context, evt_type=constants.RES_EVT_UPDATE, res_id=mock.ANY,
             res_state=mock.ANY, res_type=constants.RES_TYPE_VIM,
             tstamp=mock.ANY)
+
+    @mock.patch('tacker.nfvo.nfvo_plugin.capabilities.CAPABILITY_CACHE')
+    @mock.patch('tacker.nfvo.nfvo_plugin.vim_client.VimClient')
+    def test_monitor_vim_refreshes_capabilities(self, mock_vim_client,
+                                                mock_cache):
+        self._insert_dummy_vim()
+        vim_id = '6261579e-d6f3-49ad-8bc3-a9cb974778ff'
+        vim_obj = self.nfvo_plugin.get_vim(self.context, vim_id)
+        self.nfvo_plugin._created_vims[vim_id] = vim_obj
+        vim_auth = {'auth_url': 'http://localhost:5000'}
+        mock_vim_client.return_value.get_vim.return_value = {
+            'vim_auth': vim_auth}
+        self._driver_manager.invoke.return_value = True
+        self.nfvo_plugin.monitor_vim(vim_obj)
+        mock_cache.refresh.assert_called_once_with(vim_auth,
+                                                   [None, 'RegionOne'])
+
+        # no refresh while the vim stays reachable
+        self.nfvo_plugin.monitor_vim(self.nfvo_plugin._created_vims[vim_id])
+        self.assertEqual(1, mock_cache.refresh.call_count)
+
+    def test_schedule_vim_staggered(self):
+        now = 1000.0
+        for i in range(10):
+            self.nfvo_plugin._schedule_vim(str(uuid.uuid4()), now)
+        dues = sorted(due for due, _vim_id
+                      in self.nfvo_plugin._vim_schedule)
+        interval = self.nfvo_plugin._monitor_interval
+        self.assertTrue(all(now < due <= now + interval for due in dues))
+        self.assertTrue(len(set(dues)) > 1)
+
+    @mock.patch('tacker.nfvo.nfvo_plugin.capabilities.CAPABILITY_CACHE')
+    def test_check_vim_writes_transitions_in_batch(self, mock_cache):
+        self._insert_dummy_vim()
+        vim_id = '6261579e-d6f3-49ad-8bc3-a9cb974778ff'
+        vim_obj = self.nfvo_plugin.get_vim(self.context, vim_id)
+        self.nfvo_plugin._created_vims[vim_id] = vim_obj
+        self._driver_manager.invoke.return_value = False
+        self.nfvo_plugin._check_vim(dict(vim_obj))
+        self.nfvo_plugin._check_vim(dict(vim_obj))
+        self.assertEqual({vim_id: 'UNREACHABLE'},
+                         self.nfvo_plugin._vim_transitions)
+        # nothing is written until the transitions are flushed
+        self.assertEqual('Active',
+                         self.nfvo_plugin.get_vim(self.context,
+                                                  vim_id)['status'])
+        self.nfvo_plugin._flush_vim_transitions()
+        self.assertEqual({}, self.nfvo_plugin._vim_transitions)
+        self.assertEqual('UNREACHABLE',
+                         self.nfvo_plugin.get_vim(self.context,
+                                                  vim_id)['status'])
+        self._cos_db_plugin.create_event.assert_called_once_with(
+            mock.ANY, evt_type=constants.RES_EVT_UPDATE, res_id=vim_id,
+            res_state='UNREACHABLE', res_type=constants.RES_TYPE_VIM,
+            tstamp=mock.ANY)
+
+    @mock.patch('tacker.nfvo.nfvo_plugin.vim_client.VimClient')
+    def test_probe_vim_endpoints(self, mock_vim_client):
+        self.config_fixture.config(group='nfvo_vim', monitor_endpoints=True)
+        vim_auth = {'auth_url': 'http://localhost:5000'}
+        mock_vim_client.return_value.get_vim.return_value = {
+            'vim_auth': vim_auth}
+        self._driver_manager.invoke.side_effect = [True, False]
+        vim_obj = {'id': '6261579e-d6f3-49ad-8bc3-a9cb974778ff',
+                   'type': 'openstack', 'auth_url': 'http://localhost:5000'}
+        self.assertEqual('UNREACHABLE', self.nfvo_plugin._probe_vim(vim_obj))
+        self._driver_manager.invoke.assert_called_with(
+            'openstack', 'vim_endpoints_status',
+            auth_url='http://localhost:5000', vim_auth=vim_auth)
+
+    @mock.patch('tacker.nfvo.nfvo_plugin.capabilities.CAPABILITY_CACHE')
+    def test_delete_vim_invalidates_capabilities(self, mock_cache):
+        self._insert_dummy_vim()
+        self.nfvo_plugin.delete_vim(self.context,
+                                    '6261579e-d6f3-49ad-8bc3-a9cb974778ff')
+        mock_cache.invalidate.assert_called_once_with('http://localhost:5000')
@@ -0,0 +1,151 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import uuid
+
+import mock
+
+from tacker import context
+from tacker.db.vm import lifecycle_task_db
+from tacker.tests.unit.db import base as db_base
+from tacker.vnfm import lifecycle_tasks
+
+
+class FakePool(object):
+    def spawn_n(self, function, *args, **kwargs):
+        function(*args, **kwargs)
+
+
+class TestLifecycleTaskDb(db_base.SqlTestCase):
+
+    def setUp(self):
+        super(TestLifecycleTaskDb, self).setUp()
+        self.context = context.get_admin_context()
+        self.db = lifecycle_task_db.LifecycleTaskDb()
+
+    def _add_tasks(self, count, task_type=lifecycle_tasks.CREATE_WAIT):
+        return [self.db.add_task(self.context, task_type,
+                                 str(uuid.uuid4()), {}, {'vnf': {}})
+                for _i in range(count)]
+
+    def test_claim_tasks_once(self):
+        tasks = self._add_tasks(3)
+        self._add_tasks(1, lifecycle_tasks.DELETE_WAIT)
+        claimed = self.db.claim_tasks(self.context,
+                                      lifecycle_tasks.CREATE_WAIT,
+                                      'worker1', 2, 60)
+        self.assertEqual([task['id'] for task in tasks[:2]],
+                         [task['id'] for task in claimed])
+        self.assertEqual([1, 1], [task['attempts'] for task in claimed])
+        claimed = self.db.claim_tasks(self.context,
+                                      lifecycle_tasks.CREATE_WAIT,
+                                      'worker2', 5, 60)
+        self.assertEqual([tasks[2]['id']], [task['id'] for task in claimed])
+        self.assertEqual([], self.db.claim_tasks(
+            self.context, lifecycle_tasks.CREATE_WAIT, 'worker2', 5, 60))
+
+    def test_expired_lease_claimed_again(self):
+        task = self._add_tasks(1)[0]
+        self.db.claim_tasks(self.context, lifecycle_tasks.CREATE_WAIT,
+                            'worker1', 1, 60)
+        self.context.session.query(lifecycle_task_db.VnfLifecycleTask).update(
+            {'lease_expires_at': datetime.datetime(2016, 1, 1)})
+        claimed = self.db.claim_tasks(self.context,
+                                      lifecycle_tasks.CREATE_WAIT,
+                                      'worker2', 1, 60)
+        self.assertEqual([(task['id'], 'worker2', 2)],
+                         [(t['id'], t['owner'], t['attempts'])
+                          for t in claimed])
+        self.assertEqual(0, self.db.renew_leases(self.context, 'worker1',
+                                                 [task['id']], 60))
+        self.assertEqual(1, self.db.renew_leases(self.context, 'worker2',
+                                                 [task['id']], 60))
+
+    def test_release_task(self):
+        task = self._add_tasks(1)[0]
+        self.db.claim_tasks(self.context, lifecycle_tasks.CREATE_WAIT,
+                            'worker1', 1, 60)
+        self.db.release_task(self.context, task['id'], 'worker1')
+        claimed = self.db.claim_tasks(self.context,
+                                      lifecycle_tasks.CREATE_WAIT,
+                                      'worker2', 1, 60)
+        self.assertEqual([task['id']], [t['id'] for t in claimed])
+
+
+class TestDbTaskQueue(db_base.SqlTestCase):
+
+    def setUp(self):
+        super(TestDbTaskQueue, self).setUp()
+        self.context = context.get_admin_context()
+        self.config_fixture.config(group='vnf_lifecycle_tasks',
+                                   backend=lifecycle_tasks.DB,
+                                   run_in_api=False)
+        self.handler = mock.Mock()
+        self.get_vim = mock.Mock(return_value={'password': 'secret'})
+        self.abandon = mock.Mock()
+        self.queue = lifecycle_tasks.get_task_queue(
+            {lifecycle_tasks.SCALE_WAIT: self.handler,
+             lifecycle_tasks.CREATE_WAIT: self.handler},
+            mock.Mock(), self.get_vim, self.abandon)
+        self.queue.owner = 'worker1'
+        self.queue._pool = FakePool()
+        self.vnf = {'id': str(uuid.uuid4()),
+                    'created_at': datetime.datetime(2016, 9, 20, 8, 42)}
+
+    def _tasks(self):
+        return self.context.session.query(
+            lifecycle_task_db.VnfLifecycleTask).all()
+
+    def test_submit_and_run(self):
+        self.queue.submit(lifecycle_tasks.SCALE_WAIT, self.context,
+                          self.vnf, {'password': 'secret'},
+                          policy={'action': 'out'})
+        self.assertNotIn('secret', str(self._tasks()[0].payload))
+        self.queue._claim_tasks(60)
+        self.handler.assert_called_once_with(
+            mock.ANY, dict(self.vnf, created_at=mock.ANY),
+            {'password': 'secret'}, policy={'action': 'out'})
+        self.assertEqual([], self._tasks())
+        self.assertEqual({}, self.queue._running)
+
+    def test_concurrency_per_task_type(self):
+        self.config_fixture.config(group='vnf_lifecycle_tasks',
+                                   concurrency={'create_wait': '1'})
+        self.queue._pool = mock.Mock()
+        for _i in range(2):
+            self.queue.submit(lifecycle_tasks.CREATE_WAIT, self.context,
+                              self.vnf, {})
+        self.queue._claim_tasks(60)
+        self.queue._claim_tasks(60)
+        self.assertEqual(1, self.queue._pool.spawn_n.call_count)
+
+    def test_vim_lookup_failure_releases_task(self):
+        self.get_vim.side_effect = Exception('database unavailable')
+        self.queue.submit(lifecycle_tasks.CREATE_WAIT, self.context,
+                          self.vnf, {})
+        self.queue._claim_tasks(60)
+        self.assertFalse(self.handler.called)
+        self.assertIsNone(self._tasks()[0].owner)
+
+    def test_abandon_after_max_attempts(self):
+        self.config_fixture.config(group='vnf_lifecycle_tasks',
+                                   max_attempts=1)
+        self.queue.submit(lifecycle_tasks.CREATE_WAIT, self.context,
+                          self.vnf, {})
+        self.context.session.query(lifecycle_task_db.VnfLifecycleTask).update(
+            {'attempts': 1})
+        self.queue._claim_tasks(60)
+        self.assertFalse(self.handler.called)
+        self.abandon.assert_called_once_with(
+            mock.ANY, lifecycle_tasks.CREATE_WAIT, mock.ANY, mock.ANY)
+        self.assertEqual([], self._tasks())
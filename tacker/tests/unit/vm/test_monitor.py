@@ -13,6 +13,8 @@
 #
 
 import json
+import time
+import uuid
 
 import mock
 from oslo_utils import timeutils
@@ -107,3 +109,82 @@ class TestVNFMonitor(testtools.TestCase):
         self.mock_monitor_manager\
             .invoke.assert_called_once_with('ping', 'monitor_call', vnf={},
                                             kwargs=mock_kwargs)
+
+    @mock.patch('tacker.vnfm.monitor.VNFMonitor.__run__')
+    def test_add_hosting_vnf_schedules_probes(self, mock_monitor_run):
+        test_vnfmonitor = VNFMonitor(30)
+        test_vnfmonitor._schedule[:] = []
+        test_hosting_vnf = dict(MOCK_VNF_DEVICE, vnf={})
+        test_vnfmonitor.add_hosting_vnf(test_hosting_vnf)
+        self.assertEqual(1, len(test_vnfmonitor._schedule))
+        due, _seq, hosting_vnf, vdu, driver = test_vnfmonitor._schedule[0]
+        self.assertIs(test_hosting_vnf, hosting_vnf)
+        self.assertEqual(('vdu1', 'ping'), (vdu, driver))
+
+    @mock.patch('tacker.vnfm.monitor.VNFMonitor.__run__')
+    def test_add_hosting_vnfs_spreads_probes(self, mock_monitor_run):
+        test_vnfmonitor = VNFMonitor(30, check_intvl=10)
+        test_vnfmonitor._schedule[:] = []
+        test_hosting_vnfs = [dict(MOCK_VNF_DEVICE, id=str(uuid.uuid4()),
+                                  vnf={}) for _i in range(20)]
+        now = time.time()
+        test_vnfmonitor.add_hosting_vnfs(test_hosting_vnfs)
+        dues = sorted(entry[0] for entry in test_vnfmonitor._schedule)
+        self.assertEqual(20, len(dues))
+        self.assertGreater(dues[0], now - 1)
+        self.assertLess(dues[-1], now + 11)
+        self.assertGreater(dues[-1] - dues[0], 1)
+        for hosting_vnf in test_hosting_vnfs:
+            self.assertIs(hosting_vnf,
+                          test_vnfmonitor._hosting_vnfs[hosting_vnf['id']])
+
+    @mock.patch('tacker.vnfm.monitor.VNFMonitor.__run__')
+    def test_leave_cluster(self, mock_monitor_run):
+        test_vnfmonitor = VNFMonitor(30)
+        test_vnfmonitor.leave_cluster()
+        test_vnfmonitor._cluster = mock.Mock()
+        test_vnfmonitor.leave_cluster()
+        test_vnfmonitor._cluster.leave.assert_called_once_with()
+
+    @mock.patch('tacker.vnfm.monitor.VNFMonitor.__run__')
+    def test_delete_hosting_vnf(self, mock_monitor_run):
+        test_vnfmonitor = VNFMonitor(30)
+        test_vnfmonitor.add_hosting_vnf(dict(MOCK_VNF_DEVICE, vnf={}))
+        self.mock_monitor_manager.invoke = mock.MagicMock()
+        test_vnfmonitor._monitor_manager = self.mock_monitor_manager
+        test_vnfmonitor.delete_hosting_vnf(MOCK_DEVICE_ID)
+        self.assertNotIn(MOCK_DEVICE_ID, test_vnfmonitor._hosting_vnfs)
+        self.mock_monitor_manager.invoke.assert_called_once_with(
+            'ping', 'monitor_delete', vnf={})
+
+    @mock.patch('tacker.vnfm.monitor.VNFMonitor.__run__')
+    def test_run_probe_reschedules(self, mock_monitor_run):
+        test_vnfmonitor = VNFMonitor(30, check_intvl=10)
+        test_hosting_vnf = dict(MOCK_VNF_DEVICE, vnf={})
+        test_vnfmonitor.add_hosting_vnf(test_hosting_vnf)
+        test_vnfmonitor._schedule[:] = []
+        self.mock_monitor_manager.invoke = mock.MagicMock(
+            return_value=['failure'])
+        test_vnfmonitor._monitor_manager = self.mock_monitor_manager
+        test_vnfmonitor._run_probes(
+            'ping', [(0, 0, test_hosting_vnf, 'vdu1', 'ping')])
+        self.mock_monitor_manager.invoke.assert_called_once_with(
+            'ping', 'monitor_call_batch', probes=[({}, mock.ANY)])
+        self.assertEqual(1, len(test_vnfmonitor._schedule))
+        self.assertEqual(1, test_vnfmonitor.stats._probes)
+        test_hosting_vnf['action_cb'].assert_called_with(test_hosting_vnf,
+                                                         'respawn')
+
+    @mock.patch('tacker.vnfm.monitor.VNFMonitor.__run__')
+    def test_run_probe_skips_dead_vnf(self, mock_monitor_run):
+        test_vnfmonitor = VNFMonitor(30, check_intvl=10)
+        test_hosting_vnf = dict(MOCK_VNF_DEVICE, vnf={})
+        test_vnfmonitor.add_hosting_vnf(test_hosting_vnf)
+        test_vnfmonitor._schedule[:] = []
+        test_vnfmonitor.mark_dead(MOCK_DEVICE_ID)
+        self.mock_monitor_manager.invoke = mock.MagicMock()
+        test_vnfmonitor._monitor_manager = self.mock_monitor_manager
+        test_vnfmonitor._run_probes(
+            'ping', [(0, 0, test_hosting_vnf, 'vdu1', 'ping')])
+        self.assertFalse(self.mock_monitor_manager.invoke.called)
+        self.assertEqual([], test_vnfmonitor._schedule)
@@ -0,0 +1,126 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import os
+import uuid
+
+import mock
+from oslo_config import cfg
+import testtools
+
+from tacker import context
+from tacker.db.vm import monitor_member_db
+from tacker.tests.unit.db import base as db_base
+from tacker.vnfm import monitor_cluster
+
+
+class TestHashRing(testtools.TestCase):
+
+    def setUp(self):
+        super(TestHashRing, self).setUp()
+        self.keys = [str(uuid.uuid4()) for _i in range(1000)]
+
+    def _assign(self, members):
+        ring = monitor_cluster.HashRing(members, 64)
+        return dict((key, ring.get_member(key)) for key in self.keys)
+
+    def test_empty_ring(self):
+        self.assertIsNone(monitor_cluster.HashRing([], 64).get_member('a'))
+
+    def test_keys_spread_over_members(self):
+        assignment = self._assign(['m1', 'm2', 'm3', 'm4'])
+        for member in ('m1', 'm2', 'm3', 'm4'):
+            self.assertGreater(list(assignment.values()).count(member), 150)
+
+    def test_only_keys_of_changed_member_move(self):
+        before = self._assign(['m1', 'm2', 'm3'])
+        after = self._assign(['m1', 'm2', 'm3', 'm4'])
+        for key in self.keys:
+            if before[key] != after[key]:
+                self.assertEqual('m4', after[key])
+        after = self._assign(['m1', 'm3'])
+        for key in self.keys:
+            if before[key] != after[key]:
+                self.assertEqual('m2', before[key])
+
+
+class TestIsEnabled(testtools.TestCase):
+
+    def _is_enabled(self, enabled, api_workers):
+        cfg.CONF.set_override('enabled', enabled, 'monitor_cluster')
+        cfg.CONF.set_override('api_workers', api_workers)
+        try:
+            return monitor_cluster.is_enabled()
+        finally:
+            cfg.CONF.clear_override('enabled', 'monitor_cluster')
+            cfg.CONF.clear_override('api_workers')
+
+    def test_is_enabled(self):
+        self.assertFalse(self._is_enabled(False, 0))
+        self.assertFalse(self._is_enabled(False, 1))
+        self.assertTrue(self._is_enabled(True, 0))
+
+    def test_enabled_by_api_workers(self):
+        self.assertTrue(self._is_enabled(False, 4))
+
+
+class TestMonitorCluster(db_base.SqlTestCase):
+
+    def setUp(self):
+        super(TestMonitorCluster, self).setUp()
+        self.context = context.get_admin_context()
+        self.sync = mock.Mock()
+        self.cluster = monitor_cluster.MonitorCluster(self.sync)
+        self.cluster.member_id = str(uuid.uuid4())
+        self.cluster._pid = os.getpid()
+
+    def _add_member(self, heartbeat_at):
+        member_id = str(uuid.uuid4())
+        self.context.session.add(monitor_member_db.VnfMonitorMember(
+            id=member_id, host='node2', pid=2, heartbeat_at=heartbeat_at))
+        self.context.session.flush()
+        return member_id
+
+    def test_heartbeat(self):
+        self.cluster.heartbeat()
+        self.sync.assert_called_once_with()
+        self.assertTrue(self.cluster.owns(str(uuid.uuid4())))
+        self.cluster.heartbeat()
+        self.assertEqual(1, self.context.session.query(
+            monitor_member_db.VnfMonitorMember).count())
+
+    def test_dead_members_removed(self):
+        live = self._add_member(datetime.datetime.utcnow())
+        self._add_member(datetime.datetime(2016, 1, 1))
+        self.cluster.heartbeat()
+        self.assertEqual(frozenset([live, self.cluster.member_id]),
+                         self.cluster._ring.members)
+        self.assertEqual(2, self.context.session.query(
+            monitor_member_db.VnfMonitorMember).count())
+
+    def test_leave(self):
+        self.cluster.heartbeat()
+        self.cluster.leave()
+        self.assertFalse(self.cluster.owns(str(uuid.uuid4())))
+        self.assertEqual(0, self.context.session.query(
+            monitor_member_db.VnfMonitorMember).count())
+        self.cluster.heartbeat()
+        self.assertEqual(0, self.context.session.query(
+            monitor_member_db.VnfMonitorMember).count())
+
+    def test_leave_in_forked_process(self):
+        self.cluster.heartbeat()
+        with mock.patch('os.getpid', return_value=self.cluster._pid + 1):
+            self.cluster.leave()
+        self.assertEqual(1, self.context.session.query(
+            monitor_member_db.VnfMonitorMember).count())
@@ -202,7 +202,8 @@ class TestVNFMPlugin(db_base.SqlTestCase):
                                                        context=mock.ANY,
                                                        vnf=mock.ANY,
                                                        auth_attr=mock.ANY)
-        self._pool.spawn_n.assert_called_once_with(mock.ANY)
+        self._pool.spawn_n.assert_called_once_with(mock.ANY, mock.ANY,
+                                                   mock.ANY, mock.ANY)
         self._cos_db_plugin.create_event.assert_called_with(
             self.context, evt_type=constants.RES_EVT_CREATE, res_id=mock.ANY,
             res_state=mock.ANY, res_type=constants.RES_TYPE_VNF,
@@ -227,6 +228,67 @@ class TestVNFMPlugin(db_base.SqlTestCase):
             res_state=mock.ANY, res_type=constants.RES_TYPE_VNF,
             tstamp=mock.ANY, details=mock.ANY)
 
+    def test_create_vnf_bulk(self):
+        self._insert_dummy_device_template()
+        vnf_objs = [utils.get_dummy_vnf_obj() for _i in range(3)]
+        vnf_objs[1]['vnf']['name'] = 'failing_vnf'
+
+        def invoke(driver_name, method, **kwargs):
+            if kwargs['vnf']['name'] == 'failing_vnf':
+                raise vnfm.HeatClientException(msg='stack create failed')
+            return str(uuid.uuid4())
+        self._device_manager.invoke.side_effect = invoke
+        result = self.vnfm_plugin.create_vnf_bulk(
+            self.context, {'vnfs': vnf_objs})
+        self.assertEqual([constants.PENDING_CREATE, constants.ERROR,
+                          constants.PENDING_CREATE],
+                         [vnf['status'] for vnf in result])
+        self.assertIsNotNone(result[0]['instance_id'])
+        self.assertIn('stack create failed', result[1]['error_reason'])
+        self.assertEqual(constants.ERROR, self.vnfm_plugin.get_vnf(
+            self.context, result[1]['id'])['status'])
+        self.assertEqual(1, self.vim_client.get_vim.call_count)
+        self.assertEqual(2, self._pool.spawn_n.call_count)
+
+    def test_create_vnf_bulk_session_per_vnf(self):
+        self._insert_dummy_device_template()
+        vnf_objs = [utils.get_dummy_vnf_obj() for _i in range(2)]
+        sessions = []
+
+        def invoke(driver_name, method, **kwargs):
+            sessions.append(kwargs['context'].session)
+            return str(uuid.uuid4())
+        self._device_manager.invoke.side_effect = invoke
+        self.vnfm_plugin.create_vnf_bulk(self.context, {'vnfs': vnf_objs})
+        self.assertEqual(2, len(set(id(session) for session in sessions)))
+        self.assertNotIn(self.context.session, sessions)
+
+    def test_create_vnf_bulk_is_atomic(self):
+        self._insert_dummy_device_template()
+        vnf_objs = [utils.get_dummy_vnf_obj() for _i in range(2)]
+        vnf_objs[1]['vnf']['vnfd_id'] = str(uuid.uuid4())
+        self.assertRaises(vnfm.VNFDNotFound,
+                          self.vnfm_plugin.create_vnf_bulk,
+                          self.context, {'vnfs': vnf_objs})
+        self.assertEqual([], self.vnfm_plugin.get_vnfs(self.context))
+        self.assertFalse(self._device_manager.invoke.called)
+
+    def test_delete_vnf_bulk(self):
+        self._insert_dummy_device_template()
+        dummy_device_obj = self._insert_dummy_device()
+        result = self.vnfm_plugin.delete_vnf_bulk(
+            self.context, [dummy_device_obj['id']])
+        self.assertEqual([constants.PENDING_DELETE],
+                         [vnf['status'] for vnf in result])
+        self._device_manager.invoke.assert_called_with(mock.ANY, 'delete',
+                                                       plugin=mock.ANY,
+                                                       context=mock.ANY,
+                                                       vnf_id=mock.ANY,
+                                                       auth_attr=mock.ANY,
+                                                       region_name=mock.ANY)
+        self._pool.spawn_n.assert_called_once_with(mock.ANY, mock.ANY,
+                                                   mock.ANY, mock.ANY)
+
     def test_update_vnf(self):
         self._insert_dummy_device_template()
         dummy_device_obj = self._insert_dummy_device()
@@ -246,3 +308,174 @@ class TestVNFMPlugin(db_base.SqlTestCase):
             self.context, evt_type=constants.RES_EVT_UPDATE, res_id=mock.ANY,
             res_state=mock.ANY, res_type=constants.RES_TYPE_VNF,
             tstamp=mock.ANY)
+
+    def _insert_dummy_vnfd_attributes(self):
+        session = self.context.session
+        for key, value in (('vnfd', 'tosca_definitions_version: 1.0'),
+                           ('validated', 'true')):
+            session.add(vm_db.VNFDAttribute(
+                id=str(uuid.uuid4()),
+                vnfd_id='eb094833-995e-49f0-a047-dfb56aaf7c4e',
+                key=key, value=value))
+        session.add(vm_db.VNFAttribute(
+            id=str(uuid.uuid4()),
+            vnf_id='6261579e-d6f3-49ad-8bc3-a9cb974778ff',
+            key='heat_template', value='heat_template_version: 2013-05-23'))
+        session.flush()
+
+    def test_get_vnfs(self):
+        self._insert_dummy_device_template()
+        self._insert_dummy_device()
+        self._insert_dummy_vnfd_attributes()
+        vnfs = self.vnfm_plugin.get_vnfs(self.context)
+        self.assertEqual(1, len(vnfs))
+        self.assertEqual('fake_device', vnfs[0]['name'])
+        self.assertEqual({'heat_template':
+                          'heat_template_version: 2013-05-23'},
+                         vnfs[0]['attributes'])
+        self.assertEqual('fake_template', vnfs[0]['vnfd']['name'])
+        # VNFD templates are only listed when asked for
+        self.assertEqual({'validated': 'true'},
+                         vnfs[0]['vnfd']['attributes'])
+
+    def test_get_vnfs_fields(self):
+        self._insert_dummy_device_template()
+        self._insert_dummy_device()
+        self._insert_dummy_vnfd_attributes()
+        vnfs = self.vnfm_plugin.get_vnfs(self.context,
+                                         fields=['id', 'name'])
+        self.assertEqual([{'id': '6261579e-d6f3-49ad-8bc3-a9cb974778ff',
+                           'name': 'fake_device'}], vnfs)
+
+        vnfs = self.vnfm_plugin.get_vnfs(self.context,
+                                         fields=['id', 'vnfd'])
+        self.assertEqual(['id', 'vnfd'], sorted(vnfs[0]))
+        self.assertIn('vnfd', vnfs[0]['vnfd']['attributes'])
+
+    def test_get_vnfs_paginated(self):
+        self._insert_dummy_device_template()
+        session = self.context.session
+        for i in range(5):
+            session.add(vm_db.VNF(
+                id='6261579e-d6f3-49ad-8bc3-a9cb974778f%d' % i,
+                tenant_id='ad7ebc56538745a08ef7c5e97f8bd437',
+                name='fake_device_%d' % (4 - i),
+                vnfd_id='eb094833-995e-49f0-a047-dfb56aaf7c4e',
+                vim_id='6261579e-d6f3-49ad-8bc3-a9cb974778ff',
+                status='ACTIVE'))
+        session.flush()
+        sorts = [('name', False), ('id', True)]
+        first = self.vnfm_plugin.get_vnfs(self.context, fields=['name'],
+                                          sorts=sorts, limit=2)
+        self.assertEqual(['fake_device_4', 'fake_device_3'],
+                         [vnf['name'] for vnf in first])
+        second = self.vnfm_plugin.get_vnfs(
+            self.context, sorts=sorts, limit=2,
+            marker='6261579e-d6f3-49ad-8bc3-a9cb974778f1')
+        self.assertEqual(['fake_device_2', 'fake_device_1'],
+                         [vnf['name'] for vnf in second])
+        self.assertEqual('fake_template', second[0]['vnfd']['name'])
+        previous = self.vnfm_plugin.get_vnfs(
+            self.context, sorts=sorts, limit=2,
+            marker='6261579e-d6f3-49ad-8bc3-a9cb974778f2', page_reverse=True)
+        self.assertEqual(['fake_device_4', 'fake_device_3'],
+                         [vnf['name'] for vnf in previous])
+
+    def test_get_vnfds_paginated(self):
+        self._insert_dummy_device_template()
+        vnfds = self.vnfm_plugin.get_vnfds(
+            self.context, sorts=[('id', True)], limit=1,
+            marker='eb094833-995e-49f0-a047-dfb56aaf7c4e')
+        self.assertEqual([], vnfds)
+        self.assertRaises(vnfm.VNFDNotFound, self.vnfm_plugin.get_vnfds,
+                          self.context, sorts=[('id', True)], limit=1,
+                          marker='00000000-0000-0000-0000-000000000000')
+
+    def test_vnf_attributes_update_or_create(self):
+        self._insert_dummy_device_template()
+        dummy_device_obj = self._insert_dummy_device()
+        vnf_id = dummy_device_obj['id']
+        self.vnfm_plugin._vnf_attributes_update_or_create(
+            self.context, vnf_id, {'a': '1', 'b': '2', 'vim_auth': 'x'})
+        self.context.session.flush()
+        self.vnfm_plugin._vnf_attributes_update_or_create(
+            self.context, vnf_id, {'a': '1', 'c': '3'}, delete_others=True)
+        self.context.session.flush()
+        attrs = dict((arg.key, arg.value) for arg in
+                     self.context.session.query(vm_db.VNFAttribute).filter_by(
+                         vnf_id=vnf_id))
+        self.assertEqual({'a': '1', 'c': '3'}, attrs)
+
+    def _insert_dummy_monitored_device(self):
+        self._insert_dummy_device_template()
+        dummy_device_obj = self._insert_dummy_device()
+        dummy_device_obj.update({'mgmt_url': '{"vdu1": "a.b.c.d"}'})
+        self.context.session.add(vm_db.VNFAttribute(
+            id=str(uuid.uuid4()), vnf_id=dummy_device_obj['id'],
+            key='monitoring_policy', value='{"vdus": {}}'))
+        self.context.session.flush()
+        return dummy_device_obj
+
+    def test_sync_vnf_monitor(self):
+        dummy_device_obj = self._insert_dummy_monitored_device()
+        self._vnf_monitor.owns.return_value = True
+        self._vnf_monitor.get_monitored_vnf_ids.return_value = set(
+            ['a737497c-761c-11e5-89c3-9cb6541d805d'])
+        self.vnfm_plugin._sync_vnf_monitor()
+        self._vnf_monitor.delete_hosting_vnf.assert_called_once_with(
+            'a737497c-761c-11e5-89c3-9cb6541d805d')
+        self._vnf_monitor.to_hosting_vnf.assert_called_once_with(
+            mock.ANY, mock.ANY)
+        self.assertEqual(dummy_device_obj['id'],
+                         self._vnf_monitor.to_hosting_vnf.call_args[0][0][
+                             'id'])
+        self._vnf_monitor.add_hosting_vnfs.assert_called_once_with(
+            [mock.ANY])
+
+    def test_sync_vnf_monitor_not_owned(self):
+        self._insert_dummy_monitored_device()
+        self._vnf_monitor.owns.return_value = False
+        self._vnf_monitor.get_monitored_vnf_ids.return_value = set()
+        self.vnfm_plugin._sync_vnf_monitor()
+        self.assertFalse(self._vnf_monitor.add_hosting_vnfs.called)
+
+    def test_start_workers(self):
+        lifecycle_tasks = mock.Mock()
+        self.vnfm_plugin._lifecycle_tasks = lifecycle_tasks
+        self.vnfm_plugin.start_workers()
+        self._vnf_monitor.start.assert_called_once_with()
+        self._vnf_monitor.load_hosting_vnfs.assert_called_once_with(
+            self.vnfm_plugin._load_vnf_monitor)
+        lifecycle_tasks.start_worker.assert_called_once_with()
+
+    def test_start_workers_cluster_of_api_workers(self):
+        self.config_fixture.config(api_workers=4)
+        self.vnfm_plugin._lifecycle_tasks = mock.Mock()
+        self.vnfm_plugin.start_workers()
+        self._vnf_monitor.start.assert_called_once_with()
+        self.assertFalse(self._vnf_monitor.load_hosting_vnfs.called)
+
+    def test_start_workers_without_lifecycle_worker(self):
+        self.config_fixture.config(group='vnf_lifecycle_tasks',
+                                   run_in_api=False)
+        self.vnfm_plugin._lifecycle_tasks = mock.Mock()
+        self.vnfm_plugin.start_workers()
+        self.assertFalse(
+            self.vnfm_plugin._lifecycle_tasks.start_worker.called)
+
+    def test_stop_workers(self):
+        self.vnfm_plugin.stop_workers()
+        self._vnf_monitor.leave_cluster.assert_called_once_with()
+
+    def test_load_vnf_monitor(self):
+        dummy_device_obj = self._insert_dummy_monitored_device()
+        self._vnf_monitor.owns.return_value = True
+        self.assertEqual(1, self.vnfm_plugin._load_vnf_monitor())
+        vnf_dict = self._vnf_monitor.to_hosting_vnf.call_args[0][0]
+        self.assertEqual(dummy_device_obj['id'], vnf_dict['id'])
+        self.assertEqual({'monitoring_policy': '{"vdus": {}}'},
+                         vnf_dict['attributes'])
+        self.assertEqual('fake_driver', vnf_dict['vnfd']['infra_driver'])
+        self._vnf_monitor.add_hosting_vnfs.assert_called_once_with(
+            [mock.ANY])
+        self.assertFalse(self.vim_client.get_vim.called)
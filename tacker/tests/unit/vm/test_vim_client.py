@@ -9,6 +9,10 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import os
+import shutil
+import tempfile
+
 import mock
 
 from oslo_config import cfg
@@ -20,13 +24,21 @@ from tacker import manager
 from tacker.tests.unit import base
 from tacker.vnfm import vim_client
 
+cfg.CONF.import_opt('openstack', 'tacker.nfvo.drivers.vim.openstack_driver',
+                    group='vim_keys')
 
 class TestVIMClient(base.TestCase):
 
     def setUp(self):
         super(TestVIMClient, self).setUp()
         self.vim_info = {'id': 'aaaa', 'name': 'VIM0',
+                         'tenant_id': 'tenant1', 'shared': False,
                          'auth_cred': {'password': '****'}}
+        self.context = mock.Mock(is_admin=False, tenant_id='tenant1')
+        vim_client.invalidate_vim_auth()
+        self.addCleanup(vim_client.invalidate_vim_auth)
+        self.config_fixture.config(group='nfvo_vim',
+                                   vim_keys_poll_interval=0)
 
     def test_get_vim_without_defined_default_vim(self):
         cfg.CONF.set_override(
@@ -40,7 +52,7 @@ class TestVIMClient(base.TestCase):
         with mock.patch.object(manager.TackerManager, 'get_service_plugins',
                                return_value=service_plugins):
             self.assertRaises(nfvo.VimDefaultNameNotDefined,
-                              vimclient.get_vim, None)
+                              vimclient.get_vim, self.context)
 
     def test_get_vim_without_defined_default_vim_in_db(self):
         cfg.CONF.set_override(
@@ -61,6 +73,102 @@ class TestVIMClient(base.TestCase):
                 mock.patch.object(vimclient,
                                   '_build_vim_auth').start()
             build_vim_auth.return_value = mock.Mock()
-            vimclient.get_vim(None)
+            vimclient.get_vim(self.context)
             vimclient._get_default_vim_by_name.\
                 assert_called_once_with(mock.ANY, mock.ANY, 'VIM0')
+
+    def _get_vim_cached(self, vimclient, nfvo_plugin, vim_id, context=None):
+        service_plugins = mock.Mock()
+        service_plugins.get.return_value = nfvo_plugin
+        with mock.patch.object(manager.TackerManager, 'get_service_plugins',
+                               return_value=service_plugins), \
+                mock.patch.object(vimclient, '_decode_vim_auth',
+                                  return_value='secret') as decode:
+            vim_res = vimclient.get_vim(context or self.context, vim_id)
+        return vim_res, decode
+
+    def test_get_vim_cached(self):
+        vimclient = vim_client.VimClient()
+        nfvo_plugin = mock.Mock()
+        nfvo_plugin.get_vim.return_value = dict(self.vim_info,
+                                                auth_url='http://vim/v3')
+        vim_res, decode = self._get_vim_cached(vimclient, nfvo_plugin,
+                                               'aaaa')
+        self.assertEqual('secret', vim_res['vim_auth']['password'])
+        vim_res['vim_auth']['password'] = 'changed by a driver'
+        vim_res, decode = self._get_vim_cached(vimclient, nfvo_plugin,
+                                               'aaaa')
+        self.assertEqual('secret', vim_res['vim_auth']['password'])
+        self.assertFalse(decode.called)
+        self.assertEqual(1, nfvo_plugin.get_vim.call_count)
+
+        vim_client.invalidate_vim_auth('aaaa')
+        nfvo_plugin.get_vim.return_value = dict(self.vim_info,
+                                                auth_url='http://vim/v3')
+        vim_res, decode = self._get_vim_cached(vimclient, nfvo_plugin,
+                                               'aaaa')
+        self.assertTrue(decode.called)
+        self.assertEqual(2, nfvo_plugin.get_vim.call_count)
+
+    def test_get_vim_cached_per_tenant(self):
+        vimclient = vim_client.VimClient()
+        nfvo_plugin = mock.Mock()
+        nfvo_plugin.get_vim.side_effect = lambda *args, **kwargs: dict(
+            self.vim_info, auth_url='http://vim/v3')
+        nfvo_plugin.get_default_vim.side_effect = \
+            lambda *args, **kwargs: dict(self.vim_info,
+                                         auth_url='http://vim/v3')
+        self._get_vim_cached(vimclient, nfvo_plugin, 'aaaa')
+        self._get_vim_cached(vimclient, nfvo_plugin, None)
+        self.assertEqual(1, nfvo_plugin.get_vim.call_count)
+        self.assertEqual(1, nfvo_plugin.get_default_vim.call_count)
+
+        # another tenant reads the VIM and its default VIM from the plugin
+        other = mock.Mock(is_admin=False, tenant_id='tenant2')
+        nfvo_plugin.get_vim.side_effect = orm_exc.NoResultFound()
+        nfvo_plugin.get_default_vim.side_effect = orm_exc.NoResultFound()
+        self.config_fixture.config(group='nfvo_vim', default_vim='')
+        self.assertRaises(nfvo.VimNotFoundException, self._get_vim_cached,
+                          vimclient, nfvo_plugin, 'aaaa', other)
+        self.assertRaises(nfvo.VimDefaultNameNotDefined,
+                          self._get_vim_cached, vimclient, nfvo_plugin,
+                          None, other)
+        self.assertEqual(2, nfvo_plugin.get_vim.call_count)
+        self.assertEqual(2, nfvo_plugin.get_default_vim.call_count)
+
+        # unless the VIM is shared
+        self.vim_info['shared'] = True
+        vim_client.invalidate_vim_auth()
+        nfvo_plugin.get_vim.side_effect = lambda *args, **kwargs: dict(
+            self.vim_info, auth_url='http://vim/v3')
+        self._get_vim_cached(vimclient, nfvo_plugin, 'aaaa')
+        self._get_vim_cached(vimclient, nfvo_plugin, 'aaaa', other)
+        self.assertEqual(3, nfvo_plugin.get_vim.call_count)
+
+    def test_get_vim_cache_disabled(self):
+        self.config_fixture.config(group='nfvo_vim', vim_auth_cache_ttl=0)
+        vimclient = vim_client.VimClient()
+        nfvo_plugin = mock.Mock()
+        nfvo_plugin.get_vim.side_effect = lambda *args, **kwargs: dict(
+            self.vim_info, auth_url='http://vim/v3')
+        for _i in range(2):
+            self._get_vim_cached(vimclient, nfvo_plugin, 'aaaa')
+        self.assertEqual(2, nfvo_plugin.get_vim.call_count)
+
+    def test_vim_keys_watcher(self):
+        key_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, key_dir)
+        self.config_fixture.config(group='vim_keys', openstack=key_dir)
+        with open(os.path.join(key_dir, 'aaaa'), 'w') as f:
+            f.write('key')
+        keyring = mock.Mock()
+        watcher = vim_client._VimKeysWatcher(keyring)
+        watcher.poll()
+        self.assertFalse(keyring.invalidate.called)
+        with open(os.path.join(key_dir, 'aaaa'), 'w') as f:
+            f.write('new key')
+        watcher.poll()
+        keyring.invalidate.assert_called_once_with('aaaa')
+        os.remove(os.path.join(key_dir, 'aaaa'))
+        watcher.poll()
+        self.assertEqual(2, keyring.invalidate.call_count)
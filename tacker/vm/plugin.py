@@ -19,21 +19,25 @@ import six
 import yaml
 
 import eventlet
+from eventlet import semaphore
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_log import versionutils
 from oslo_utils import excutils
 
-from tacker._i18n import _LE
+from tacker._i18n import _LE, _LI
 from tacker.api.v1 import attributes
 from tacker.common import driver_manager
 from tacker.common import exceptions
 from tacker.common import utils
+from tacker import context as t_context
 from tacker.db.vm import vm_db
 from tacker.extensions import vnfm
 from tacker.plugins.common import constants
+from tacker.vnfm import lifecycle_tasks
 from tacker.vnfm.mgmt_drivers import constants as mgmt_constants
 from tacker.vnfm import monitor
+from tacker.vnfm import monitor_cluster
 from tacker.vnfm import vim_client
 
 LOG = logging.getLogger(__name__)
@@ -114,10 +118,18 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
         cfg.ListOpt(
             'infra_driver', default=['nova', 'heat', 'noop'],
             help=_('Hosting vnf drivers tacker plugin will use')),
+        cfg.IntOpt(
+            'bulk_vim_concurrency', default=8,
+            help=_('Maximum number of VNFs of a bulk request created or '
+                   'deleted at once on one VIM')),
     ]
     cfg.CONF.register_opts(OPTS, 'tacker')
     supported_extension_aliases = ['vnfm']
 
+    __native_bulk_support = True
+    __native_pagination_support = True
+    __native_sorting_support = True
+
     def __init__(self):
         super(VNFMPlugin, self).__init__()
         self._pool = eventlet.GreenPool()
@@ -127,10 +139,53 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
             'tacker.tacker.device.drivers',
             cfg.CONF.tacker.infra_driver)
         self._vnf_monitor = monitor.VNFMonitor(self.boot_wait)
+        if monitor_cluster.is_enabled():
+            if not cfg.CONF.monitor_cluster.enabled:
+                LOG.info(_LI('The %d API workers share the monitored VNFs '
+                             'as a monitor cluster'), cfg.CONF.api_workers)
+            self._vnf_monitor.join_cluster(self._sync_vnf_monitor)
+        self._lifecycle_tasks = lifecycle_tasks.get_task_queue(
+            {lifecycle_tasks.CREATE_WAIT: self._create_vnf_wait_and_config,
+             lifecycle_tasks.UPDATE_WAIT: self._update_vnf_wait,
+             lifecycle_tasks.DELETE_WAIT: self._delete_vnf_wait,
+             lifecycle_tasks.SCALE_WAIT: self._scale_vnf_wait},
+            self.spawn_n, self.get_vim, self._abandon_lifecycle_task)
 
     def spawn_n(self, function, *args, **kwargs):
         self._pool.spawn_n(function, *args, **kwargs)
 
+    def start_workers(self):
+        """Start the background workers of this process, e.g. after a fork.
+
+        These are the VNF monitor and, unless disabled, the worker of the
+        'db' lifecycle task backend, which also runs the tasks left behind
+        by a previous server. Outside of a monitor cluster, the monitor of
+        the single API worker loads the monitored VNFs from the database.
+        """
+        self._vnf_monitor.start()
+        if not monitor_cluster.is_enabled():
+            self._vnf_monitor.load_hosting_vnfs(self._load_vnf_monitor)
+        if cfg.CONF.vnf_lifecycle_tasks.run_in_api:
+            self._lifecycle_tasks.start_worker()
+
+    def stop_workers(self):
+        """Stop the background work of this process before it exits.
+
+        The VNFs this process monitors as a member of the monitor cluster
+        move to the other members at once, rather than after the member
+        timeout.
+        """
+        self._vnf_monitor.leave_cluster()
+
+    def start_lifecycle_worker(self):
+        """Run the lifecycle tasks of the 'db' backend in this process."""
+        self._lifecycle_tasks.start_worker()
+        return self._lifecycle_tasks
+
+    def _abandon_lifecycle_task(self, context, task_type, vnf_dict, reason):
+        self.set_vnf_error_status_reason(context, vnf_dict['id'], reason)
+        self._mark_vnf_error(vnf_dict['id'])
+
     def create_vnfd(self, context, vnfd):
         vnfd_data = vnfd['vnfd']
         template = vnfd_data['attributes'].get('vnfd')
@@ -177,22 +232,77 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
         return super(VNFMPlugin, self).create_vnfd(
             context, vnfd)
 
+    def _make_hosting_vnf(self, vnf_dict, vim_auth=None):
+        """Return the monitor entry of a VNF.
+
+        Without vim_auth, the VIM of the VNF is looked up when a monitoring
+        action runs.
+        """
+        def action_cb(hosting_vnf_, action):
+            action_cls = monitor.ActionPolicy.get_policy(action,
+                                                         vnf_dict)
+            if action_cls:
+                auth_attr = vim_auth
+                if auth_attr is None:
+                    auth_attr = self.get_vim(t_context.get_admin_context(),
+                                             hosting_vnf['vnf'])
+                action_cls.execute_action(self, hosting_vnf['vnf'],
+                                          auth_attr)
+
+        hosting_vnf = self._vnf_monitor.to_hosting_vnf(
+            vnf_dict, action_cb)
+        return hosting_vnf
+
     def add_vnf_to_monitor(self, vnf_dict, vim_auth):
         dev_attrs = vnf_dict['attributes']
         mgmt_url = vnf_dict['mgmt_url']
+        if not self._vnf_monitor.owns(vnf_dict['id']):
+            # the member of the monitor cluster owning the vnf adds it
+            return
         if 'monitoring_policy' in dev_attrs and mgmt_url:
-            def action_cb(hosting_vnf_, action):
-                action_cls = monitor.ActionPolicy.get_policy(action,
-                                                             vnf_dict)
-                if action_cls:
-                    action_cls.execute_action(self, hosting_vnf['vnf'],
-                                              vim_auth)
-
-            hosting_vnf = self._vnf_monitor.to_hosting_vnf(
-                vnf_dict, action_cb)
+            hosting_vnf = self._make_hosting_vnf(vnf_dict, vim_auth)
             LOG.debug('hosting_vnf: %s', hosting_vnf)
             self._vnf_monitor.add_hosting_vnf(hosting_vnf)
 
+    def _load_vnf_monitor(self, vnf_ids=None):
+        """Add the running VNFs this process monitors to the monitor.
+
+        :param vnf_ids: ids of the VNFs to add, all of them when None
+        :returns: the number of VNFs added
+        """
+        context = t_context.get_admin_context()
+        count = 0
+        for vnf_dicts in self._iter_monitored_vnfs(
+                context, cfg.CONF.monitor.load_batch_size, vnf_ids):
+            hosting_vnfs = []
+            for vnf_dict in vnf_dicts:
+                if not self._vnf_monitor.owns(vnf_dict['id']):
+                    continue
+                try:
+                    hosting_vnfs.append(self._make_hosting_vnf(vnf_dict))
+                except Exception:
+                    LOG.exception(_LE('Unable to monitor vnf %s'),
+                                  vnf_dict['id'])
+            if hosting_vnfs:
+                self._vnf_monitor.add_hosting_vnfs(hosting_vnfs)
+            count += len(hosting_vnfs)
+        return count
+
+    def _sync_vnf_monitor(self):
+        """Monitor the VNFs the monitor cluster assigns to this process."""
+        context = t_context.get_admin_context()
+        owned = set(vnf_id for vnf_id in self._get_monitored_vnf_ids(context)
+                    if self._vnf_monitor.owns(vnf_id))
+        monitored = self._vnf_monitor.get_monitored_vnf_ids()
+        for vnf_id in monitored - owned:
+            self._vnf_monitor.delete_hosting_vnf(vnf_id)
+        added = owned - monitored
+        count = self._load_vnf_monitor(added) if added else 0
+        if count or monitored - owned:
+            LOG.info(_LI('Monitoring %(added)d more and %(deleted)d fewer '
+                         'vnfs'), {'added': count,
+                                   'deleted': len(monitored - owned)})
+
     def config_vnf(self, context, vnf_dict):
         config = vnf_dict['attributes'].get('config')
         if not config:
@@ -287,9 +397,7 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
         vnf_dict['instance_id'] = instance_id
         return vnf_dict
 
-    def create_vnf(self, context, vnf):
-        vnf_info = vnf['vnf']
-        vnf_attributes = vnf_info['attributes']
+    def _prepare_vnf_attributes(self, vnf_attributes):
         if vnf_attributes.get('param_values'):
             param = vnf_attributes['param_values']
             if isinstance(param, dict):
@@ -308,16 +416,105 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
                 vnf_attributes['config'] = yaml.safe_dump(config)
             else:
                 self._report_deprecated_yaml_str()
+
+    def _create_vnf_wait_and_config(self, context, vnf_dict, vim_auth):
+        self._create_vnf_wait(context, vnf_dict, vim_auth)
+        self.add_vnf_to_monitor(vnf_dict, vim_auth)
+        self.config_vnf(context, vnf_dict)
+
+    def create_vnf(self, context, vnf):
+        vnf_info = vnf['vnf']
+        self._prepare_vnf_attributes(vnf_info['attributes'])
         vim_auth = self.get_vim(context, vnf_info)
         vnf_dict = self._create_vnf(context, vnf_info, vim_auth)
-
-        def create_vnf_wait():
-            self._create_vnf_wait(context, vnf_dict, vim_auth)
-            self.add_vnf_to_monitor(vnf_dict, vim_auth)
-            self.config_vnf(context, vnf_dict)
-        self.spawn_n(create_vnf_wait)
+        self._lifecycle_tasks.submit(lifecycle_tasks.CREATE_WAIT, context,
+                                     vnf_dict, vim_auth)
         return vnf_dict
 
+    def _get_vims(self, context, vnfs):
+        """Return the VIM auth of each VNF, looking up each VIM once."""
+        vim_res_by_key = {}
+        vim_auths = []
+        for vnf in vnfs:
+            placement_attr = vnf.setdefault('placement_attr', {})
+            key = (vnf.get('vim_id'), placement_attr.get('region_name'))
+            if key not in vim_res_by_key:
+                vim_res_by_key[key] = self.vim_client.get_vim(context, *key)
+            vim_res = vim_res_by_key[key]
+            placement_attr['vim_name'] = vim_res['vim_name']
+            vnf['vim_id'] = vim_res['vim_id']
+            vim_auths.append(dict(vim_res['vim_auth']))
+        return vim_auths
+
+    def _run_per_vim(self, context, function, vnf_dicts, vim_auths):
+        """Call function on every VNF, bulk_vim_concurrency at most per VIM.
+
+        Each call runs in its own green thread, with a copy of the context
+        that has its own database session.
+
+        :returns: the results, in the order of vnf_dicts
+        """
+        concurrency = cfg.CONF.tacker.bulk_vim_concurrency
+        semaphores = dict((vnf_dict['vim_id'],
+                           semaphore.Semaphore(concurrency))
+                          for vnf_dict in vnf_dicts)
+
+        def run(vnf_dict, vim_auth):
+            with semaphores[vnf_dict['vim_id']]:
+                return function(context.copy_with_new_session(), vnf_dict,
+                                vim_auth)
+
+        pile = eventlet.GreenPile(max(len(vnf_dicts), 1))
+        for vnf_dict, vim_auth in zip(vnf_dicts, vim_auths):
+            pile.spawn(run, vnf_dict, vim_auth)
+        return list(pile)
+
+    def create_vnf_bulk(self, context, vnfs):
+        """Create the VNFs of a bulk request.
+
+        All the VNFs are validated and inserted in one transaction, then
+        their instances are created concurrently. A VNF whose instance
+        cannot be created is returned in ERROR status with its error
+        reason, without affecting the others.
+        """
+        vnf_infos = [item['vnf'] for item in vnfs['vnfs']]
+        for vnf_info in vnf_infos:
+            self._prepare_vnf_attributes(vnf_info['attributes'])
+        vim_auths = self._get_vims(context, vnf_infos)
+        vnf_dicts = self._create_vnfs_pre(context, vnf_infos)
+
+        def create_vnf_instance(context, vnf_dict, vim_auth):
+            vnf_id = vnf_dict['id']
+            try:
+                self.mgmt_create_pre(context, vnf_dict)
+                instance_id = self._vnf_manager.invoke(
+                    self._infra_driver_name(vnf_dict), 'create',
+                    plugin=self, context=context, vnf=vnf_dict,
+                    auth_attr=vim_auth)
+            except Exception as e:
+                LOG.exception(_LE('Unable to create VNF %s'), vnf_id)
+                vnf_dict['status'] = constants.ERROR
+                vnf_dict['error_reason'] = six.text_type(e)
+                self.set_vnf_error_status_reason(context, vnf_id,
+                                                 vnf_dict['error_reason'])
+                self._create_vnf_status(context, vnf_id, constants.ERROR)
+                return False
+            if instance_id is None:
+                vnf_dict['status'] = constants.ERROR
+                self._create_vnf_post(context, vnf_id, None, None, vnf_dict)
+                return False
+            vnf_dict['instance_id'] = instance_id
+            return True
+
+        created = self._run_per_vim(context, create_vnf_instance, vnf_dicts,
+                                    vim_auths)
+        for vnf_dict, vim_auth, vnf_created in zip(vnf_dicts, vim_auths,
+                                                   created):
+            if vnf_created:
+                self._lifecycle_tasks.submit(lifecycle_tasks.CREATE_WAIT,
+                                             context, vnf_dict, vim_auth)
+        return vnf_dicts
+
     # not for wsgi, but for service to create hosting vnf
     # the vnf is NOT added to monitor.
     def create_vnf_sync(self, context, vnf):
@@ -385,7 +582,8 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
                 self.mgmt_update_post(context, vnf_dict)
                 self._update_vnf_post(context, vnf_id, constants.ERROR)
 
-        self.spawn_n(self._update_vnf_wait, context, vnf_dict, vim_auth)
+        self._lifecycle_tasks.submit(lifecycle_tasks.UPDATE_WAIT, context,
+                                     vnf_dict, vim_auth)
         return vnf_dict
 
     def _delete_vnf_wait(self, context, vnf_dict, auth_attr):
@@ -417,6 +615,10 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
     def delete_vnf(self, context, vnf_id):
         vnf_dict = self._delete_vnf_pre(context, vnf_id)
         vim_auth = self.get_vim(context, vnf_dict)
+        self._delete_vnf(context, vnf_dict, vim_auth)
+
+    def _delete_vnf(self, context, vnf_dict, vim_auth):
+        vnf_id = vnf_dict['id']
         self._vnf_monitor.delete_hosting_vnf(vnf_id)
         driver_name = self._infra_driver_name(vnf_dict)
         instance_id = self._instance_id(vnf_dict)
@@ -447,7 +649,29 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
                 self.mgmt_delete_post(context, vnf_dict)
                 self._delete_vnf_post(context, vnf_id, e)
 
-        self.spawn_n(self._delete_vnf_wait, context, vnf_dict, vim_auth)
+        self._lifecycle_tasks.submit(lifecycle_tasks.DELETE_WAIT, context,
+                                     vnf_dict, vim_auth)
+
+    def delete_vnf_bulk(self, context, vnf_ids):
+        """Delete many VNFs.
+
+        All the VNFs are checked and marked PENDING_DELETE in one
+        transaction, then their instances are deleted concurrently. A VNF
+        whose instance cannot be deleted is returned in ERROR status with
+        its error reason, without affecting the others.
+        """
+        vnf_dicts = self._delete_vnfs_pre(context, vnf_ids)
+        vim_auths = self._get_vims(context, vnf_dicts)
+
+        def delete_vnf_instance(context, vnf_dict, vim_auth):
+            try:
+                self._delete_vnf(context, vnf_dict, vim_auth)
+            except Exception:
+                LOG.exception(_LE('Unable to delete VNF %s'), vnf_dict['id'])
+
+        self._run_per_vim(context, delete_vnf_instance, vnf_dicts,
+                          vim_auths)
+        return vnf_dicts
 
     def _handle_vnf_scaling(self, context, policy):
         # validate
@@ -471,17 +695,9 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
 
             LOG.debug(_("Policy %s is validated successfully") % policy)
 
-        def _get_status():
-            if policy['action'] == constants.ACTION_SCALE_IN:
-                status = constants.PENDING_SCALE_IN
-            else:
-                status = constants.PENDING_SCALE_OUT
-
-            return status
-
         # pre
         def _handle_vnf_scaling_pre():
-            status = _get_status()
+            status = self._vnf_scaling_status(policy)
             result = self._update_vnf_scaling_status(context,
                                                      policy,
                                                      [constants.ACTIVE],
@@ -491,19 +707,6 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
                        'status': status})
             return result
 
-        # post
-        def _handle_vnf_scaling_post(new_status, mgmt_url=None):
-            status = _get_status()
-            result = self._update_vnf_scaling_status(context,
-                                                     policy,
-                                                     [status],
-                                                     new_status,
-                                                     mgmt_url)
-            LOG.debug(_("Policy %(policy)s vnf is at %(status)s"),
-                      {'policy': policy,
-                       'status': new_status})
-            return result
-
         # action
         def _vnf_policy_action():
             try:
@@ -527,35 +730,8 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
                         context,
                         policy['vnf_id'],
                         six.text_type(e))
-                    _handle_vnf_scaling_post(constants.ERROR)
-
-        # wait
-        def _vnf_policy_action_wait():
-            try:
-                LOG.debug(_("Policy %s action is in progress") %
-                          policy)
-                mgmt_url = self._vnf_manager.invoke(
-                    infra_driver,
-                    'scale_wait',
-                    plugin=self,
-                    context=context,
-                    auth_attr=vim_auth,
-                    policy=policy,
-                    region_name=region_name
-                )
-                LOG.debug(_("Policy %s action is completed successfully") %
-                          policy)
-                _handle_vnf_scaling_post(constants.ACTIVE, mgmt_url)
-                # TODO(kanagaraj-manickam): Add support for config and mgmt
-            except Exception as e:
-                LOG.error(_("Policy %s action is failed to complete") %
-                          policy)
-                with excutils.save_and_reraise_exception():
-                    self.set_vnf_error_status_reason(
-                        context,
-                        policy['vnf_id'],
-                        six.text_type(e))
-                    _handle_vnf_scaling_post(constants.ERROR)
+                    self._handle_vnf_scaling_post(context, policy,
+                                                  constants.ERROR)
 
         _validate_scaling_policy()
 
@@ -566,10 +742,62 @@ class VNFMPlugin(vm_db.VNFMPluginDb, VNFMMgmtMixin):
         vim_auth = self.get_vim(context, vnf)
         region_name = vnf.get('placement_attr', {}).get('region_name', None)
         _vnf_policy_action()
-        self.spawn_n(_vnf_policy_action_wait)
+        self._lifecycle_tasks.submit(lifecycle_tasks.SCALE_WAIT, context,
+                                     vnf, vim_auth, policy=policy)
 
         return policy
 
+    @staticmethod
+    def _vnf_scaling_status(policy):
+        if policy['action'] == constants.ACTION_SCALE_IN:
+            return constants.PENDING_SCALE_IN
+        return constants.PENDING_SCALE_OUT
+
+    def _handle_vnf_scaling_post(self, context, policy, new_status,
+                                 mgmt_url=None):
+        status = self._vnf_scaling_status(policy)
+        result = self._update_vnf_scaling_status(context,
+                                                 policy,
+                                                 [status],
+                                                 new_status,
+                                                 mgmt_url)
+        LOG.debug(_("Policy %(policy)s vnf is at %(status)s"),
+                  {'policy': policy,
+                   'status': new_status})
+        return result
+
+    def _scale_vnf_wait(self, context, vnf_dict, vim_auth, policy):
+        infra_driver = self._infra_driver_name(vnf_dict)
+        region_name = vnf_dict.get('placement_attr', {}).get('region_name',
+                                                             None)
+        try:
+            LOG.debug(_("Policy %s action is in progress") %
+                      policy)
+            mgmt_url = self._vnf_manager.invoke(
+                infra_driver,
+                'scale_wait',
+                plugin=self,
+                context=context,
+                auth_attr=vim_auth,
+                policy=policy,
+                region_name=region_name
+            )
+            LOG.debug(_("Policy %s action is completed successfully") %
+                      policy)
+            self._handle_vnf_scaling_post(context, policy, constants.ACTIVE,
+                                          mgmt_url)
+            # TODO(kanagaraj-manickam): Add support for config and mgmt
+        except Exception as e:
+            LOG.error(_("Policy %s action is failed to complete") %
+                      policy)
+            with excutils.save_and_reraise_exception():
+                self.set_vnf_error_status_reason(
+                    context,
+                    policy['vnf_id'],
+                    six.text_type(e))
+                self._handle_vnf_scaling_post(context, policy,
+                                              constants.ERROR)
+
     def _report_deprecated_yaml_str(self):
         utils.deprecate_warning(what='yaml as string',
                                 as_of='N', in_favor_of='yaml as dictionary')
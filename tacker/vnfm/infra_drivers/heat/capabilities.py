@@ -0,0 +1,153 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from six import iteritems
+
+from tacker.common import clients
+
+LOG = logging.getLogger(__name__)
+
+OPTS = [
+    cfg.IntOpt('capability_cache_ttl',
+               default=3600,
+               help=_("Seconds the heat resource properties supported by a "
+                      "VIM region are trusted before they are discovered "
+                      "again in the background")),
+]
+cfg.CONF.register_opts(OPTS, group='tacker_heat')
+
+# Global map of individual resource type and
+# incompatible properties, alternate properties pair for
+# upgrade/downgrade across all Heat template versions (starting Kilo)
+#
+# Maintains a dictionary of {"resource type": {dict of "incompatible
+# property": "alternate_prop"}}
+
+HEAT_VERSION_INCOMPATIBILITY_MAP = {'OS::Neutron::Port': {
+    'port_security_enabled': 'value_specs', }, }
+
+
+def find_unsupported_resource_prop(resource_attr_support):
+    """Return the incompatible properties a heat service lacks.
+
+    :param resource_attr_support: callable taking a resource type and a
+                                  property name, telling if heat supports
+                                  the property
+    """
+    unsupported_resource_prop = {}
+
+    for res, prop_dict in iteritems(HEAT_VERSION_INCOMPATIBILITY_MAP):
+        unsupported_prop = {}
+        for prop, val in iteritems(prop_dict):
+            if not resource_attr_support(res, prop):
+                unsupported_prop.update(prop_dict)
+        if unsupported_prop:
+            unsupported_resource_prop[res] = unsupported_prop
+    return unsupported_resource_prop
+
+
+def _discover(auth_attr, region_name):
+    resource_types = clients.OpenstackClients(
+        auth_attr, region_name).heat.resource_types
+
+    def resource_attr_support(resource_name, property_name):
+        return property_name in resource_types.get(
+            resource_name)['attributes']
+
+    return find_unsupported_resource_prop(resource_attr_support)
+
+
+class CapabilityCache(object):
+    """Unsupported heat resource properties of every VIM region.
+
+    Properties only change when the heat service of a VIM is upgraded, so
+    they are discovered once per region and rediscovered in the background
+    once their time to live has passed; stale entries keep being served
+    meanwhile. Only the very first lookup of a region that was never
+    refreshed in the background waits for the discovery.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}      # (auth_url, region_name) => (expiry, props)
+        self._refreshing = set()
+
+    @staticmethod
+    def _key(auth_attr, region_name):
+        return auth_attr['auth_url'], region_name
+
+    def _store(self, key, unsupported_res_prop):
+        ttl = cfg.CONF.tacker_heat.capability_cache_ttl
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, unsupported_res_prop)
+
+    def get(self, auth_attr, region_name=None, discover=None):
+        """Return the unsupported resource properties of a VIM region.
+
+        :param discover: callable returning the unsupported properties,
+                         defaults to querying the heat service of the VIM
+        """
+        key = self._key(auth_attr, region_name)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            discover = discover or (lambda: _discover(auth_attr,
+                                                      region_name))
+            unsupported_res_prop = discover()
+            self._store(key, unsupported_res_prop)
+            return unsupported_res_prop
+        if entry[0] <= time.time():
+            self.refresh(auth_attr, [region_name], discover)
+        return entry[1]
+
+    def refresh(self, auth_attr, region_names, discover=None):
+        """Discover the properties of VIM regions in the background."""
+        auth_attr = copy.deepcopy(auth_attr)
+        for region_name in region_names:
+            key = self._key(auth_attr, region_name)
+            with self._lock:
+                if key in self._refreshing:
+                    continue
+                self._refreshing.add(key)
+            thread = threading.Thread(
+                target=self._refresh,
+                args=(key, discover or (lambda region_name=region_name:
+                                        _discover(auth_attr, region_name))))
+            thread.daemon = True
+            thread.start()
+
+    def _refresh(self, key, discover):
+        try:
+            self._store(key, discover())
+            LOG.debug('Refreshed heat capabilities of %s', key)
+        except Exception:
+            LOG.exception(_('Unable to discover heat capabilities of %s'),
+                          key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, auth_url=None):
+        """Forget the properties, optionally only those of one auth_url."""
+        with self._lock:
+            for key in list(self._entries):
+                if auth_url is None or key[0] == auth_url:
+                    del self._entries[key]
+
+
+CAPABILITY_CACHE = CapabilityCache()
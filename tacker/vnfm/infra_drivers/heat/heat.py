@@ -31,6 +31,10 @@ from tacker.common import clients
 from tacker.common import log
 from tacker.extensions import vnfm
 from tacker.vnfm.infra_drivers import abstract_driver
+from tacker.vnfm.infra_drivers.heat import capabilities
+from tacker.vnfm.infra_drivers.heat import stack_waiter
+from tacker.vnfm.infra_drivers.heat import translation_cache
+from tacker.vnfm.infra_drivers.heat import vnfd_translation
 from tacker.vnfm.infra_drivers import scale_driver
 from tacker.vnfm.tosca import utils as toscautils
 
@@ -56,22 +60,14 @@ CONF.register_opts(OPTS, group='tacker_heat')
 
 
 def config_opts():
-    return [('tacker_heat', OPTS)]
+    return [('tacker_heat',
+             OPTS + stack_waiter.OPTS + translation_cache.OPTS +
+             capabilities.OPTS)]
 
 STACK_RETRIES = cfg.CONF.tacker_heat.stack_retries
 STACK_RETRY_WAIT = cfg.CONF.tacker_heat.stack_retry_wait
 STACK_FLAVOR_EXTRA = cfg.CONF.tacker_heat.flavor_extra_specs
 
-# Global map of individual resource type and
-# incompatible properties, alternate properties pair for
-# upgrade/downgrade across all Heat template versions (starting Kilo)
-#
-# Maintains a dictionary of {"resource type": {dict of "incompatible
-# property": "alternate_prop"}}
-
-HEAT_VERSION_INCOMPATIBILITY_MAP = {'OS::Neutron::Port': {
-    'port_security_enabled': 'value_specs', }, }
-
 HEAT_TEMPLATE_BASE = """
 heat_template_version: 2013-05-23
 """
@@ -83,6 +79,113 @@ def get_scaling_policy_name(action, policy_name):
     return '%s_scale_%s' % (policy_name, action)
 
 
+def generate_hot_scaling(vnfd_dict,
+                         scale_resource_type="OS::Nova::Server"):
+    # Initialize the template
+    template_dict = yaml.load(HEAT_TEMPLATE_BASE)
+    template_dict['description'] = 'Tacker scaling template'
+
+    parameters = {}
+    template_dict['parameters'] = parameters
+
+    # Add scaling related resource defs
+    resources = {}
+    scaling_group_names = {}
+
+    # TODO(kanagaraj-manickam) now only one group is supported, so name
+    # is hard-coded with G1
+    def _get_scale_group_name(targets):
+        return 'G1'
+
+    def _convert_to_heat_scaling_group(policy_prp,
+                                       scale_resource_type,
+                                       name):
+        group_hot = {'type': 'OS::Heat::AutoScalingGroup'}
+        properties = {}
+        properties['min_size'] = policy_prp['min_instances']
+        properties['max_size'] = policy_prp['max_instances']
+        properties['desired_capacity'] = policy_prp[
+            'default_instances']
+        properties['cooldown'] = policy_prp['cooldown']
+        properties['resource'] = {}
+        # TODO(kanagaraj-manickam) all VDU memebers are considered as 1
+        # group now and make it to form the groups based on the VDU
+        # list mentioned in the policy's targets
+        # scale_resource_type is custome type mapped the HOT template
+        # generated for all VDUs in the tosca template
+        properties['resource']['type'] = scale_resource_type
+
+        # TODO(kanagraj-manickam) add custom type params here, to
+        # support parameterized template
+        group_hot['properties'] = properties
+
+        return group_hot
+
+    # tosca policies
+    #
+    # properties:
+    #   adjust_by: 1
+    #   cooldown: 120
+    #   targets: [G1]
+    def _convert_to_heat_scaling_policy(policy_prp, name):
+        # Form the group
+        scale_grp = _get_scale_group_name(policy_prp['targets'])
+        scaling_group_names[name] = scale_grp
+        resources[scale_grp] = _convert_to_heat_scaling_group(
+            policy_prp,
+            scale_resource_type,
+            scale_grp)
+
+        grp_id = {'get_resource': scale_grp}
+
+        policy_hot = {'type': 'OS::Heat::ScalingPolicy'}
+        properties = {}
+        properties['adjustment_type'] = 'change_in_capacity'
+        properties['cooldown'] = policy_prp['cooldown']
+        properties['scaling_adjustment'] = policy_prp['increment']
+        properties['auto_scaling_group_id'] = grp_id
+        policy_hot['properties'] = properties
+
+        # Add scale_out policy
+        policy_rsc_name = get_scaling_policy_name(
+            action='out',
+            policy_name=name
+        )
+        resources[policy_rsc_name] = policy_hot
+
+        # Add scale_in policy
+        in_value = '-%d' % int(policy_prp['increment'])
+        policy_hot_in = copy.deepcopy(policy_hot)
+        policy_hot_in['properties'][
+            'scaling_adjustment'] = in_value
+        policy_rsc_name = get_scaling_policy_name(
+            action='in',
+            policy_name=name
+        )
+        resources[policy_rsc_name] = policy_hot_in
+
+    #   policies:
+    #     - SP1:
+    #         type: tosca.policy.tacker.Scaling
+    if 'policies' in vnfd_dict:
+        for policy_dict in vnfd_dict['policies']:
+            name, policy = policy_dict.items()[0]
+            if policy['type'] == 'tosca.policy.tacker.Scaling':
+                _convert_to_heat_scaling_policy(policy['properties'],
+                                                name)
+                # TODO(kanagaraj-manickam) only one policy is supported
+                # for all vdus. remove this break, once this limitation
+                # is addressed.
+                break
+
+    template_dict['resources'] = resources
+
+    # First return value helps to check if scaling resources exist
+    return ((len(template_dict['resources']) > 0),
+            scaling_group_names,
+            template_dict)
+
+
 class DeviceHeat(abstract_driver.DeviceAbstractDriver,
                  scale_driver.VnfScaleAbstractDriver):
     """Heat driver of hosting vnf."""
@@ -133,6 +236,25 @@ class DeviceHeat(abstract_driver.DeviceAbstractDriver,
 
             vnfd_dict['mgmt_driver'] = toscautils.get_mgmt_driver(
                 tosca)
+
+            # translate once now when the HOT does not depend on the input
+            # values, so that VNFs only have to fill in their parameters
+            inputs = vnfd_translation.get_substitutable_inputs(
+                tosca, inner_vnfd_dict)
+            if inputs is not None:
+                try:
+                    translated = self._translate_tosca(tosca,
+                                                       inner_vnfd_dict, {})
+                except Exception as e:
+                    # VNF creation translates it with the input values
+                    LOG.warning(_('VNFD not translated at onboarding: %s'),
+                                e)
+                else:
+                    attributes = vnfd_dict['attributes']
+                    attributes[vnfd_translation.VALIDATED_ATTR] = 'true'
+                    attributes[vnfd_translation.TRANSLATION_ATTR] = (
+                        vnfd_translation.make_translation(translated,
+                                                          inputs))
         else:
             KEY_LIST = (('name', 'template_name'),
                         ('description', 'description'))
@@ -255,16 +377,58 @@ class DeviceHeat(abstract_driver.DeviceAbstractDriver,
             networks_list.append(dict(network_param))
 
     def fetch_unsupported_resource_prop(self, heat_client):
-        unsupported_resource_prop = {}
+        return capabilities.find_unsupported_resource_prop(
+            heat_client.resource_attr_support)
 
-        for res, prop_dict in iteritems(HEAT_VERSION_INCOMPATIBILITY_MAP):
-            unsupported_prop = {}
-            for prop, val in iteritems(prop_dict):
-                if not heat_client.resource_attr_support(res, prop):
-                    unsupported_prop.update(prop_dict)
-            if unsupported_prop:
-                unsupported_resource_prop[res] = unsupported_prop
-        return unsupported_resource_prop
+    @log.log
+    def _translate_tosca(self, tosca, vnfd_dict, parsed_params,
+                         unsupported_res_prop=None):
+        """Translate a parsed TOSCA VNFD to HOT.
+
+        :returns: dict of strings, with the main template, the nested
+                  template files, the scaling group names and the
+                  monitoring policy
+        """
+        monitoring_dict = toscautils.get_vdu_monitoring(tosca)
+        mgmt_ports = toscautils.get_mgmt_ports(tosca)
+        res_tpl = toscautils.get_resources_dict(tosca,
+                                                STACK_FLAVOR_EXTRA)
+        toscautils.post_process_template(tosca)
+        try:
+            translator = TOSCATranslator(tosca, parsed_params)
+            heat_template_yaml = translator.translate()
+        except Exception as e:
+            LOG.debug("heat-translator error: %s", str(e))
+            raise vnfm.HeatTranslatorFailed(error_msg_details=str(e))
+        heat_template_yaml = toscautils.post_process_heat_template(
+            heat_template_yaml, mgmt_ports, res_tpl,
+            unsupported_res_prop)
+
+        translated = {'template': heat_template_yaml,
+                      'files': None,
+                      'scaling_group_names': None,
+                      'monitoring_policy': None}
+        if monitoring_dict:
+            translated['monitoring_policy'] = jsonutils.dumps(
+                monitoring_dict)
+
+        # Handle scaling here
+        (is_scaling_needed,
+         scaling_group_names,
+         main_dict) = generate_hot_scaling(
+            vnfd_dict['topology_template'],
+            'scaling.yaml')
+
+        if is_scaling_needed:
+            translated['template'] = yaml.dump(main_dict)
+            translated['files'] = {'scaling.yaml': heat_template_yaml}
+            # TODO(kanagaraj-manickam) when multiple groups are
+            # supported, make this scaling atribute as
+            # scaling name vs scaling template map and remove
+            # scaling_group_names
+            translated['scaling_group_names'] = jsonutils.dumps(
+                scaling_group_names)
+        return translated
 
     @log.log
     def create(self, plugin, context, vnf, auth_attr):
@@ -304,153 +468,9 @@ class DeviceHeat(abstract_driver.DeviceAbstractDriver,
 
         region_name = vnf.get('placement_attr', {}).get('region_name', None)
         heatclient_ = HeatClient(auth_attr, region_name)
-        unsupported_res_prop = self.fetch_unsupported_resource_prop(
-            heatclient_)
-
-        def generate_hot_from_tosca(vnfd_dict):
-            parsed_params = {}
-            if ('param_values' in dev_attrs and
-                    dev_attrs['param_values'] != ""):
-                try:
-                    parsed_params = yaml.load(dev_attrs['param_values'])
-                except Exception as e:
-                    LOG.debug("Params not Well Formed: %s", str(e))
-                    raise vnfm.ParamYAMLNotWellFormed(
-                        error_msg_details=str(e))
-
-            toscautils.updateimports(vnfd_dict)
-
-            try:
-                tosca = ToscaTemplate(parsed_params=parsed_params,
-                                      a_file=False,
-                                      yaml_dict_tpl=vnfd_dict)
-
-            except Exception as e:
-                LOG.debug("tosca-parser error: %s", str(e))
-                raise vnfm.ToscaParserFailed(error_msg_details=str(e))
-
-            monitoring_dict = toscautils.get_vdu_monitoring(tosca)
-            mgmt_ports = toscautils.get_mgmt_ports(tosca)
-            res_tpl = toscautils.get_resources_dict(tosca,
-                                                    STACK_FLAVOR_EXTRA)
-            toscautils.post_process_template(tosca)
-            try:
-                translator = TOSCATranslator(tosca, parsed_params)
-                heat_template_yaml = translator.translate()
-            except Exception as e:
-                LOG.debug("heat-translator error: %s", str(e))
-                raise vnfm.HeatTranslatorFailed(error_msg_details=str(e))
-            heat_template_yaml = toscautils.post_process_heat_template(
-                heat_template_yaml, mgmt_ports, res_tpl,
-                unsupported_res_prop)
-
-            return heat_template_yaml, monitoring_dict
-
-        def generate_hot_scaling(vnfd_dict,
-                                 scale_resource_type="OS::Nova::Server"):
-            # Initialize the template
-            template_dict = yaml.load(HEAT_TEMPLATE_BASE)
-            template_dict['description'] = 'Tacker scaling template'
-
-            parameters = {}
-            template_dict['parameters'] = parameters
-
-            # Add scaling related resource defs
-            resources = {}
-            scaling_group_names = {}
-
-            # TODO(kanagaraj-manickam) now only one group is supported, so name
-            # is hard-coded with G1
-            def _get_scale_group_name(targets):
-                return 'G1'
-
-            def _convert_to_heat_scaling_group(policy_prp,
-                                               scale_resource_type,
-                                               name):
-                group_hot = {'type': 'OS::Heat::AutoScalingGroup'}
-                properties = {}
-                properties['min_size'] = policy_prp['min_instances']
-                properties['max_size'] = policy_prp['max_instances']
-                properties['desired_capacity'] = policy_prp[
-                    'default_instances']
-                properties['cooldown'] = policy_prp['cooldown']
-                properties['resource'] = {}
-                # TODO(kanagaraj-manickam) all VDU memebers are considered as 1
-                # group now and make it to form the groups based on the VDU
-                # list mentioned in the policy's targets
-                # scale_resource_type is custome type mapped the HOT template
-                # generated for all VDUs in the tosca template
-                properties['resource']['type'] = scale_resource_type
-
-                # TODO(kanagraj-manickam) add custom type params here, to
-                # support parameterized template
-                group_hot['properties'] = properties
-
-                return group_hot
-
-            # tosca policies
-            #
-            # properties:
-            #   adjust_by: 1
-            #   cooldown: 120
-            #   targets: [G1]
-            def _convert_to_heat_scaling_policy(policy_prp, name):
-                # Form the group
-                scale_grp = _get_scale_group_name(policy_prp['targets'])
-                scaling_group_names[name] = scale_grp
-                resources[scale_grp] = _convert_to_heat_scaling_group(
-                    policy_prp,
-                    scale_resource_type,
-                    scale_grp)
-
-                grp_id = {'get_resource': scale_grp}
-
-                policy_hot = {'type': 'OS::Heat::ScalingPolicy'}
-                properties = {}
-                properties['adjustment_type'] = 'change_in_capacity'
-                properties['cooldown'] = policy_prp['cooldown']
-                properties['scaling_adjustment'] = policy_prp['increment']
-                properties['auto_scaling_group_id'] = grp_id
-                policy_hot['properties'] = properties
-
-                # Add scale_out policy
-                policy_rsc_name = get_scaling_policy_name(
-                    action='out',
-                    policy_name=name
-                )
-                resources[policy_rsc_name] = policy_hot
-
-                # Add scale_in policy
-                in_value = '-%d' % int(policy_prp['increment'])
-                policy_hot_in = copy.deepcopy(policy_hot)
-                policy_hot_in['properties'][
-                    'scaling_adjustment'] = in_value
-                policy_rsc_name = get_scaling_policy_name(
-                    action='in',
-                    policy_name=name
-                )
-                resources[policy_rsc_name] = policy_hot_in
-
-            #   policies:
-            #     - SP1:
-            #         type: tosca.policy.tacker.Scaling
-            if 'policies' in vnfd_dict:
-                for policy_dict in vnfd_dict['policies']:
-                    name, policy = policy_dict.items()[0]
-                    if policy['type'] == 'tosca.policy.tacker.Scaling':
-                        _convert_to_heat_scaling_policy(policy['properties'],
-                                                        name)
-                        # TODO(kanagaraj-manickam) only one policy is supported
-                        # for all vdus. remove this break, once this limitation
-                        # is addressed.
-                        break
-
-            template_dict['resources'] = resources
-
-            # First return value helps to check if scaling resources exist
-            return ((len(template_dict['resources']) > 0),
-                    scaling_group_names,
-                    template_dict)
+        unsupported_res_prop = capabilities.CAPABILITY_CACHE.get(
+            auth_attr, region_name,
+            lambda: self.fetch_unsupported_resource_prop(heatclient_))
 
         def generate_hot_from_legacy(vnfd_dict):
             assert 'template' not in fields
@@ -534,47 +554,85 @@ class DeviceHeat(abstract_driver.DeviceAbstractDriver,
 
             return heat_template_yaml, monitoring_dict
 
+        def apply_tosca_translation(translated):
+            fields['template'] = translated['template']
+            if translated['files']:
+                fields['files'] = dict(translated['files'])
+                vnf['attributes']['heat_template'] = translated['template']
+                vnf['attributes']['scaling.yaml'] = translated['files'][
+                    'scaling.yaml']
+                vnf['attributes']['scaling_group_names'] = translated[
+                    'scaling_group_names']
+            elif not vnf['attributes'].get('heat_template'):
+                vnf['attributes']['heat_template'] = fields['template']
+
+            if translated['monitoring_policy']:
+                vnf['attributes']['monitoring_policy'] = translated[
+                    'monitoring_policy']
+
+        def parse_params():
+            parsed_params = {}
+            if ('param_values' in dev_attrs and
+                    dev_attrs['param_values'] != ""):
+                try:
+                    parsed_params = yaml.load(dev_attrs['param_values'])
+                except Exception as e:
+                    LOG.debug("Params not Well Formed: %s", str(e))
+                    raise vnfm.ParamYAMLNotWellFormed(
+                        error_msg_details=str(e))
+            return parsed_params
+
+        def generate_hot_from_tosca(vnfd_dict):
+            parsed_params = parse_params()
+
+            translation = attributes.get(vnfd_translation.TRANSLATION_ATTR)
+            if translation:
+                translated = vnfd_translation.instantiate(
+                    translation, parsed_params, unsupported_res_prop)
+                if translated is not None:
+                    LOG.debug('Using translation of the VNFD')
+                    return translated
+
+            toscautils.updateimports(vnfd_dict)
+
+            try:
+                tosca = ToscaTemplate(parsed_params=parsed_params,
+                                      a_file=False,
+                                      yaml_dict_tpl=vnfd_dict)
+
+            except Exception as e:
+                LOG.debug("tosca-parser error: %s", str(e))
+                raise vnfm.ToscaParserFailed(error_msg_details=str(e))
+
+            return self._translate_tosca(tosca, vnfd_dict, parsed_params,
+                                         unsupported_res_prop)
+
         def generate_hot():
+            # identical VNFDs instantiated with identical parameters
+            # translate to the same HOT, so skip tosca-parser for them
+            cache_key = translation_cache.make_key(
+                vnfd_yaml, dev_attrs.get('param_values'),
+                unsupported_res_prop)
+            translated = translation_cache.TRANSLATION_CACHE.get(cache_key)
+            if translated is not None:
+                LOG.debug('Using cached translation %s', cache_key)
+                apply_tosca_translation(translated)
+                return
+
             vnfd_dict = yamlparser.simple_ordered_parse(vnfd_yaml)
             LOG.debug('vnfd_dict %s', vnfd_dict)
 
-            is_tosca_format = False
             if 'tosca_definitions_version' in vnfd_dict:
-                (heat_template_yaml,
-                 monitoring_dict) = generate_hot_from_tosca(vnfd_dict)
-                is_tosca_format = True
-            else:
-                (heat_template_yaml,
-                 monitoring_dict) = generate_hot_from_legacy(vnfd_dict)
+                translated = generate_hot_from_tosca(vnfd_dict)
+                translation_cache.TRANSLATION_CACHE.put(cache_key,
+                                                        translated)
+                apply_tosca_translation(translated)
+                return
 
-            fields['template'] = heat_template_yaml
+            (heat_template_yaml,
+             monitoring_dict) = generate_hot_from_legacy(vnfd_dict)
 
-            # Handle scaling here
-            if is_tosca_format:
-                (is_scaling_needed,
-                 scaling_group_names,
-                 main_dict) = generate_hot_scaling(
-                    vnfd_dict['topology_template'],
-                    'scaling.yaml')
-
-                if is_scaling_needed:
-                    main_yaml = yaml.dump(main_dict)
-                    fields['template'] = main_yaml
-                    fields['files'] = {'scaling.yaml': heat_template_yaml}
-                    vnf['attributes']['heat_template'] = main_yaml
-                    # TODO(kanagaraj-manickam) when multiple groups are
-                    # supported, make this scaling atribute as
-                    # scaling name vs scaling template map and remove
-                    # scaling_group_names
-                    vnf['attributes']['scaling.yaml'] = heat_template_yaml
-                    vnf['attributes'][
-                        'scaling_group_names'] = jsonutils.dumps(
-                        scaling_group_names
-                    )
-                else:
-                    if not vnf['attributes'].get('heat_template'):
-                        vnf['attributes'][
-                            'heat_template'] = fields['template']
+            fields['template'] = heat_template_yaml
 
             if monitoring_dict:
                     vnf['attributes']['monitoring_policy'] = \
@@ -610,37 +668,30 @@ class DeviceHeat(abstract_driver.DeviceAbstractDriver,
 
         stack = heatclient_.get(vnf_id)
         status = stack.stack_status
-        stack_retries = STACK_RETRIES
-        error_reason = None
-        while status == 'CREATE_IN_PROGRESS' and stack_retries > 0:
-            time.sleep(STACK_RETRY_WAIT)
-            try:
+        error_reason = stack.stack_status_reason
+        if status == 'CREATE_IN_PROGRESS':
+            result = stack_waiter.STACK_WAITER.wait(
+                heatclient_, vnf_id, status, STACK_RETRIES * STACK_RETRY_WAIT)
+            if result is None:
+                error_reason = _("Resource creation is not completed within"
+                               " {wait} seconds as creation of stack {stack}"
+                               " is not completed").format(
+                                   wait=(STACK_RETRIES * STACK_RETRY_WAIT),
+                                   stack=vnf_id)
+                LOG.warning(_("VNF Creation failed: %(reason)s"),
+                        {'reason': error_reason})
+                raise vnfm.VNFCreateWaitFailed(vnf_id=vnf_id,
+                                               reason=error_reason)
+            status, error_reason = result
+            if status == 'CREATE_COMPLETE':
                 stack = heatclient_.get(vnf_id)
-            except Exception:
-                LOG.exception(_("VNF Instance cleanup may not have "
-                                "happened because Heat API request failed "
-                                "while waiting for the stack %(stack)s to be "
-                                "deleted"), {'stack': vnf_id})
-                break
-            status = stack.stack_status
-            LOG.debug(_('status: %s'), status)
-            stack_retries = stack_retries - 1
 
         LOG.debug(_('stack status: %(stack)s %(status)s'),
                   {'stack': str(stack), 'status': status})
-        if stack_retries == 0 and status != 'CREATE_COMPLETE':
-            error_reason = _("Resource creation is not completed within"
-                           " {wait} seconds as creation of stack {stack}"
-                           " is not completed").format(
-                               wait=(STACK_RETRIES * STACK_RETRY_WAIT),
-                               stack=vnf_id)
-            LOG.warning(_("VNF Creation failed: %(reason)s"),
-                    {'reason': error_reason})
-            raise vnfm.VNFCreateWaitFailed(vnf_id=vnf_id,
-                                           reason=error_reason)
-
-        elif stack_retries != 0 and status != 'CREATE_COMPLETE':
-            error_reason = stack.stack_status_reason
+        if status != 'CREATE_COMPLETE':
+            if status is None:
+                error_reason = _("Stack {stack} is not found").format(
+                    stack=vnf_id)
             raise vnfm.VNFCreateWaitFailed(vnf_id=vnf_id,
                                            reason=error_reason)
 
@@ -725,40 +776,29 @@ class DeviceHeat(abstract_driver.DeviceAbstractDriver,
 
         stack = heatclient_.get(vnf_id)
         status = stack.stack_status
-        error_reason = None
-        stack_retries = STACK_RETRIES
-        while (status == 'DELETE_IN_PROGRESS' and stack_retries > 0):
-            time.sleep(STACK_RETRY_WAIT)
-            try:
-                stack = heatclient_.get(vnf_id)
-            except heatException.HTTPNotFound:
+        if status == 'DELETE_IN_PROGRESS':
+            result = stack_waiter.STACK_WAITER.wait(
+                heatclient_, vnf_id, status, STACK_RETRIES * STACK_RETRY_WAIT)
+            if result is None:
+                error_reason = _("Resource cleanup for vnf is"
+                                 " not completed within {wait} seconds as "
+                                 "deletion of Stack {stack} is "
+                                 "not completed").format(stack=vnf_id,
+                                 wait=(STACK_RETRIES * STACK_RETRY_WAIT))
+                LOG.warning(error_reason)
+                raise vnfm.VNFCreateWaitFailed(vnf_id=vnf_id,
+                                               reason=error_reason)
+            status = result[0]
+            if status is None:
                 return
-            except Exception:
-                LOG.exception(_("VNF Instance cleanup may not have "
-                                "happened because Heat API request failed "
-                                "while waiting for the stack %(stack)s to be "
-                                "deleted"), {'stack': vnf_id})
-                break
-            status = stack.stack_status
-            stack_retries = stack_retries - 1
-
-        if stack_retries == 0 and status != 'DELETE_COMPLETE':
-            error_reason = _("Resource cleanup for vnf is"
-                             " not completed within {wait} seconds as "
-                             "deletion of Stack {stack} is "
-                             "not completed").format(stack=vnf_id,
-                             wait=(STACK_RETRIES * STACK_RETRY_WAIT))
-            LOG.warning(error_reason)
-            raise vnfm.VNFCreateWaitFailed(vnf_id=vnf_id,
-                                           reason=error_reason)
 
-        if stack_retries != 0 and status != 'DELETE_COMPLETE':
+        if status != 'DELETE_COMPLETE':
             error_reason = _("vnf {vnf_id} deletion is not completed. "
                             "{stack_status}").format(vnf_id=vnf_id,
                             stack_status=status)
             LOG.warning(error_reason)
             raise vnfm.VNFCreateWaitFailed(vnf_id=vnf_id,
-                                           eason=error_reason)
+                                           reason=error_reason)
 
     @classmethod
     def _find_mgmt_ips_from_groups(cls,
@@ -886,6 +926,11 @@ class HeatClient(object):
     def get(self, stack_id):
         return self.stacks.get(stack_id)
 
+    def list_stacks(self, stack_ids):
+        """Return the stacks with the given ids, deleted ones included."""
+        return self.stacks.list(filters={'id': stack_ids},
+                                show_deleted=True)
+
     def resource_attr_support(self, resource_name, property_name):
         resource = self.resource_types.get(resource_name)
         return property_name in resource['attributes']
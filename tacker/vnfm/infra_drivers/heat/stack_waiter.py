@@ -0,0 +1,165 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+OPTS = [
+    cfg.FloatOpt('stack_poll_min_interval',
+                 default=1,
+                 help=_("Shortest wait (in seconds) between two stack status "
+                        "polls of the shared stack waiter")),
+    cfg.FloatOpt('stack_poll_max_interval',
+                 default=10,
+                 help=_("Longest wait (in seconds) between two stack status "
+                        "polls when no stack changes state")),
+    cfg.IntOpt('stack_poll_batch_size',
+               default=100,
+               help=_("Maximum number of stacks queried in one stack list "
+                      "request")),
+]
+cfg.CONF.register_opts(OPTS, group='tacker_heat')
+
+BACKOFF_FACTOR = 1.5
+
+
+class _PendingStack(object):
+    def __init__(self, in_progress_status):
+        self.in_progress_status = in_progress_status
+        self.done = threading.Event()
+        self.result = None
+
+    def resolve(self, status, reason):
+        self.result = (status, reason)
+        self.done.set()
+
+
+class StackWaiter(object):
+    """Wait for many heat stacks with one polling thread.
+
+    Stacks are grouped by heat client, that is by VIM and region, and every
+    group is polled with a single stack list request per round. The poll
+    interval backs off while nothing changes and is reset whenever a stack
+    reaches a new state or a new stack is waited for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id(heat client) => (HeatClient, {stack_id: [_PendingStack]})
+        self._groups = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            LOG.debug('Spawning heat stack waiter thread')
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def wait(self, heatclient_, stack_id, in_progress_status, timeout):
+        """Wait until a stack leaves in_progress_status.
+
+        :returns: (stack_status, stack_status_reason), stack_status being
+                  None if the stack no longer exists, or None on timeout
+        """
+        pending = _PendingStack(in_progress_status)
+        key = id(heatclient_.heat)
+        with self._lock:
+            group = self._groups.setdefault(key, (heatclient_, {}))
+            group[1].setdefault(stack_id, []).append(pending)
+            self._ensure_thread()
+        self._wakeup.set()
+
+        if not pending.done.wait(timeout):
+            with self._lock:
+                self._discard(key, stack_id, pending)
+        return pending.result
+
+    def _discard(self, key, stack_id, pending):
+        group = self._groups.get(key)
+        if not group:
+            return
+        waiters = group[1].get(stack_id, [])
+        if pending in waiters:
+            waiters.remove(pending)
+        if not waiters:
+            group[1].pop(stack_id, None)
+        if not group[1]:
+            del self._groups[key]
+
+    def _run(self):
+        conf = cfg.CONF.tacker_heat
+        interval = conf.stack_poll_min_interval
+        next_poll = time.time() + interval
+        while True:
+            if self._wakeup.wait(max(next_poll - time.time(), 0)):
+                self._wakeup.clear()
+                interval = conf.stack_poll_min_interval
+                next_poll = min(next_poll, time.time() + interval)
+                if time.time() < next_poll:
+                    continue
+
+            with self._lock:
+                groups = [(key, group[0], list(group[1]))
+                          for key, group in self._groups.items()]
+            changed = False
+            for key, heatclient_, stack_ids in groups:
+                try:
+                    changed |= self._poll(key, heatclient_, stack_ids)
+                except Exception:
+                    LOG.exception(_("Heat API request failed while waiting "
+                                    "for stacks %s"), stack_ids)
+
+            if changed:
+                interval = conf.stack_poll_min_interval
+            else:
+                interval = min(interval * BACKOFF_FACTOR,
+                               conf.stack_poll_max_interval)
+            next_poll = time.time() + interval
+
+    def _poll(self, key, heatclient_, stack_ids):
+        batch_size = cfg.CONF.tacker_heat.stack_poll_batch_size
+        stacks = {}
+        for i in range(0, len(stack_ids), batch_size):
+            for stack in heatclient_.list_stacks(stack_ids[i:i + batch_size]):
+                stacks[stack.id] = stack
+
+        changed = False
+        with self._lock:
+            group = self._groups.get(key)
+            if not group:
+                return changed
+            for stack_id in stack_ids:
+                stack = stacks.get(stack_id)
+                for pending in list(group[1].get(stack_id, [])):
+                    if stack is None:
+                        pending.resolve(None, None)
+                    elif stack.stack_status != pending.in_progress_status:
+                        pending.resolve(stack.stack_status,
+                                        stack.stack_status_reason)
+                    else:
+                        continue
+                    LOG.debug('stack %(stack)s is %(status)s',
+                              {'stack': stack_id,
+                               'status': pending.result[0]})
+                    changed = True
+                    self._discard(key, stack_id, pending)
+        return changed
+
+
+STACK_WAITER = StackWaiter()
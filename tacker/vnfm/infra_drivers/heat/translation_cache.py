@@ -0,0 +1,128 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import encodeutils
+
+LOG = logging.getLogger(__name__)
+
+OPTS = [
+    cfg.IntOpt('translation_cache_size',
+               default=256,
+               help=_("Number of TOSCA to HOT translations kept in memory; "
+                      "0 disables the translation cache")),
+    cfg.StrOpt('translation_cache_dir',
+               help=_("Directory where TOSCA to HOT translations are also "
+                      "stored, so they survive restarts and are shared by "
+                      "API workers")),
+]
+cfg.CONF.register_opts(OPTS, group='tacker_heat')
+
+
+def make_key(vnfd_yaml, param_values, unsupported_res_prop):
+    """Return the cache key of a translation.
+
+    A translation only depends on the VNFD, the input parameters and the
+    heat resource properties the VIM does not support.
+    """
+    digest = hashlib.sha256()
+    for part in (vnfd_yaml, param_values or '',
+                 jsonutils.dumps(unsupported_res_prop or {},
+                                 sort_keys=True)):
+        digest.update(encodeutils.safe_encode(part))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class TranslationCache(object):
+    """LRU cache of translated HOT templates with an optional disk tier.
+
+    Values are dicts of strings (templates and JSON documents), so cached
+    entries can be handed out without copying.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def _enabled():
+        return cfg.CONF.tacker_heat.translation_cache_size > 0
+
+    @staticmethod
+    def _path(key):
+        cache_dir = cfg.CONF.tacker_heat.translation_cache_dir
+        if cache_dir:
+            return os.path.join(cache_dir, key + '.json')
+
+    def get(self, key):
+        if not self._enabled():
+            return None
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+                return value
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    value = jsonutils.loads(f.read())
+            except (IOError, ValueError):
+                LOG.warning(_('Ignoring unreadable translation cache file '
+                              '%s'), path)
+                return None
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        if not self._enabled():
+            return
+        self._remember(key, value)
+
+        path = self._path(key)
+        if not path:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'w') as f:
+                f.write(jsonutils.dumps(value))
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            LOG.warning(_('Unable to store translation in %s'), path)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while (len(self._entries) >
+                   cfg.CONF.tacker_heat.translation_cache_size):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+TRANSLATION_CACHE = TranslationCache()
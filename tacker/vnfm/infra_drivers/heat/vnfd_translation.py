@@ -0,0 +1,156 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""TOSCA VNFDs translated once, when they are onboarded.
+
+heat-translator turns TOSCA inputs into HOT parameters and get_input into
+get_param, so the parameter values only end up as parameter defaults. This
+holds as long as inputs are only referenced from node properties handed to
+heat-translator; properties tacker reads itself (flavor capabilities,
+image artifacts, monitoring policies, connection points...) resolve the
+inputs before translation. VNFDs of the first kind are translated when they
+are created and VNF creation only fills in the parameter defaults.
+"""
+
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from toscaparser.dataentity import DataEntity
+from toscaparser.parameters import Input
+from toscaparser.utils import yamlparser
+import yaml
+
+from tacker.extensions import vnfm
+from tacker.vnfm.tosca import utils as toscautils
+
+LOG = logging.getLogger(__name__)
+
+# VNFD attribute holding the translation
+TRANSLATION_ATTR = 'vnfd_translation'
+VALIDATED_ATTR = 'validated'
+
+SIMPLE_INPUT_TYPES = ('string', 'integer', 'float', 'boolean')
+
+
+def _has_get_input(value):
+    if isinstance(value, dict):
+        return 'get_input' in value or any(
+            _has_get_input(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_get_input(v) for v in value)
+    return False
+
+
+def get_substitutable_inputs(tosca, vnfd_dict):
+    """Return the inputs of a VNFD translated independently of them.
+
+    :param tosca: ToscaTemplate of the VNFD, before post processing
+    :param vnfd_dict: VNFD as a dict
+    :returns: dict of input name => input schema, or None if the HOT
+              depends on input values beyond the parameter defaults
+    """
+    topology = vnfd_dict.get('topology_template') or {}
+    for section, value in topology.items():
+        if (section not in ('inputs', 'node_templates') and
+                _has_get_input(value)):
+            return None
+
+    for nt in tosca.nodetemplates:
+        properties = nt.entity_tpl.get('properties') or {}
+        if any(_has_get_input(value) for key, value
+               in nt.entity_tpl.items() if key != 'properties'):
+            return None
+        if nt.type_definition.is_derived_from(toscautils.TACKERCP):
+            # every property value of a CP may be rewritten by tacker
+            tacker_props = list(properties)
+        elif nt.type_definition.is_derived_from(toscautils.TACKERVDU):
+            tacker_props = toscautils.delpropmap[toscautils.TACKERVDU]
+        else:
+            tacker_props = ()
+        if any(_has_get_input(properties.get(prop))
+               for prop in tacker_props):
+            return None
+
+    inputs = topology.get('inputs') or {}
+    if any(schema.get('type') not in SIMPLE_INPUT_TYPES
+           for schema in inputs.values()):
+        return None
+    return dict(inputs)
+
+
+def make_translation(translated, inputs):
+    return jsonutils.dumps(dict(translated, inputs=inputs))
+
+
+def _parameter_values(inputs, parsed_params):
+    values = {}
+    for name, value in parsed_params.items():
+        try:
+            input_ = Input(name, inputs[name])
+            input_.validate(value)
+        except Exception as e:
+            LOG.debug("tosca-parser error: %s", str(e))
+            raise vnfm.ToscaParserFailed(error_msg_details=str(e))
+        # same conversion and checks as heat-translator
+        try:
+            value = DataEntity.validate_datatype(input_.type, value)
+            if value:
+                for constraint in input_.constraints or []:
+                    constraint.validate(value)
+        except Exception as e:
+            LOG.debug("heat-translator error: %s", str(e))
+            raise vnfm.HeatTranslatorFailed(error_msg_details=str(e))
+        values[name] = value
+    return values
+
+
+def instantiate(translation, parsed_params, unsupported_res_prop=None):
+    """Return the HOT of a translated VNFD for one set of parameters.
+
+    :param translation: value of the VNFD translation attribute
+    :param parsed_params: dict of input values
+    :param unsupported_res_prop: heat resource properties the VIM does not
+                                 support
+    :returns: translation dict as produced by DeviceHeat._translate_tosca,
+              or None if the VNFD has to be translated with the parameters
+    :raises: InputValuesMissing if a required input has no value
+    """
+    translated = jsonutils.loads(translation)
+    inputs = translated.pop('inputs')
+    if not isinstance(parsed_params, dict) or set(parsed_params) - set(
+            inputs):
+        return None
+    for name, schema in inputs.items():
+        if (name not in parsed_params and schema.get('default') is None and
+                schema.get('required', True)):
+            raise vnfm.InputValuesMissing(key=name)
+    values = _parameter_values(inputs, parsed_params)
+    if not values and not unsupported_res_prop:
+        return translated
+
+    # the resources are in the nested template of scaled VNFs
+    files = translated['files']
+    heat_dict = yamlparser.simple_ordered_parse(
+        files['scaling.yaml'] if files else translated['template'])
+    parameters = heat_dict.get('parameters') or {}
+    for name, value in values.items():
+        if name not in parameters:
+            return None
+        parameters[name]['default'] = value
+    if unsupported_res_prop:
+        toscautils.convert_unsupported_res_prop(heat_dict,
+                                                unsupported_res_prop)
+    heat_template_yaml = yaml.dump(heat_dict)
+    if files:
+        translated['files'] = {'scaling.yaml': heat_template_yaml}
+    else:
+        translated['template'] = heat_template_yaml
+    return translated
@@ -0,0 +1,249 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tasks waiting for VNF lifecycle operations to complete.
+
+Once the infra driver started a create, update, delete or scale, a task
+waits for the operation to complete and moves the VNF out of its PENDING_*
+status. With the 'local' backend, tasks run in green threads of the API
+worker that received the request, and are lost if it stops. With the 'db'
+backend, tasks are stored in the database and run by the workers of any
+tacker-server or tacker-conductor process, which lease them. The tasks of
+a worker that died are run again by another worker once their lease
+expired.
+"""
+
+import collections
+import os
+import socket
+import time
+
+import eventlet
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import uuidutils
+
+from tacker._i18n import _LE, _LI, _LW
+from tacker.common import rpc
+from tacker import context as t_context
+from tacker.db.vm import lifecycle_task_db
+
+LOG = logging.getLogger(__name__)
+
+LOCAL = 'local'
+DB = 'db'
+
+CREATE_WAIT = 'create_wait'
+UPDATE_WAIT = 'update_wait'
+DELETE_WAIT = 'delete_wait'
+SCALE_WAIT = 'scale_wait'
+
+OPTS = [
+    cfg.StrOpt('backend', default=LOCAL, choices=[LOCAL, DB],
+               help=_("Where VNF lifecycle tasks run. 'local' runs them in "
+                      "the API worker that received the request. 'db' "
+                      "stores them in the database, to be run by any "
+                      "tacker-server or tacker-conductor worker and run "
+                      "again if their worker dies")),
+    cfg.DictOpt('concurrency',
+                default={CREATE_WAIT: 32, UPDATE_WAIT: 16,
+                         DELETE_WAIT: 32, SCALE_WAIT: 16},
+                help=_("Maximum number of tasks of each type a worker of "
+                       "the 'db' backend runs at once")),
+    cfg.IntOpt('lease_duration', default=60,
+               help=_("Seconds a worker of the 'db' backend leases a task "
+                      "for. Leases are renewed while the task runs; the "
+                      "task of a worker that died is run again once its "
+                      "lease expired")),
+    cfg.FloatOpt('poll_interval', default=1,
+                 help=_("Seconds between two claims of new tasks by a "
+                        "worker of the 'db' backend")),
+    cfg.IntOpt('max_attempts', default=3,
+               help=_("Number of times a task is run before it is "
+                      "abandoned and its VNF set to ERROR")),
+    cfg.BoolOpt('run_in_api', default=True,
+                help=_("Run a worker of the 'db' backend in every "
+                       "tacker-server worker, from the time it starts")),
+]
+cfg.CONF.register_opts(OPTS, 'vnf_lifecycle_tasks')
+
+
+def config_opts():
+    return [('vnf_lifecycle_tasks', OPTS)]
+
+
+class LocalTaskQueue(object):
+    """Run tasks in green threads of this process."""
+
+    def __init__(self, handlers, spawn_n):
+        self._handlers = handlers
+        self._spawn_n = spawn_n
+
+    def submit(self, task_type, context, vnf_dict, vim_auth, **kwargs):
+        self._spawn_n(self._handlers[task_type], context, vnf_dict,
+                      vim_auth, **kwargs)
+
+    def start_worker(self):
+        pass
+
+
+class DbTaskQueue(object):
+    """Store tasks in the database and run them from leasing workers.
+
+    Each worker claims at most as many tasks of a type as the concurrency
+    of the type allows, renews the leases of its running tasks every third
+    of the lease duration and deletes a task once it ran. Handlers record
+    their own failures on the VNF, so a task whose handler raised is not
+    run again. A task whose VIM could not be looked up is given back for
+    another attempt. A task is abandoned after max_attempts attempts,
+    counting those of workers that died.
+
+    :param handlers: dict of task type => callable taking the context, the
+                     VNF, the VIM auth and the keyword arguments of the task
+    :param get_vim: callable returning the VIM auth of a VNF
+    :param abandon: callable called with the context, the task type, the
+                    VNF and the reason when a task is abandoned
+    """
+
+    def __init__(self, handlers, get_vim, abandon):
+        self._handlers = handlers
+        self._get_vim = get_vim
+        self._abandon = abandon
+        self._db = lifecycle_task_db.LifecycleTaskDb()
+        self._serializer = rpc.PluginRpcSerializer(None)
+        self._running = {}      # task id => task type
+        self._worker = None
+        self._worker_pid = None
+        self.owner = None
+
+    @staticmethod
+    def _concurrency():
+        return dict((task_type, int(limit)) for task_type, limit in
+                    cfg.CONF.vnf_lifecycle_tasks.concurrency.items())
+
+    def submit(self, task_type, context, vnf_dict, vim_auth, **kwargs):
+        if task_type not in self._handlers:
+            raise ValueError(_('Unknown lifecycle task %s') % task_type)
+        task_context = self._serializer.serialize_context(context)
+        # the token expires long before some tasks complete, they run with
+        # the VIM credentials
+        task_context.pop('auth_token', None)
+        payload = jsonutils.to_primitive({'vnf': vnf_dict,
+                                          'kwargs': kwargs},
+                                         convert_instances=True)
+        task = self._db.add_task(t_context.get_admin_context(), task_type,
+                                 vnf_dict['id'], task_context, payload)
+        LOG.debug('Submitted %(type)s task %(id)s of vnf %(vnf_id)s',
+                  {'type': task_type, 'id': task['id'],
+                   'vnf_id': vnf_dict['id']})
+        if cfg.CONF.vnf_lifecycle_tasks.run_in_api:
+            self.start_worker()
+
+    def start_worker(self):
+        """Start the worker of this process, if it is not running.
+
+        A forked process starts its own worker.
+        """
+        if self._worker is not None and self._worker_pid == os.getpid():
+            return
+        self._worker_pid = os.getpid()
+        self.owner = '%s:%d:%s' % (socket.gethostname(), self._worker_pid,
+                                   uuidutils.generate_uuid()[:8])
+        self._running = {}
+        self._pool = eventlet.GreenPool(
+            max(sum(self._concurrency().values()), 1))
+        self._worker = eventlet.spawn(self._run)
+        LOG.info(_LI('Lifecycle task worker %s started'), self.owner)
+
+    def wait(self):
+        if self._worker is not None:
+            self._worker.wait()
+
+    def _run(self):
+        renew_at = time.time()
+        while True:
+            lease = cfg.CONF.vnf_lifecycle_tasks.lease_duration
+            try:
+                if time.time() >= renew_at:
+                    self._renew_leases(lease)
+                    renew_at = time.time() + lease / 3.0
+                self._claim_tasks(lease)
+            except Exception:
+                LOG.exception(_LE('Lifecycle task worker error'))
+            eventlet.sleep(cfg.CONF.vnf_lifecycle_tasks.poll_interval)
+
+    def _renew_leases(self, lease):
+        task_ids = list(self._running)
+        held = self._db.renew_leases(t_context.get_admin_context(),
+                                     self.owner, task_ids, lease)
+        if held < len(task_ids):
+            LOG.warning(_LW('Lifecycle task worker %(owner)s lost %(lost)d '
+                            'leases'), {'owner': self.owner,
+                                        'lost': len(task_ids) - held})
+
+    def _claim_tasks(self, lease):
+        context = t_context.get_admin_context()
+        running = collections.Counter(self._running.values())
+        for task_type, limit in self._concurrency().items():
+            free = limit - running[task_type]
+            if free <= 0 or task_type not in self._handlers:
+                continue
+            for task in self._db.claim_tasks(context, task_type, self.owner,
+                                             free, lease):
+                self._running[task['id']] = task_type
+                self._pool.spawn_n(self._execute, task)
+
+    def _execute(self, task):
+        context = t_context.get_admin_context()
+        try:
+            task_context = self._serializer.deserialize_context(
+                task['context'])
+            vnf_dict = task['payload']['vnf']
+            max_attempts = cfg.CONF.vnf_lifecycle_tasks.max_attempts
+            if task['attempts'] > max_attempts:
+                reason = (_('%(type)s task abandoned after %(attempts)d '
+                            'attempts') % {'type': task['task_type'],
+                                           'attempts': max_attempts})
+                LOG.error(_LE('Vnf %(vnf_id)s: %(reason)s'),
+                          {'vnf_id': vnf_dict['id'], 'reason': reason})
+                self._abandon(task_context, task['task_type'], vnf_dict,
+                              reason)
+                self._db.delete_task(context, task['id'], self.owner)
+                return
+            try:
+                vim_auth = self._get_vim(task_context, vnf_dict)
+            except Exception:
+                LOG.exception(_LE('Unable to find the vim of vnf %s, '
+                                  'retrying later'), vnf_dict['id'])
+                self._db.release_task(context, task['id'], self.owner)
+                return
+            try:
+                self._handlers[task['task_type']](
+                    task_context, vnf_dict, vim_auth,
+                    **task['payload']['kwargs'])
+            except Exception:
+                LOG.exception(_LE('%(type)s task %(id)s of vnf %(vnf_id)s '
+                                  'failed'),
+                              {'type': task['task_type'], 'id': task['id'],
+                               'vnf_id': vnf_dict['id']})
+            self._db.delete_task(context, task['id'], self.owner)
+        except Exception:
+            LOG.exception(_LE('Unable to run lifecycle task %s'), task['id'])
+        finally:
+            self._running.pop(task['id'], None)
+
+
+def get_task_queue(handlers, spawn_n, get_vim, abandon):
+    if cfg.CONF.vnf_lifecycle_tasks.backend == DB:
+        return DbTaskQueue(handlers, get_vim, abandon)
+    return LocalTaskQueue(handlers, spawn_n)
@@ -15,10 +15,15 @@
 #    under the License.
 
 import abc
+import heapq
 import inspect
+import itertools
+import os
 import threading
 import time
+import zlib
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
@@ -29,6 +34,7 @@ from tacker.common import clients
 from tacker.common import driver_manager
 from tacker import context as t_context
 from tacker.vnfm.infra_drivers.heat import heat
+from tacker.vnfm import monitor_cluster
 
 
 LOG = logging.getLogger(__name__)
@@ -37,6 +43,18 @@ OPTS = [
     cfg.IntOpt('check_intvl',
                default=10,
                help=_("check interval for monitor")),
+    cfg.IntOpt('probe_pool_size',
+               default=64,
+               help=_("maximum number of monitor probe batches run "
+                      "concurrently")),
+    cfg.IntOpt('probe_batch_size',
+               default=100,
+               help=_("maximum number of due probes handed to a monitor "
+                      "driver in one batch")),
+    cfg.IntOpt('load_batch_size',
+               default=1000,
+               help=_("number of VNFs read from the database at once when "
+                      "the monitor loads the VNFs it monitors")),
 ]
 CONF.register_opts(OPTS, group='monitor')
 
@@ -45,17 +63,70 @@ def config_opts():
     return [('monitor', OPTS), ('tacker', VNFMonitor.OPTS)]
 
 
+class MonitorStats(object):
+    """Lateness and duration of monitor probes.
+
+    A sweep covers every probe that became due within one check interval;
+    it ends when the last of those probes completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last_sweep = {}
+        self._reset(time.time())
+
+    def _reset(self, now):
+        self._window_start = now
+        self._probes = 0
+        self._lateness_total = 0.0
+        self._lateness_max = 0.0
+        self._duration_total = 0.0
+        self._duration_max = 0.0
+        self._last_finish = now
+
+    def record(self, due, started, finished):
+        lateness = max(started - due, 0.0)
+        duration = finished - started
+        with self._lock:
+            self._probes += 1
+            self._lateness_total += lateness
+            self._lateness_max = max(self._lateness_max, lateness)
+            self._duration_total += duration
+            self._duration_max = max(self._duration_max, duration)
+            self._last_finish = max(self._last_finish, finished)
+
+    def rollover(self, now, pending, in_flight):
+        with self._lock:
+            probes = self._probes or 1
+            self.last_sweep = {
+                'probes': self._probes,
+                'sweep_duration': self._last_finish - self._window_start,
+                'lateness_avg': self._lateness_total / probes,
+                'lateness_max': self._lateness_max,
+                'probe_duration_avg': self._duration_total / probes,
+                'probe_duration_max': self._duration_max,
+                'pending': pending,
+                'in_flight': in_flight,
+            }
+            self._reset(now)
+        return self.last_sweep
+
+
 class VNFMonitor(object):
     """VNF Monitor."""
 
     _instance = None
     _hosting_vnfs = dict()   # vnf_id => dict of parameters
+    _schedule = []   # heap of (due, seq, hosting_vnf, vdu, driver)
+    _seq = itertools.count()
     _status_check_intvl = 0
     _lock = threading.RLock()
+    _pid = None
+    _cluster = None
 
     OPTS = [
         cfg.ListOpt(
-            'monitor_driver', default=['ping', 'http_ping'],
+            'monitor_driver', default=['ping', 'http_ping', 'native_ping'],
             help=_('Monitor driver to communicate with '
                    'Hosting VNF/logical service '
                    'instance tacker plugin will use')),
@@ -76,19 +147,160 @@ class VNFMonitor(object):
         if check_intvl is None:
             check_intvl = cfg.CONF.monitor.check_intvl
         self._status_check_intvl = check_intvl
+        self._probe_pool = eventlet.GreenPool(
+            cfg.CONF.monitor.probe_pool_size)
+        self.stats = MonitorStats()
+        self.start()
+
+    def start(self):
+        """Start the monitor thread of this process, if it is not running.
+
+        A forked process starts its own thread and drops the VNFs inherited
+        from its parent, which keeps monitoring them.
+        """
+        if self._pid == os.getpid():
+            return
+        if self._pid is not None:
+            with self._lock:
+                self._hosting_vnfs.clear()
+                del self._schedule[:]
+        self._pid = os.getpid()
         LOG.debug('Spawning VNF monitor thread')
         threading.Thread(target=self.__run__).start()
+        if self._cluster is not None:
+            self._cluster.start()
+
+    def join_cluster(self, sync):
+        """Monitor only the share of the VNFs of this process.
+
+        :param sync: callable run after every heartbeat of the cluster
+                     member, to add the VNFs this process owns and delete
+                     the others
+        """
+        if self._cluster is None:
+            self._cluster = monitor_cluster.MonitorCluster(sync)
+        self._cluster.start()
+
+    def leave_cluster(self):
+        """Hand the VNFs of this process to the other cluster members."""
+        if self._cluster is not None:
+            self._cluster.leave()
+
+    def load_hosting_vnfs(self, load):
+        """Run load in the background, to add the VNFs already running.
+
+        :param load: callable adding the VNFs and returning their number
+        """
+        def _load():
+            started = time.time()
+            try:
+                count = load()
+            except Exception:
+                LOG.exception(_('Unable to load the monitored vnfs'))
+                return
+            LOG.info(_('Loaded %(count)d monitored vnfs in %(time).1fs'),
+                     {'count': count, 'time': time.time() - started})
+        threading.Thread(target=_load).start()
+
+    def owns(self, vnf_id):
+        """Whether this process monitors vnf_id."""
+        return self._cluster is None or self._cluster.owns(vnf_id)
+
+    def get_monitored_vnf_ids(self):
+        with self._lock:
+            return set(self._hosting_vnfs)
 
     def __run__(self):
+        sweep_end = time.time() + self._status_check_intvl
         while(1):
-            time.sleep(self._status_check_intvl)
-
+            now = time.time()
+            due = []
             with self._lock:
-                for hosting_vnf in self._hosting_vnfs.values():
-                    if hosting_vnf.get('dead', False):
-                        continue
+                while self._schedule and self._schedule[0][0] <= now:
+                    due.append(heapq.heappop(self._schedule))
+                next_due = self._schedule[0][0] if self._schedule else None
+
+            # probes run without the lock held, so a slow target only
+            # delays its own batch; drivers get their due probes batched
+            batches = {}
+            for entry in due:
+                batches.setdefault(entry[4], []).append(entry)
+            batch_size = cfg.CONF.monitor.probe_batch_size
+            for driver, entries in batches.items():
+                for i in range(0, len(entries), batch_size):
+                    self._probe_pool.spawn_n(self._run_probes, driver,
+                                             entries[i:i + batch_size])
+
+            if now >= sweep_end:
+                sweep = self.stats.rollover(
+                    now, len(self._schedule), self._probe_pool.running())
+                LOG.debug('VNF monitor sweep: %s', sweep)
+                sweep_end = now + self._status_check_intvl
+
+            wake_at = sweep_end
+            if next_due is not None:
+                wake_at = min(wake_at, next_due)
+            time.sleep(max(wake_at - time.time(), 0))
+
+    def get_stats(self):
+        """Return the figures of the last completed sweep."""
+        return self.stats.last_sweep
+
+    def _schedule_probe(self, due, hosting_vnf, vdu, driver):
+        heapq.heappush(self._schedule,
+                       (due, next(self._seq), hosting_vnf, vdu, driver))
+
+    def _schedule_hosting_vnf(self, hosting_vnf):
+        vdupolicies = hosting_vnf['monitoring_policy']['vdus']
+        vnf_delay = hosting_vnf['monitoring_policy'].get(
+            'monitoring_delay', self.boot_wait)
+        boot_at = timeutils.delta_seconds(
+            timeutils.utcnow(), hosting_vnf['boot_at']) + time.time()
 
-                    self.run_monitor(hosting_vnf)
+        for vdu, policy in vdupolicies.items():
+            for driver in policy.keys():
+                params = policy[driver].get('monitoring_params', {})
+                vdu_delay = params.get('monitoring_delay', vnf_delay)
+                self._schedule_probe(boot_at + int(vdu_delay),
+                                     hosting_vnf, vdu, driver)
+
+    def _is_monitored(self, hosting_vnf):
+        return (self._hosting_vnfs.get(hosting_vnf['id']) is hosting_vnf and
+                not hosting_vnf.get('dead'))
+
+    def _run_probes(self, driver, entries):
+        entries = [entry for entry in entries
+                   if self._is_monitored(entry[2])]
+        if not entries:
+            return
+
+        probes = [(hosting_vnf['vnf'],
+                   self._probe_params(hosting_vnf, vdu, driver))
+                  for _due, _seq, hosting_vnf, vdu, _driver in entries]
+        started = time.time()
+        try:
+            results = self.monitor_call_batch(driver, probes)
+        except Exception:
+            LOG.exception(_('monitor driver %s failed'), driver)
+            results = [None] * len(entries)
+        finished = time.time()
+
+        with self._lock:
+            for due, _seq, hosting_vnf, vdu, _driver in entries:
+                self.stats.record(due, started, finished)
+                if self._is_monitored(hosting_vnf):
+                    next_due = max(due + self._status_check_intvl, finished)
+                    self._schedule_probe(next_due, hosting_vnf, vdu, driver)
+
+        for entry, driver_return in zip(entries, results):
+            hosting_vnf, vdu = entry[2], entry[3]
+            try:
+                self._handle_driver_return(hosting_vnf, vdu, driver,
+                                           driver_return)
+            except Exception:
+                LOG.exception(_('monitor action failed for vnf %(vnf)s '
+                                'vdu %(vdu)s'),
+                              {'vnf': hosting_vnf['id'], 'vdu': vdu})
 
     @staticmethod
     def to_hosting_vnf(vnf_dict, action_cb):
@@ -109,6 +321,30 @@ class VNFMonitor(object):
         new_vnf['boot_at'] = timeutils.utcnow()
         with self._lock:
             self._hosting_vnfs[new_vnf['id']] = new_vnf
+            self._schedule_hosting_vnf(new_vnf)
+
+    def add_hosting_vnfs(self, hosting_vnfs):
+        """Add VNFs which have been running for a while, e.g. on startup.
+
+        Their boot delay is over. Every VNF is first probed at its own
+        offset within the check interval, so that many VNFs added at once
+        are not all probed at once.
+        """
+        now = time.time()
+        boot_at = timeutils.utcnow()
+        interval = self._status_check_intvl
+        with self._lock:
+            for hosting_vnf in hosting_vnfs:
+                hosting_vnf['boot_at'] = boot_at
+                self._hosting_vnfs[hosting_vnf['id']] = hosting_vnf
+                offset = (zlib.crc32(hosting_vnf['id'].encode('utf-8')) &
+                          0xffffffff) % 1000
+                due = now + offset * interval / 1000.0
+                vdupolicies = hosting_vnf['monitoring_policy']['vdus']
+                for vdu, policy in vdupolicies.items():
+                    for driver in policy.keys():
+                        self._schedule_probe(due, hosting_vnf, vdu, driver)
+        LOG.debug('Added %d running vnfs', len(hosting_vnfs))
 
     def delete_hosting_vnf(self, vnf_id):
         LOG.debug('deleting vnf_id %(vnf_id)s', {'vnf_id': vnf_id})
@@ -118,9 +354,18 @@ class VNFMonitor(object):
                 LOG.debug('deleting vnf_id %(vnf_id)s, Mgmt IP %(ips)s',
                           {'vnf_id': vnf_id,
                            'ips': hosting_vnf['management_ip_addresses']})
+        if not hosting_vnf:
+            return
+        drivers = set()
+        for policy in hosting_vnf['monitoring_policy']['vdus'].values():
+            drivers.update(policy.keys())
+        for driver in drivers:
+            try:
+                self.monitor_delete(driver, hosting_vnf['vnf'])
+            except Exception:
+                LOG.exception(_('monitor driver %s failed'), driver)
 
     def run_monitor(self, hosting_vnf):
-        mgmt_ips = hosting_vnf['management_ip_addresses']
         vdupolicies = hosting_vnf['monitoring_policy']['vdus']
 
         vnf_delay = hosting_vnf['monitoring_policy'].get(
@@ -141,22 +386,36 @@ class VNFMonitor(object):
                         vdu_delay):
                         continue
 
-                actions = policy[driver].get('actions', {})
-                if 'mgmt_ip' not in params:
-                    params['mgmt_ip'] = mgmt_ips[vdu]
+                self._monitor_vdu(hosting_vnf, vdu, driver)
 
-                driver_return = self.monitor_call(driver,
-                                                  hosting_vnf['vnf'],
-                                                  params)
+    def _probe_params(self, hosting_vnf, vdu, driver):
+        policy = hosting_vnf['monitoring_policy']['vdus'][vdu][driver]
+        params = policy.get('monitoring_params', {})
+        if 'mgmt_ip' not in params:
+            params['mgmt_ip'] = hosting_vnf['management_ip_addresses'][vdu]
+        return params
 
-                LOG.debug('driver_return %s', driver_return)
+    def _handle_driver_return(self, hosting_vnf, vdu, driver, driver_return):
+        LOG.debug('driver_return %s', driver_return)
 
-                if driver_return in actions:
-                    action = actions[driver_return]
-                    hosting_vnf['action_cb'](hosting_vnf, action)
+        policy = hosting_vnf['monitoring_policy']['vdus'][vdu][driver]
+        actions = policy.get('actions', {})
+        if driver_return in actions:
+            action = actions[driver_return]
+            hosting_vnf['action_cb'](hosting_vnf, action)
+
+    def _monitor_vdu(self, hosting_vnf, vdu, driver):
+        params = self._probe_params(hosting_vnf, vdu, driver)
+        driver_return = self.monitor_call(driver,
+                                          hosting_vnf['vnf'],
+                                          params)
+        self._handle_driver_return(hosting_vnf, vdu, driver, driver_return)
 
     def mark_dead(self, vnf_id):
-        self._hosting_vnfs[vnf_id]['dead'] = True
+        # the vnf may have moved to another member of the monitor cluster
+        hosting_vnf = self._hosting_vnfs.get(vnf_id)
+        if hosting_vnf:
+            hosting_vnf['dead'] = True
 
     def _invoke(self, driver, **kwargs):
         method = inspect.stack()[1][3]
@@ -175,6 +434,12 @@ class VNFMonitor(object):
         return self._invoke(driver,
                             vnf=vnf_dict, kwargs=kwargs)
 
+    def monitor_call_batch(self, driver, probes):
+        return self._invoke(driver, probes=probes)
+
+    def monitor_delete(self, driver, vnf_dict):
+        return self._invoke(driver, vnf=vnf_dict)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ActionPolicy(object):
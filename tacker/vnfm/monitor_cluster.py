@@ -0,0 +1,169 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Share the monitoring of the VNFs between monitor processes.
+
+Every tacker-server worker and tacker-conductor process monitoring VNFs
+registers as a member of the cluster and renews a heartbeat in the
+database. The VNFs are assigned to the live members by consistent hashing,
+so when a member joins or dies only the VNFs of its share move. A server
+with several API workers always shares the monitoring this way.
+"""
+
+import bisect
+import hashlib
+import os
+import socket
+import struct
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from tacker._i18n import _LE, _LI
+from tacker import context as t_context
+from tacker.db.vm import monitor_member_db
+
+LOG = logging.getLogger(__name__)
+
+OPTS = [
+    cfg.BoolOpt('enabled', default=False,
+                help=_("Share the monitoring of the VNFs between all the "
+                       "tacker-server workers and tacker-conductor "
+                       "processes, instead of monitoring every VNF in the "
+                       "process that created it. Always done when "
+                       "api_workers is above 1")),
+    cfg.IntOpt('heartbeat_interval', default=10,
+               help=_("Seconds between two heartbeats of a monitor "
+                      "process, which also looks up the VNFs it monitors "
+                      "then")),
+    cfg.IntOpt('member_timeout', default=30,
+               help=_("Seconds after its last heartbeat a monitor process "
+                      "is considered dead and its VNFs moved to the other "
+                      "processes")),
+    cfg.IntOpt('virtual_nodes', default=64,
+               help=_("Number of points of each monitor process on the "
+                      "hash ring, more points spread the VNFs more "
+                      "evenly")),
+]
+cfg.CONF.register_opts(OPTS, 'monitor_cluster')
+cfg.CONF.import_opt('api_workers', 'tacker.service')
+
+
+def config_opts():
+    return [('monitor_cluster', OPTS)]
+
+
+def is_enabled():
+    """Whether the monitor processes share the VNFs as a cluster.
+
+    Several API workers would each monitor, and respawn, every VNF, so
+    they form a cluster even when [monitor_cluster] is not enabled.
+    """
+    return cfg.CONF.monitor_cluster.enabled or cfg.CONF.api_workers > 1
+
+
+def _hash(key):
+    digest = hashlib.md5(key.encode('utf-8')).digest()
+    return struct.unpack('>I', digest[:4])[0]
+
+
+class HashRing(object):
+    """Consistent hash ring of members.
+
+    Each member owns the keys hashed between its points and the previous
+    points of the ring, so adding or removing a member only moves keys
+    from or to that member.
+    """
+
+    def __init__(self, members, virtual_nodes):
+        self.members = frozenset(members)
+        ring = sorted((_hash('%s-%d' % (member, i)), member)
+                      for member in self.members
+                      for i in range(virtual_nodes))
+        self._hashes = [point for point, _member in ring]
+        self._members = [member for _point, member in ring]
+
+    def get_member(self, key):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key))
+        return self._members[index % len(self._members)]
+
+
+class MonitorCluster(object):
+    """Membership of this process in the VNF monitor cluster.
+
+    :param sync: callable run after every heartbeat, to monitor the VNFs
+                 this process owns and to stop monitoring the others
+    """
+
+    def __init__(self, sync):
+        self._sync = sync
+        self._db = monitor_member_db.MonitorMemberDb()
+        self._ring = HashRing([], 0)
+        self._pid = None
+        self.member_id = None
+
+    def start(self):
+        """Join the cluster, if this process has not joined it yet.
+
+        A forked process joins as a new member.
+        """
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self.member_id = uuidutils.generate_uuid()
+        self._ring = HashRing([], 0)
+        LOG.info(_LI('Joining the VNF monitor cluster as %s'),
+                 self.member_id)
+        threading.Thread(target=self._run, args=(self.member_id,)).start()
+
+    def owns(self, vnf_id):
+        member_id = self.member_id
+        return (member_id is not None and
+                self._ring.get_member(vnf_id) == member_id)
+
+    def _run(self, member_id):
+        while member_id == self.member_id:
+            try:
+                self.heartbeat()
+            except Exception:
+                LOG.exception(_LE('VNF monitor cluster heartbeat failed'))
+            time.sleep(cfg.CONF.monitor_cluster.heartbeat_interval)
+
+    def heartbeat(self):
+        member_id = self.member_id
+        if member_id is None:
+            # left the cluster
+            return
+        context = t_context.get_admin_context()
+        self._db.heartbeat(context, member_id, socket.gethostname(),
+                           self._pid)
+        members = self._db.get_live_members(
+            context, cfg.CONF.monitor_cluster.member_timeout)
+        if self._ring.members != frozenset(members):
+            LOG.info(_LI('VNF monitor cluster members: %s'),
+                     ', '.join(members))
+            self._ring = HashRing(members,
+                                  cfg.CONF.monitor_cluster.virtual_nodes)
+        self._sync()
+
+    def leave(self):
+        """Leave the cluster, the other members take over at once."""
+        if self.member_id is None or self._pid != os.getpid():
+            return
+        member_id, self.member_id = self.member_id, None
+        self._ring = HashRing([], 0)
+        self._db.leave(t_context.get_admin_context(), member_id)
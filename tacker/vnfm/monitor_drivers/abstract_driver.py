@@ -15,10 +15,25 @@
 
 import abc
 
+import eventlet
+from eventlet import semaphore
+from oslo_config import cfg
 import six
 
 from tacker.api import extensions
 
+OPTS = [
+    cfg.IntOpt('driver_concurrency', default=32,
+               help=_("maximum number of monitor_call run at once by a "
+                      "monitor driver without batch support, over all its "
+                      "probe batches")),
+]
+cfg.CONF.register_opts(OPTS, 'monitor')
+
+
+def config_opts():
+    return [('monitor', OPTS)]
+
 
 @six.add_metaclass(abc.ABCMeta)
 class VNFMonitorAbstractDriver(extensions.PluginInterface):
@@ -76,6 +91,35 @@ class VNFMonitorAbstractDriver(extensions.PluginInterface):
         """
         pass
 
+    def monitor_call_batch(self, probes):
+        """Monitor a batch of VDUs.
+
+        Drivers able to check many targets at once should override this;
+        by default monitor_call is invoked for the probes concurrently, at
+        most [monitor] driver_concurrency at once over all the batches the
+        driver runs.
+
+        :param probes: list of (vnf, kwargs) tuples
+        :returns: list of monitor_call results, in the order of probes
+        """
+        limit = getattr(self, '_call_semaphore', None)
+        if limit is None:
+            limit = self._call_semaphore = semaphore.Semaphore(
+                cfg.CONF.monitor.driver_concurrency)
+
+        def _call(probe):
+            with limit:
+                return self.monitor_call(*probe)
+        pool = eventlet.GreenPool(max(len(probes), 1))
+        return list(pool.imap(_call, probes))
+
+    def monitor_delete(self, vnf):
+        """Forget the state kept for a VNF no longer monitored.
+
+        :param vnf: dict of the VNF, as passed to monitor_call
+        """
+        pass
+
     def monitor_service_driver(self, plugin, context, vnf,
                                service_instance):
         # use same monitor driver to communicate with service
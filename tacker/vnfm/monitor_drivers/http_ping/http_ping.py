@@ -12,10 +12,15 @@
 #    under the License.
 #
 
+import collections
+import socket
+import threading
+
+import eventlet
+from eventlet import semaphore
 from oslo_config import cfg
 from oslo_log import log as logging
-import six.moves.urllib.error as urlerr
-import six.moves.urllib.request as urlreq
+from six.moves import http_client
 
 from tacker._i18n import _LW
 from tacker.common import log
@@ -29,7 +34,18 @@ OPTS = [
     cfg.IntOpt('timeout', default=1,
                help=_('number of seconds to wait for a response')),
     cfg.IntOpt('port', default=80,
-               help=_('HTTP port number to send request'))
+               help=_('HTTP port number to send request')),
+    cfg.StrOpt('method', default='GET', choices=['GET', 'HEAD'],
+               help=_('HTTP method of the health request')),
+    cfg.IntOpt('failure_threshold', default=1,
+               help=_('number of consecutive failed checks before '
+                      'failure is reported')),
+    cfg.IntOpt('max_idle_connections', default=2,
+               help=_('number of idle keep-alive connections kept per '
+                      'endpoint')),
+    cfg.IntOpt('batch_concurrency', default=32,
+               help=_('number of endpoints checked concurrently, over all '
+                      'the batches run at once')),
 ]
 cfg.CONF.register_opts(OPTS, 'monitor_http_ping')
 
@@ -38,7 +54,44 @@ def config_opts():
     return [('monitor_http_ping', OPTS)]
 
 
+class ConnectionPool(object):
+    """Idle keep-alive HTTP connections per (host, port)."""
+
+    def __init__(self, max_idle):
+        self._max_idle = max_idle
+        self._idle = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def get(self, host, port, timeout):
+        """Return an idle connection to the endpoint, or None."""
+        with self._lock:
+            idle = self._idle.get((host, port))
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn
+
+    def put(self, host, port, conn):
+        with self._lock:
+            idle = self._idle[(host, port)]
+            if len(idle) < self._max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+
 class VNFMonitorHTTPPing(abstract_driver.VNFMonitorAbstractDriver):
+    def __init__(self):
+        super(VNFMonitorHTTPPing, self).__init__()
+        conf = cfg.CONF.monitor_http_ping
+        self._pool = ConnectionPool(conf.max_idle_connections)
+        self._failures = {}   # (vnf_id, mgmt_ip, port) => failure count
+        self._failures_lock = threading.Lock()
+        # shared by the batches run at once
+        self._batch_semaphore = semaphore.Semaphore(conf.batch_concurrency)
+
     def get_type(self):
         return 'http_ping'
 
@@ -52,25 +105,88 @@ class VNFMonitorHTTPPing(abstract_driver.VNFMonitorAbstractDriver):
         LOG.debug(_('monitor_url %s'), vnf)
         return vnf.get('monitor_url', '')
 
-    def _is_pingable(self, mgmt_ip='', retry=5, timeout=5, port=80, **kwargs):
-        """Checks whether the server is reachable by using urllib.
+    def _send(self, conn, method):
+        try:
+            conn.request(method, '/', headers={'Connection': 'keep-alive'})
+            response = conn.getresponse()
+            response.read()
+        except (socket.error, http_client.HTTPException):
+            conn.close()
+            raise
+        return response
+
+    def _request(self, mgmt_ip, port, timeout, method):
+        conn = self._pool.get(mgmt_ip, port, timeout)
+        if conn is not None:
+            try:
+                response = self._send(conn, method)
+                return self._finish(mgmt_ip, port, conn, response)
+            except socket.timeout:
+                raise
+            except (socket.error, http_client.HTTPException):
+                # the endpoint may have closed the idle connection, which
+                # says nothing about its health: retry on a new connection
+                LOG.debug('Kept-alive connection to %(ip)s:%(port)s failed',
+                          {'ip': mgmt_ip, 'port': port})
+        conn = http_client.HTTPConnection(mgmt_ip, port, timeout=timeout)
+        return self._finish(mgmt_ip, port, conn, self._send(conn, method))
 
-        Waits for connectivity for `timeout` seconds,
-        and if connection refused, it will retry `retry`
-        times.
+    def _finish(self, mgmt_ip, port, conn, response):
+        if response.will_close:
+            conn.close()
+        else:
+            self._pool.put(mgmt_ip, port, conn)
+        return response.status < 400
+
+    def _is_pingable(self, mgmt_ip='', retry=5, timeout=5, port=80,
+                     method=None, **kwargs):
+        """Checks whether the server is reachable over HTTP.
+
+        Requests are sent over a kept-alive connection to the endpoint,
+        and if the request fails, it will retry `retry` times, each time
+        waiting up to `timeout` seconds.
         :param mgmt_ip: IP to check
         :param retry: times to reconnect if connection refused
         :param timeout: seconds to wait for connection
         :param port: port number to check connectivity
+        :param method: HTTP method, GET or HEAD
         :return: bool - True or False depending on pingability.
         """
+        method = method or cfg.CONF.monitor_http_ping.method
         url = 'http://' + mgmt_ip + ':' + str(port)
         for retry_index in range(int(retry)):
             try:
-                urlreq.urlopen(url, timeout=timeout)
-                return True
-            except urlerr.URLError:
+                if self._request(mgmt_ip, int(port), float(timeout),
+                                 method):
+                    return True
+                LOG.warning(_LW('Error response from the url %s'), url)
+            except (socket.error, http_client.HTTPException):
                 LOG.warning(_LW('Unable to reach to the url %s'), url)
+        return False
+
+    def _check(self, vnf, kwargs):
+        """Apply the consecutive failure threshold to one check.
+
+        :return: True if healthy, 'failure' once failure_threshold checks
+                 in a row failed, None for failures below the threshold.
+        """
+        key = (vnf.get('id'), kwargs['mgmt_ip'], kwargs.get('port', 80))
+        threshold = int(kwargs.get(
+            'failure_threshold',
+            cfg.CONF.monitor_http_ping.failure_threshold))
+        if self._is_pingable(**kwargs):
+            with self._failures_lock:
+                self._failures.pop(key, None)
+            return True
+
+        with self._failures_lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+        if failures < threshold:
+            LOG.debug('%(url)s failed %(n)d of %(threshold)d checks',
+                      {'url': kwargs['mgmt_ip'], 'n': failures,
+                       'threshold': threshold})
+            return None
         return 'failure'
 
     @log.log
@@ -78,4 +194,20 @@ class VNFMonitorHTTPPing(abstract_driver.VNFMonitorAbstractDriver):
         if not kwargs['mgmt_ip']:
             return
 
-        return self._is_pingable(**kwargs)
+        return self._check(vnf, kwargs)
+
+    def monitor_delete(self, vnf):
+        with self._failures_lock:
+            for key in [key for key in self._failures
+                        if key[0] == vnf.get('id')]:
+                del self._failures[key]
+
+    def monitor_call_batch(self, probes):
+        def _call(probe):
+            vnf, kwargs = probe
+            if not kwargs['mgmt_ip']:
+                return
+            with self._batch_semaphore:
+                return self._check(vnf, kwargs)
+        pool = eventlet.GreenPool(max(len(probes), 1))
+        return list(pool.imap(_call, probes))
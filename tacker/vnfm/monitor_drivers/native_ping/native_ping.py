@@ -0,0 +1,108 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from tacker._i18n import _LW
+from tacker.common import icmp
+from tacker.common import log
+from tacker.vnfm.monitor_drivers import abstract_driver
+
+
+LOG = logging.getLogger(__name__)
+OPTS = [
+    cfg.IntOpt('count', default=1,
+               help=_('number of ICMP packets to send')),
+    cfg.FloatOpt('timeout', default=1,
+                 help=_('number of seconds to wait for a response')),
+    cfg.FloatOpt('interval', default=1,
+                 help=_('number of seconds to wait between packets'))
+]
+cfg.CONF.register_opts(OPTS, 'monitor_native_ping')
+
+
+def config_opts():
+    return [('monitor_native_ping', OPTS)]
+
+
+class VNFMonitorNativePing(abstract_driver.VNFMonitorAbstractDriver):
+    """Ping driver sending ICMP echo from the tacker process itself.
+
+    Accepts the same monitoring_params as the ping driver but shares one
+    ICMP socket across all probes instead of running a ping command.
+    """
+
+    def get_type(self):
+        return 'native_ping'
+
+    def get_name(self):
+        return 'native_ping'
+
+    def get_description(self):
+        return 'Tacker VNFMonitor in-process ICMP Ping Driver'
+
+    def monitor_url(self, plugin, context, vnf):
+        LOG.debug(_('monitor_url %s'), vnf)
+        return vnf.get('monitor_url', '')
+
+    def _is_pingable(self, mgmt_ip="", count=None, timeout=None,
+                     interval=None, **kwargs):
+        """Checks whether an IP address is reachable by pinging.
+
+        :param mgmt_ip: IP to check
+        :return: bool - True or string 'failure' depending on pingability.
+        """
+        conf = cfg.CONF.monitor_native_ping
+        if icmp.get_prober().is_reachable(
+                mgmt_ip,
+                count=count or conf.count,
+                timeout=timeout or conf.timeout,
+                interval=interval or conf.interval):
+            return True
+        LOG.warning(_LW("Cannot ping ip address: %s"), mgmt_ip)
+        return 'failure'
+
+    @log.log
+    def monitor_call(self, vnf, kwargs):
+        if not kwargs['mgmt_ip']:
+            return
+
+        return self._is_pingable(**kwargs)
+
+    def monitor_call_batch(self, probes):
+        """Ping every probe sharing the same parameters in one batch."""
+        conf = cfg.CONF.monitor_native_ping
+        groups = {}
+        for index, (vnf, kwargs) in enumerate(probes):
+            if not kwargs['mgmt_ip']:
+                continue
+            params = (kwargs.get('count') or conf.count,
+                      kwargs.get('timeout') or conf.timeout,
+                      kwargs.get('interval') or conf.interval)
+            groups.setdefault(params, []).append(index)
+
+        results = [None] * len(probes)
+        for (count, timeout, interval), indexes in groups.items():
+            reachable = icmp.get_prober().ping(
+                [probes[i][1]['mgmt_ip'] for i in indexes],
+                count=count, timeout=timeout, interval=interval)
+            for i in indexes:
+                mgmt_ip = probes[i][1]['mgmt_ip']
+                if reachable[mgmt_ip]:
+                    results[i] = True
+                else:
+                    LOG.warning(_LW("Cannot ping ip address: %s"), mgmt_ip)
+                    results[i] = 'failure'
+        return results
@@ -13,7 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import os
+import threading
+import time
 
 from cryptography.fernet import Fernet
 from oslo_config import cfg
@@ -32,7 +35,16 @@ OPTS = [
     cfg.StrOpt(
         'default_vim', help=_('Default VIM for launching VNFs. '
         'This option is deprecated and will be removed in Ocata release.'),
-        deprecated_for_removal=True)
+        deprecated_for_removal=True),
+    cfg.IntOpt(
+        'vim_auth_cache_ttl', default=300,
+        help=_('Seconds the decrypted credentials of a VIM are kept in '
+               'memory for VNF lifecycle requests; 0 disables the cache')),
+    cfg.IntOpt(
+        'vim_keys_poll_interval', default=5,
+        help=_('Seconds between two checks of the VIM key files for '
+               'changes. The cached credentials of a VIM whose key file '
+               'changed are dropped; 0 disables the checks')),
 ]
 cfg.CONF.register_opts(OPTS, 'nfvo_vim')
 
@@ -41,6 +53,133 @@ def config_opts():
     return [('nfvo_vim', OPTS)]
 
 
+class VimKeyring(object):
+    """Decrypted VIM information, by VIM id, with a time to live.
+
+    Entries are dropped when the VIM is created, updated or deleted through
+    the NFVO plugin of this process, and when the key file of the VIM
+    changes, which covers the other API workers. A cached VIM is only
+    returned to the contexts allowed to read it from the database. The
+    default VIM is cached per tenant, and dropped whenever any VIM changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}      # vim_id => (expiry, vim_info)
+        self._defaults = {}     # (is_admin, tenant_id) => vim_id
+        self._generation = 0    # bumped by every invalidation
+        self._watcher = None
+
+    @staticmethod
+    def _visible(context, vim_info):
+        # same scoping as the model queries of the NFVO plugin
+        return (context.is_admin or vim_info.get('shared') or
+                vim_info.get('tenant_id') == context.tenant_id)
+
+    def get(self, context, vim_id, load):
+        """Return a copy of the information of a VIM.
+
+        :param context: the request context the VIM is read with
+        :param vim_id: the VIM id, None for the default VIM
+        :param load: callable returning the information with the
+                     password decrypted, when it is not cached
+        """
+        ttl = cfg.CONF.nfvo_vim.vim_auth_cache_ttl
+        if ttl <= 0:
+            return load()
+
+        scope = (bool(context.is_admin), context.tenant_id)
+        now = time.time()
+        with self._lock:
+            if vim_id is None:
+                entry = self._entries.get(self._defaults.get(scope))
+            else:
+                entry = self._entries.get(vim_id)
+            generation = self._generation
+        if entry and entry[0] > now and self._visible(context, entry[1]):
+            return copy.deepcopy(entry[1])
+
+        vim_info = load()
+        with self._lock:
+            if generation != self._generation:
+                # the VIM may have changed while it was loaded
+                return vim_info
+            self._entries[vim_info['id']] = (now + ttl,
+                                             copy.deepcopy(vim_info))
+            if vim_id is None:
+                self._defaults[scope] = vim_info['id']
+            self._start_watcher()
+        return vim_info
+
+    def invalidate(self, vim_id=None):
+        """Drop cached VIMs, optionally only one VIM and the defaults."""
+        with self._lock:
+            self._generation += 1
+            self._defaults.clear()
+            if vim_id is None:
+                self._entries.clear()
+                return
+            self._entries.pop(vim_id, None)
+
+    def _start_watcher(self):
+        interval = cfg.CONF.nfvo_vim.vim_keys_poll_interval
+        if self._watcher or interval <= 0:
+            return
+        self._watcher = _VimKeysWatcher(self)
+        thread = threading.Thread(target=self._watcher.run,
+                                  args=(interval,))
+        thread.daemon = True
+        thread.start()
+
+
+class _VimKeysWatcher(object):
+    """Drop the cached VIMs whose key file changed or was removed."""
+
+    def __init__(self, keyring):
+        self._keyring = keyring
+        self._loaded = self._signature()
+
+    @staticmethod
+    def _signature():
+        key_dir = CONF.vim_keys.openstack
+        signature = {}
+        try:
+            names = os.listdir(key_dir)
+        except OSError:
+            return signature
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(key_dir, name))
+            except OSError:
+                continue
+            signature[name] = (stat.st_mtime, stat.st_size)
+        return signature
+
+    def poll(self):
+        signature = self._signature()
+        changed = [vim_id for vim_id in set(self._loaded) | set(signature)
+                   if self._loaded.get(vim_id) != signature.get(vim_id)]
+        self._loaded = signature
+        for vim_id in changed:
+            LOG.debug('Key file of vim %s changed', vim_id)
+            self._keyring.invalidate(vim_id)
+
+    def run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.poll()
+            except Exception:
+                LOG.exception(_('VIM key files watcher error'))
+
+
+_KEYRING = VimKeyring()
+
+
+def invalidate_vim_auth(vim_id=None):
+    _KEYRING.invalidate(vim_id)
+
+
 class VimClient(object):
     def get_vim(self, context, vim_id=None, region_name=None):
         """Get Vim information for provided VIM id
@@ -54,33 +193,19 @@ class VimClient(object):
         if not vim_id:
             LOG.debug(_('VIM id not provided. Attempting to find default '
                         'VIM id'))
-            try:
-                vim_info = nfvo_plugin.get_default_vim(context)
-            except Exception:
-                LOG.debug(_('Default vim not set in db.'
-                    'Attempting to find default vim from tacker.conf'))
-                vim_name = cfg.CONF.nfvo_vim.default_vim
-                if not vim_name:
-                    raise nfvo.VimDefaultNameNotDefined()
-                versionutils.report_deprecated_feature(LOG, 'Configuration of '
-                    'default-vim in tacker.conf is deprecated and will be '
-                    'removed in Newton cycle')
-                vim_info = self._get_default_vim_by_name(context,
-                                nfvo_plugin,
-                            vim_name)
+            vim_info = _KEYRING.get(
+                context, None, lambda: self._build_vim_info(
+                    self._get_default_vim(context, nfvo_plugin)))
         else:
-            try:
-                vim_info = nfvo_plugin.get_vim(context, vim_id,
-                                               mask_password=False)
-            except Exception:
-                raise nfvo.VimNotFoundException(vim_id=vim_id)
+            vim_info = _KEYRING.get(
+                context, vim_id, lambda: self._build_vim_info(
+                    self._get_vim(context, nfvo_plugin, vim_id)))
         LOG.debug(_('VIM info found for vim id %s'), vim_id)
         if region_name and not self.region_valid(vim_info['placement_attr']
                                                  ['regions'], region_name):
             raise nfvo.VimRegionNotFoundException(region_name=region_name)
 
-        vim_auth = self._build_vim_auth(vim_info)
-        vim_res = {'vim_auth': vim_auth, 'vim_id': vim_info['id'],
+        vim_res = {'vim_auth': vim_info['auth_cred'], 'vim_id': vim_info['id'],
                    'vim_name': vim_info.get('name', vim_info['id'])}
         return vim_res
 
@@ -88,6 +213,32 @@ class VimClient(object):
     def region_valid(vim_regions, region_name):
         return region_name in vim_regions
 
+    def _get_default_vim(self, context, nfvo_plugin):
+        try:
+            return nfvo_plugin.get_default_vim(context)
+        except Exception:
+            LOG.debug(_('Default vim not set in db.'
+                'Attempting to find default vim from tacker.conf'))
+            vim_name = cfg.CONF.nfvo_vim.default_vim
+            if not vim_name:
+                raise nfvo.VimDefaultNameNotDefined()
+            versionutils.report_deprecated_feature(LOG, 'Configuration of '
+                'default-vim in tacker.conf is deprecated and will be '
+                'removed in Newton cycle')
+            return self._get_default_vim_by_name(context, nfvo_plugin,
+                                                 vim_name)
+
+    @staticmethod
+    def _get_vim(context, nfvo_plugin, vim_id):
+        try:
+            return nfvo_plugin.get_vim(context, vim_id, mask_password=False)
+        except Exception:
+            raise nfvo.VimNotFoundException(vim_id=vim_id)
+
+    def _build_vim_info(self, vim_info):
+        vim_info['auth_cred'] = self._build_vim_auth(vim_info)
+        return vim_info
+
     # Deprecated. Will be removed in Ocata release
     def _get_default_vim_by_name(self, context, plugin, vim_name):
         try:
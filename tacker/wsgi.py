@@ -24,15 +24,16 @@ import socket
 import ssl
 import sys
 import time
+import types
 from xml.etree import ElementTree as etree
 from xml.parsers import expat
 
+import eventlet.semaphore
 import eventlet.wsgi
 # eventlet.patcher.monkey_patch(all=False, socket=True, thread=True)
 from oslo_config import cfg
 import oslo_i18n as i18n
 from oslo_log import log as logging
-from oslo_serialization import jsonutils
 from oslo_service import service as common_service
 from oslo_service import systemd
 from oslo_utils import excutils
@@ -43,8 +44,10 @@ import webob.exc
 
 from tacker.common import constants
 from tacker.common import exceptions as exception
+from tacker.common import json_codec
 from tacker import context
 from tacker.db import api
+from tacker import manager
 
 
 socket_opts = [
@@ -76,16 +79,67 @@ socket_opts = [
                       "the server securely")),
 ]
 
+wsgi_opts = [
+    cfg.IntOpt('wsgi_default_pool_size',
+               default=1000,
+               help=_("Number of green threads serving the connections of "
+                      "an API worker. Further connections wait in the "
+                      "socket backlog")),
+    cfg.IntOpt('api_max_concurrent_requests',
+               default=0,
+               help=_("Maximum number of requests an API worker processes "
+                      "at once. 0 derives it from the database connection "
+                      "pool, max_pool_size plus max_overflow, as every "
+                      "request may hold a connection. A negative value "
+                      "disables admission control")),
+    cfg.IntOpt('api_max_queued_requests',
+               default=100,
+               help=_("Maximum number of requests an API worker keeps "
+                      "waiting for a free slot when api_max_concurrent_"
+                      "requests are in progress. Further requests are "
+                      "rejected with 503 Service Unavailable")),
+    cfg.FloatOpt('api_queue_timeout',
+                 default=10,
+                 help=_("Seconds a request waits for a free slot before it "
+                        "is rejected with 503 Service Unavailable")),
+    cfg.IntOpt('api_retry_after',
+               default=5,
+               help=_("Seconds clients are asked to wait, with a Retry-"
+                      "After header, before retrying a rejected request")),
+    cfg.IntOpt('api_stats_interval',
+               default=60,
+               help=_("Seconds between two log lines reporting the in-"
+                      "flight and queued requests of an API worker and its "
+                      "admitted and rejected request counters. Nothing is "
+                      "logged while they do not change; 0 disables them")),
+]
+
 CONF = cfg.CONF
 CONF.register_opts(socket_opts)
+CONF.register_opts(wsgi_opts)
 
 
 def config_opts():
-    return [(None, socket_opts)]
+    return [(None, socket_opts + wsgi_opts)]
 
 LOG = logging.getLogger(__name__)
 
 
+def _start_plugin_workers():
+    for plugin in manager.TackerManager.get_service_plugins().values():
+        if hasattr(plugin, 'start_workers'):
+            plugin.start_workers()
+
+
+def _stop_plugin_workers():
+    for plugin in manager.TackerManager.get_service_plugins().values():
+        if hasattr(plugin, 'stop_workers'):
+            try:
+                plugin.stop_workers()
+            except Exception:
+                LOG.exception(_('Unable to stop the workers of %s'), plugin)
+
+
 class WorkerService(common_service.ServiceBase):
     """Wraps a worker to be handled by ProcessLauncher."""
 
@@ -99,6 +153,9 @@ class WorkerService(common_service.ServiceBase):
         # existing sql connections avoids producting 500 errors later when they
         # are discovered to be broken.
         api.get_engine().pool.dispose()
+        # the background threads of the plugins, e.g. the VNF monitor, are
+        # not run by the forked hub and start again in every worker
+        _start_plugin_workers()
         self._server = self._service.pool.spawn(self._service._run,
                                                 self._application,
                                                 self._service._socket)
@@ -110,19 +167,118 @@ class WorkerService(common_service.ServiceBase):
         if isinstance(self._server, eventlet.greenthread.GreenThread):
             self._server.kill()
             self._server = None
+        _stop_plugin_workers()
 
     def reset(self):
         pass
 
 
+def _max_concurrent_requests():
+    """Return the request concurrency limit of a worker, None for none."""
+    limit = CONF.api_max_concurrent_requests
+    if limit < 0:
+        return None
+    if limit == 0:
+        if not CONF.database.max_pool_size:
+            return None
+        limit = CONF.database.max_pool_size + max(
+            CONF.database.max_overflow or 0, 0)
+    return limit
+
+
+class AdmissionControl(object):
+    """Bound the number of requests an API worker processes at once.
+
+    Requests beyond max_requests wait for a slot, up to max_queued of them
+    and for at most queue_timeout seconds. The others are rejected right
+    away with a 503 and a Retry-After header, so that an overloaded worker
+    sheds load early rather than letting every request time out.
+    """
+
+    def __init__(self, application, max_requests, max_queued, queue_timeout,
+                 retry_after):
+        self.application = application
+        self._max_queued = max_queued
+        self._queue_timeout = queue_timeout
+        self._retry_after = retry_after
+        self._slots = eventlet.semaphore.Semaphore(max_requests)
+        self._lock = eventlet.semaphore.Semaphore()
+        self._last_warning = 0
+        self._gauges = {'max_in_flight': max_requests,
+                        'max_queued': max_queued,
+                        'in_flight': 0, 'queued': 0,
+                        'admitted': 0, 'rejected': 0}
+
+    def stats(self):
+        """Return the in-flight and queued request gauges and counters."""
+        with self._lock:
+            return dict(self._gauges)
+
+    def _report_stats(self, previous):
+        stats = self.stats()
+        if stats != previous:
+            LOG.info(_('API worker requests: %s'), stats)
+        return stats
+
+    def report_stats(self, interval):
+        """Log the gauges and counters every interval seconds."""
+        reported = None
+        while True:
+            eventlet.sleep(interval)
+            reported = self._report_stats(reported)
+
+    def _admit(self):
+        if self._slots.acquire(blocking=False):
+            return True
+        with self._lock:
+            if self._gauges['queued'] >= self._max_queued:
+                return False
+            self._gauges['queued'] += 1
+        try:
+            return self._slots.acquire(timeout=self._queue_timeout)
+        finally:
+            with self._lock:
+                self._gauges['queued'] -= 1
+
+    def _reject(self, environ, start_response):
+        with self._lock:
+            self._gauges['rejected'] += 1
+            now = time.time()
+            warn = now - self._last_warning >= self._retry_after
+            if warn:
+                self._last_warning = now
+        if warn:
+            LOG.warning(_('API worker overloaded, rejecting requests: '
+                          '%s'), self.stats())
+        return webob.exc.HTTPServiceUnavailable(
+            explanation=_('The server is overloaded, retry later.'),
+            headers={'Retry-After': str(self._retry_after)})(
+                environ, start_response)
+
+    def __call__(self, environ, start_response):
+        if not self._admit():
+            return self._reject(environ, start_response)
+        with self._lock:
+            self._gauges['in_flight'] += 1
+            self._gauges['admitted'] += 1
+        try:
+            return self.application(environ, start_response)
+        finally:
+            with self._lock:
+                self._gauges['in_flight'] -= 1
+            self._slots.release()
+
+
 class Server(object):
     """Server class to manage multiple WSGI sockets and applications."""
 
-    def __init__(self, name, threads=1000):
+    def __init__(self, name, threads=None):
         # Raise the default from 8192 to accommodate large tokens
         eventlet.wsgi.MAX_HEADER_LINE = CONF.max_header_line
-        self.pool = eventlet.GreenPool(threads)
+        self.pool = eventlet.GreenPool(threads or
+                                       CONF.wsgi_default_pool_size)
         self.name = name
+        self.admission_control = None
         self._launcher = None
         self._server = None
 
@@ -216,6 +372,7 @@ class Server(object):
                                         backlog=backlog)
         if workers < 1:
             # For the case where only one process is required.
+            _start_plugin_workers()
             self._server = self.pool.spawn(self._run, application,
                                            self._socket)
             systemd.notify_once()
@@ -241,6 +398,7 @@ class Server(object):
             self._launcher.running = False
         else:
             self._server.kill()
+        _stop_plugin_workers()
 
     def wait(self):
         """Wait until all servers have completed running."""
@@ -254,6 +412,19 @@ class Server(object):
 
     def _run(self, application, socket):
         """Start a WSGI server in a new green thread."""
+        # every worker process bounds its own concurrency
+        max_requests = _max_concurrent_requests()
+        if max_requests:
+            self.admission_control = application = AdmissionControl(
+                application, max_requests, CONF.api_max_queued_requests,
+                CONF.api_queue_timeout, CONF.api_retry_after)
+            LOG.info(_('Processing at most %(requests)d requests at once, '
+                       'queuing %(queued)d more'),
+                     {'requests': max_requests,
+                      'queued': CONF.api_max_queued_requests})
+            if CONF.api_stats_interval > 0:
+                eventlet.spawn_n(self.admission_control.report_stats,
+                                 CONF.api_stats_interval)
         eventlet.wsgi.server(socket, application, custom_pool=self.pool,
                              log=LOG)
 
@@ -396,14 +567,67 @@ class DictSerializer(ActionDispatcher):
     def default(self, data):
         return ""
 
+    def serialize_iter(self, data, action='default'):
+        """Serialize data as an iterable of encoded chunks."""
+        body = self.serialize(data, action)
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        return [body]
+
 
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
+    # size of the chunks a streamed response body is written in
+    STREAM_CHUNK_SIZE = 65536
+
     def default(self, data):
-        def sanitizer(obj):
-            return six.text_type(obj)
-        return jsonutils.dumps(data, default=sanitizer)
+        return json_codec.dumps(data)
+
+    def _iter_default(self, data):
+        dumps = json_codec.get_codec().dumps
+        if not isinstance(data, dict):
+            yield dumps(data)
+            return
+        yield '{'
+        for index, (key, value) in enumerate(six.iteritems(data)):
+            yield '%s%s: ' % (', ' if index else '', dumps(key))
+            if isinstance(value, (list, types.GeneratorType)):
+                yield '['
+                for item_index, item in enumerate(value):
+                    yield '%s%s' % (', ' if item_index else '',
+                                    dumps(item))
+                yield ']'
+            else:
+                yield dumps(value)
+        yield '}'
+
+    def serialize_iter(self, data, action='default'):
+        """Serialize data as an iterable of encoded chunks.
+
+        The lists and generators directly under the top level keys,
+        typically the collection of a listing, are encoded one item at a
+        time, so the response is sent before the whole body is encoded and
+        is never held in memory at once.
+        """
+        if action != 'default':
+            return super(JSONDictSerializer, self).serialize_iter(data,
+                                                                  action)
+        return self._iter_chunks(self._iter_default(data))
+
+    def _iter_chunks(self, pieces):
+        chunk = []
+        size = 0
+        for piece in pieces:
+            piece = piece.encode('utf-8')
+            chunk.append(piece)
+            size += len(piece)
+            if size >= self.STREAM_CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield b''.join(chunk)
 
 
 class XMLDictSerializer(DictSerializer):
@@ -619,7 +843,7 @@ class JSONDeserializer(TextDeserializer):
 
     def _from_json(self, datastring):
         try:
-            return jsonutils.loads(datastring)
+            return json_codec.loads(datastring)
         except ValueError:
             msg = _("Cannot understand JSON")
             raise exception.MalformedRequestBody(reason=msg)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compare the JSON codecs of the API on VNF list payloads.
+
+Usage: tools/json_codec_benchmark.py [--vnfs N] [--repeat N]
+
+Every installed codec encodes and decodes a 'vnfs' collection whose items
+embed a VNFD and a HOT template, the way GET /v1.0/vnfs returns them.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import sys
+import timeit
+import uuid
+
+from oslo_utils import importutils
+
+from tacker.common import json_codec
+
+VNFD_TEMPLATE = """tosca_definitions_version: tosca_simple_profile_for_nfv_1_0_0
+description: Demo example
+metadata:
+  template_name: sample-tosca-vnfd
+topology_template:
+  node_templates:
+%s
+"""
+
+VDU_TEMPLATE = """    VDU%(index)d:
+      type: tosca.nodes.nfv.VDU.Tacker
+      capabilities:
+        nfv_compute:
+          properties:
+            num_cpus: 1
+            mem_size: 512 MB
+            disk_size: 1 GB
+      properties:
+        image: cirros-0.3.4-x86_64-uec
+        mgmt_driver: noop
+        monitoring_policy:
+          name: ping
+          parameters:
+            monitoring_delay: 45
+            count: 3
+            interval: 1
+            timeout: 2
+          actions:
+            failure: respawn
+"""
+
+HEAT_TEMPLATE = """heat_template_version: 2013-05-23
+description: 'Demo example'
+resources:
+%s
+"""
+
+HEAT_RESOURCE = """  VDU%(index)d:
+    type: OS::Nova::Server
+    properties:
+      availability_zone: nova
+      config_drive: false
+      flavor: {get_resource: VDU%(index)d_flavor}
+      image: cirros-0.3.4-x86_64-uec
+      networks:
+      - port: {get_resource: CP%(index)d}
+      user_data_format: SOFTWARE_CONFIG
+"""
+
+
+def make_vnf(vdus=3):
+    vdu_indexes = [{'index': index} for index in range(vdus)]
+    vnfd_id = str(uuid.uuid4())
+    now = datetime.datetime.utcnow()
+    return {
+        'id': uuid.uuid4(),
+        'tenant_id': uuid.uuid4().hex,
+        'name': 'vnf-%s' % vnfd_id[:8],
+        'description': 'Demo example',
+        'instance_id': str(uuid.uuid4()),
+        'mgmt_url': '{"VDU0": "192.168.120.3"}',
+        'status': 'ACTIVE',
+        'error_reason': None,
+        'vim_id': str(uuid.uuid4()),
+        'placement_attr': {'vim_name': 'VIM0', 'region_name': 'RegionOne'},
+        'created_at': now,
+        'updated_at': now,
+        'attributes': {
+            'heat_template': HEAT_TEMPLATE % ''.join(
+                HEAT_RESOURCE % index for index in vdu_indexes),
+            'monitoring_policy': '{"vdus": {"VDU0": {"ping": {}}}}',
+        },
+        'vnfd': {
+            'id': vnfd_id,
+            'name': 'vnfd-%s' % vnfd_id[:8],
+            'description': 'Demo example',
+            'mgmt_driver': 'noop',
+            'infra_driver': 'heat',
+            'service_types': [{'id': str(uuid.uuid4()),
+                               'service_type': 'vnfd'}],
+            'attributes': {'vnfd': VNFD_TEMPLATE % ''.join(
+                VDU_TEMPLATE % index for index in vdu_indexes)},
+        },
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--vnfs', type=int, default=1000,
+                        help='number of VNFs in the payload')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='number of timed runs per codec')
+    args = parser.parse_args(argv)
+
+    payload = {'vnfs': [make_vnf() for _i in range(args.vnfs)]}
+    encoded = json_codec.get_codec(json_codec.STDLIB).dumps(payload)
+    print('payload: %d VNFs, %d bytes encoded' % (args.vnfs, len(encoded)))
+    print('%-12s %12s %12s' % ('codec', 'dumps (ms)', 'loads (ms)'))
+    for name in (json_codec.STDLIB,) + json_codec.ACCELERATED:
+        if (name != json_codec.STDLIB and
+                importutils.try_import(name) is None):
+            print('%-12s %12s' % (name, 'not installed'))
+            continue
+        codec = json_codec.get_codec(name)
+        dumps = min(timeit.repeat(lambda: codec.dumps(payload),
+                                  number=1, repeat=args.repeat))
+        loads = min(timeit.repeat(lambda: codec.loads(encoded),
+                                  number=1, repeat=args.repeat))
+        print('%-12s %12.2f %12.2f' % (name, dumps * 1000, loads * 1000))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])